@@ -0,0 +1,194 @@
+# подключаем библиотеки и модули
+import time
+import numpy as np
+from main import BankAccount, BankError
+
+# коды операций в пакете
+DEPOSIT = 0
+WITHDRAW = 1
+
+# коды результата для каждой строки пакета (вместо объектов исключений)
+OK = 0
+NEGATIVE_AMOUNT = 1      # соответствует NegativeAmountError
+INSUFFICIENT_FUNDS = 2   # соответствует InsufficientFundsError
+ACCOUNT_LOCKED = 3       # соответствует AccountLockedError
+UNKNOWN_ACCOUNT = 4
+UNKNOWN_OPERATION = 5
+
+STATUS_NAMES = {
+    OK: "успешно",
+    NEGATIVE_AMOUNT: "отрицательная сумма",
+    INSUFFICIENT_FUNDS: "недостаточно средств",
+    ACCOUNT_LOCKED: "счет заблокирован",
+    UNKNOWN_ACCOUNT: "счет не найден",
+    UNKNOWN_OPERATION: "неизвестный тип операции",
+}
+
+
+# перевод строковых типов операций ("deposit"/"withdraw") в числовые коды
+def encode_operations(op_types):
+    op_types = np.asarray(op_types)
+    if op_types.dtype.kind not in "UO":
+        return op_types.astype(np.int8, copy=False)
+    codes = np.full(len(op_types), -1, dtype=np.int8)
+    codes[op_types == "deposit"] = DEPOSIT
+    codes[op_types == "withdraw"] = WITHDRAW
+    return codes
+
+
+# сколько векторных проходов делать до перехода к последовательному проходу по счетам:
+# каждый проход снимает только первый отказ в счете, поэтому на счете с тысячами
+# отказов проходы стоили бы O(k^2)
+MAX_PASSES = 8
+
+
+# накопительная сумма внутри групп: строки отсортированы по счету,
+# group_start[i] - индекс первой строки группы, к которой относится строка i
+def _grouped_cumsum(values, group_start):
+    total = np.cumsum(values)
+    return total - total[group_start] + values[group_start]
+
+
+# пакетное применение операций к массивам балансов и флагов блокировки.
+# account_ids - индексы счетов в массиве balances, op_types - коды операций,
+# amounts - суммы (лучше целые, например в копейках, чтобы не копить ошибку округления).
+# Семантика совпадает с последовательным вызовом deposit/withdraw по строкам:
+# отклонённая строка не меняет баланс и не влияет на соседние.
+# balances изменяется на месте, возвращается массив кодов результата по строкам
+def apply_batch(balances, locked, account_ids, op_types, amounts):
+    account_ids = np.asarray(account_ids, dtype=np.int64)
+    op_types = encode_operations(op_types)
+    amounts = np.asarray(amounts, dtype=balances.dtype)
+    size = len(account_ids)
+    status = np.zeros(size, dtype=np.uint8)
+    if size == 0:
+        return status
+
+    # проверки идут в обратном порядке приоритета, чтобы более важная ошибка
+    # перезаписала менее важную (как в BankAccount: сначала блокировка, потом сумма)
+    status[amounts <= 0] = NEGATIVE_AMOUNT
+    status[(op_types != DEPOSIT) & (op_types != WITHDRAW)] = UNKNOWN_OPERATION
+    known = (account_ids >= 0) & (account_ids < len(balances))
+    status[~known] = UNKNOWN_ACCOUNT
+    is_locked = np.zeros(size, dtype=bool)
+    is_locked[known] = locked[account_ids[known]]
+    status[is_locked] = ACCOUNT_LOCKED
+
+    # оставшиеся строки проверяем на достаточность средств:
+    # группируем по счету с сохранением порядка внутри счета
+    rows = np.flatnonzero(status == OK)
+    if len(rows) == 0:
+        return status
+    rows = rows[np.argsort(account_ids[rows], kind="stable")]
+    ids = account_ids[rows]
+    signed = np.where(op_types[rows] == DEPOSIT, amounts[rows], -amounts[rows])
+
+    start_balance = balances[ids]
+
+    # баланс может уйти в минус только на снятии; первая такая строка в каждом счете
+    # точно отклоняется, после чего пересчитываем только счета, где были отказы
+    active = np.ones(len(rows), dtype=bool)
+    focus = np.arange(len(rows))
+    for _ in range(MAX_PASSES):
+        if not len(focus):
+            break
+        focus_ids = ids[focus]
+        first = np.ones(len(focus), dtype=bool)
+        first[1:] = focus_ids[1:] != focus_ids[:-1]
+        group_start = np.maximum.accumulate(np.where(first, np.arange(len(focus)), 0))
+        deltas = np.where(active[focus], signed[focus], 0)
+        running = start_balance[focus] + _grouped_cumsum(deltas, group_start)
+        violations = np.flatnonzero(active[focus] & (running < 0))
+        if len(violations) == 0:
+            break
+        # внутри группы строки идут по порядку, поэтому первая ошибка - смена счета
+        violated_groups = group_start[violations]
+        first_violation = np.ones(len(violations), dtype=bool)
+        first_violation[1:] = violated_groups[1:] != violated_groups[:-1]
+        active[focus[violations[first_violation]]] = False
+        affected = np.zeros(len(focus), dtype=bool)
+        affected[violated_groups] = True
+        focus = focus[affected[group_start]]
+    else:
+        # счета, где отказы ещё остались, досчитываются по строкам
+        _sequential_scan(focus, ids, signed, start_balance, active)
+
+    status[rows[~active]] = INSUFFICIENT_FUNDS
+    np.add.at(balances, ids[active], signed[active])
+    return status
+
+
+# последовательная проверка средств для строк focus (упорядочены по счету, внутри счета - по порядку):
+# active для них считается заново, как при построчных вызовах withdraw
+def _sequential_scan(focus, ids, signed, start_balance, active):
+    previous = None
+    balance = 0
+    for row, account_id, delta, start in zip(focus.tolist(), ids[focus].tolist(), signed[focus].tolist(),
+                                             start_balance[focus].tolist()):
+        if account_id != previous:
+            previous = account_id
+            balance = start
+        if balance + delta < 0:
+            active[row] = False
+        else:
+            active[row] = True
+            balance += delta
+
+
+# воспроизведение пакета над обычными объектами BankAccount:
+# балансы копируются в массивы, пакет применяется за один проход, результат записывается обратно
+def apply_batch_to_accounts(accounts, account_ids, op_types, amounts):
+    balances = np.array([account.balance() for account in accounts], dtype=np.int64)
+    locked = np.array([account._is_locked for account in accounts], dtype=bool)
+    status = apply_batch(balances, locked, account_ids, op_types, amounts)
+    for account, balance in zip(accounts, balances.tolist()):
+        account._balance = balance
+    return status
+
+
+# сводка по кодам результата
+def summarize(status):
+    counts = np.bincount(status, minlength=len(STATUS_NAMES))
+    return {STATUS_NAMES[code]: int(count) for code, count in enumerate(counts) if count}
+
+
+# сравнение пакетной обработки с построчными вызовами и исключениями
+def benchmark_batch(accounts=100_000, rows=1_000_000):
+    print(f"\nПакетная обработка: счетов {accounts}, строк {rows}")
+    rng = np.random.default_rng(42)
+    account_ids = rng.integers(0, accounts, rows)
+    op_types = rng.integers(0, 2, rows).astype(np.int8)
+    amounts = rng.integers(-5, 200, rows)
+    locked = rng.random(accounts) < 0.01
+
+    objects = [BankAccount(number, 500) for number in range(accounts)]
+    for number in np.flatnonzero(locked).tolist():
+        objects[number].lock()
+    start = time.perf_counter()
+    errors = 0
+    for account_id, op_type, amount in zip(account_ids.tolist(), op_types.tolist(), amounts.tolist()):
+        account = objects[account_id]
+        try:
+            if op_type == DEPOSIT:
+                account.deposit(amount)
+            else:
+                account.withdraw(amount)
+        except BankError:
+            errors += 1
+    loop_time = time.perf_counter() - start
+    print(f"построчно с исключениями: {loop_time:.2f} с ({rows / loop_time:,.0f} строк/с), ошибок: {errors}")
+
+    balances = np.full(accounts, 500, dtype=np.int64)
+    start = time.perf_counter()
+    status = apply_batch(balances, locked, account_ids, op_types, amounts)
+    batch_time = time.perf_counter() - start
+    print(f"пакетно: {batch_time:.2f} с ({rows / batch_time:,.0f} строк/с), ошибок: {int((status != OK).sum())}")
+    print(f"ускорение: x{loop_time / batch_time:.1f}")
+
+    same = balances.tolist() == [account.balance() for account in objects]
+    print(f"балансы совпадают с построчной обработкой: {'да' if same else 'НЕТ'}")
+    print(summarize(status))
+
+
+if __name__ == "__main__":
+    benchmark_batch()
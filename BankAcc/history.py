@@ -0,0 +1,297 @@
+# подключаем библиотеки и модули
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+import numpy as np
+from main import BankAccount
+
+# сколько операций попадает в один блок между контрольными точками
+BLOCK_SIZE = 4096
+
+# доступные ширины для упаковки разностей времени и сумм
+_UNSIGNED = (np.uint8, np.uint16, np.uint32, np.uint64)
+_SIGNED = (np.int8, np.int16, np.int32, np.int64)
+
+
+# минимальный тип, в который помещаются все значения массива
+def _narrowest(values, types):
+    if len(values) == 0:
+        return types[0]
+    low, high = int(values.min()), int(values.max())
+    for dtype in types:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return types[-1]
+
+
+# история баланса одного счета. Операции хранятся блоками по BLOCK_SIZE штук:
+# в начале каждого блока - контрольная точка (время и баланс), внутри блока - разности
+# времени между соседними операциями и суммы операций, упакованные в минимальный
+# целочисленный тип. Для каждого блока заранее посчитаны приход, расход, минимум и максимум баланса
+class AccountHistory:
+    def __init__(self, initial_balance=0):
+        self.initial_balance = initial_balance
+        self._data = bytearray()
+        # метаданные блоков
+        self._start_time = array("q")
+        self._end_time = array("q")
+        self._start_balance = array("q")
+        self._offset = array("q")
+        self._count = array("l")
+        self._widths = array("B")   # (индекс типа времени << 4) | индекс типа суммы
+        self._inflow = array("q")
+        self._outflow = array("q")
+        self._min_balance = array("q")
+        self._max_balance = array("q")
+        # незапечатанный хвост
+        self._tail_times = array("q")
+        self._tail_amounts = array("q")
+        self._balance = initial_balance
+
+    def __len__(self):
+        return sum(self._count) + len(self._tail_times)
+
+    def balance(self):
+        return self._balance
+
+    # проверка порядка времени до записи (чтобы проверить операцию до изменения баланса счета)
+    def check_order(self, timestamp):
+        if self._tail_times and timestamp < self._tail_times[-1] or \
+                not self._tail_times and self._end_time and timestamp < self._end_time[-1]:
+            raise ValueError("Операции должны записываться в порядке времени")
+
+    # запись одной операции: amount > 0 - приход, amount < 0 - расход
+    def record(self, timestamp, amount):
+        self.check_order(timestamp)
+        self._tail_times.append(timestamp)
+        self._tail_amounts.append(amount)
+        self._balance += amount
+        if len(self._tail_times) >= BLOCK_SIZE:
+            self._seal(np.array(self._tail_times, dtype=np.int64), np.array(self._tail_amounts, dtype=np.int64))
+            self._tail_times = array("q")
+            self._tail_amounts = array("q")
+
+    # массовая запись отсортированных по времени операций
+    def extend(self, timestamps, amounts):
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=np.int64)
+        if len(timestamps) == 0:
+            return
+        if len(timestamps) != len(amounts):
+            raise ValueError("Число моментов времени и сумм должно совпадать")
+        # хвост склеивается с новыми операциями, но состояние меняется только после проверки порядка
+        tail_sum = sum(self._tail_amounts)
+        if self._tail_times:
+            timestamps = np.concatenate([np.array(self._tail_times, dtype=np.int64), timestamps])
+            amounts = np.concatenate([np.array(self._tail_amounts, dtype=np.int64), amounts])
+        last = self._end_time[-1] if self._end_time else timestamps[0]
+        if timestamps[0] < last or (np.diff(timestamps) < 0).any():
+            raise ValueError("Операции должны записываться в порядке времени")
+        self._balance += int(amounts.sum()) - tail_sum
+        full = len(timestamps) - len(timestamps) % BLOCK_SIZE
+        for start in range(0, full, BLOCK_SIZE):
+            self._seal(timestamps[start:start + BLOCK_SIZE], amounts[start:start + BLOCK_SIZE])
+        self._tail_times = array("q", timestamps[full:].tolist())
+        self._tail_amounts = array("q", amounts[full:].tolist())
+
+    def _seal(self, timestamps, amounts):
+        start_balance = self._start_balance[-1] + self._block_sum(-1) if self._count else self.initial_balance
+        deltas = np.diff(timestamps, prepend=timestamps[0])
+        time_type = _narrowest(deltas, _UNSIGNED)
+        amount_type = _narrowest(amounts, _SIGNED)
+        balances = start_balance + np.cumsum(amounts)
+
+        self._start_time.append(int(timestamps[0]))
+        self._end_time.append(int(timestamps[-1]))
+        self._start_balance.append(start_balance)
+        self._offset.append(len(self._data))
+        self._count.append(len(timestamps))
+        self._widths.append(_UNSIGNED.index(time_type) << 4 | _SIGNED.index(amount_type))
+        self._inflow.append(int(amounts[amounts > 0].sum()))
+        self._outflow.append(int(-amounts[amounts < 0].sum()))
+        self._min_balance.append(int(balances.min()))
+        self._max_balance.append(int(balances.max()))
+        self._data += deltas.astype(time_type).tobytes()
+        self._data += amounts.astype(amount_type).tobytes()
+
+    def _block_sum(self, block):
+        return self._inflow[block] - self._outflow[block]
+
+    # распаковка блока: абсолютные времена и суммы операций
+    def _decode(self, block):
+        if block == len(self._count):
+            return np.array(self._tail_times, dtype=np.int64), np.array(self._tail_amounts, dtype=np.int64)
+        count = self._count[block]
+        time_type = _UNSIGNED[self._widths[block] >> 4]
+        amount_type = _SIGNED[self._widths[block] & 0xF]
+        offset = self._offset[block]
+        deltas = np.frombuffer(self._data, dtype=time_type, count=count, offset=offset)
+        amounts = np.frombuffer(self._data, dtype=amount_type, count=count,
+                                offset=offset + count * np.dtype(time_type).itemsize)
+        return self._start_time[block] + np.cumsum(deltas, dtype=np.int64), amounts.astype(np.int64)
+
+    def _block_start_balance(self, block):
+        if block == len(self._count):
+            return self._start_balance[-1] + self._block_sum(-1) if self._count else self.initial_balance
+        return self._start_balance[block]
+
+    # номер блока, в котором лежит последняя операция не позже timestamp (-1, если таких нет)
+    def _find_block(self, timestamp):
+        block = bisect_right(self._start_time, timestamp) - 1
+        if block == len(self._count) - 1 and self._tail_times and self._tail_times[0] <= timestamp:
+            return len(self._count)
+        if block < 0 and self._tail_times and not self._count and self._tail_times[0] <= timestamp:
+            return 0
+        return block
+
+    # баланс на момент timestamp (после всех операций с временем <= timestamp):
+    # двоичный поиск контрольной точки и короткое проигрывание внутри блока
+    def balance_at(self, timestamp):
+        block = self._find_block(timestamp)
+        if block < 0:
+            return self.initial_balance
+        times, amounts = self._decode(block)
+        position = np.searchsorted(times, timestamp, side="right")
+        return int(self._block_start_balance(block) + amounts[:position].sum())
+
+    # агрегаты за окно [start, end]: приход, расход, число операций, минимум и максимум баланса.
+    # Целиком попавшие в окно блоки берутся из заранее посчитанных итогов
+    def window(self, start, end):
+        opening = self.balance_at(start - 1)
+        result = {"inflow": 0, "outflow": 0, "count": 0, "min_balance": opening, "max_balance": opening}
+        # операции со временем start могут начинаться в предыдущем блоке, если одинаковые
+        # времена попали на границу блоков: берём блок перед первым, который начинается не раньше start
+        first = max(bisect_left(self._start_time, start) - 1, 0)
+        last = self._find_block(end)
+        blocks = len(self._count) + (1 if self._tail_times else 0)
+        for block in range(first, min(last, blocks - 1) + 1):
+            sealed = block < len(self._count)
+            if sealed and start <= self._start_time[block] and self._end_time[block] <= end:
+                result["inflow"] += self._inflow[block]
+                result["outflow"] += self._outflow[block]
+                result["count"] += self._count[block]
+                result["min_balance"] = min(result["min_balance"], self._min_balance[block])
+                result["max_balance"] = max(result["max_balance"], self._max_balance[block])
+                continue
+            times, amounts = self._decode(block)
+            if len(times) == 0:
+                continue
+            balances = self._block_start_balance(block) + np.cumsum(amounts)
+            inside = (times >= start) & (times <= end)
+            if not inside.any():
+                continue
+            selected = amounts[inside]
+            result["inflow"] += int(selected[selected > 0].sum())
+            result["outflow"] += int(-selected[selected < 0].sum())
+            result["count"] += int(inside.sum())
+            result["min_balance"] = min(result["min_balance"], int(balances[inside].min()))
+            result["max_balance"] = max(result["max_balance"], int(balances[inside].max()))
+        result["net"] = result["inflow"] - result["outflow"]
+        return result
+
+    # занимаемая память без учёта фиксированных накладных расходов объектов
+    def nbytes(self):
+        metadata = (self._start_time, self._end_time, self._start_balance, self._offset, self._count,
+                    self._widths, self._inflow, self._outflow, self._min_balance, self._max_balance,
+                    self._tail_times, self._tail_amounts)
+        return len(self._data) + sum(len(item) * item.itemsize for item in metadata)
+
+
+def now_ms():
+    return time.time_ns() // 1_000_000
+
+
+# история балансов для многих счетов
+class BalanceHistory:
+    def __init__(self):
+        self._accounts = {}
+
+    def account(self, account_number, initial_balance=0):
+        history = self._accounts.get(account_number)
+        if history is None:
+            history = self._accounts[account_number] = AccountHistory(initial_balance)
+        return history
+
+    def record(self, account_number, amount, timestamp=None):
+        if timestamp is None:
+            timestamp = now_ms()
+        self.account(account_number).record(timestamp, amount)
+
+    def balance_at(self, account_number, timestamp):
+        return self._accounts[account_number].balance_at(timestamp)
+
+    def window(self, account_number, start, end):
+        return self._accounts[account_number].window(start, end)
+
+    def __len__(self):
+        return sum(len(history) for history in self._accounts.values())
+
+    def nbytes(self):
+        return sum(history.nbytes() for history in self._accounts.values())
+
+
+# счет, который записывает каждую успешную операцию в историю (время - в миллисекундах)
+class AuditedAccount(BankAccount):
+    def __init__(self, account_number, history, initial_balance=0):
+        super().__init__(account_number, initial_balance)
+        self.history = history
+        history.account(account_number, initial_balance)
+
+    # время операции проверяется до изменения баланса: при нарушении порядка деньги не двигаются
+    def _timestamp(self):
+        timestamp = now_ms()
+        self.history.account(self.account_number).check_order(timestamp)
+        return timestamp
+
+    def deposit(self, amount):
+        timestamp = self._timestamp()
+        balance = super().deposit(amount)
+        self.history.record(self.account_number, amount, timestamp)
+        return balance
+
+    def withdraw(self, amount):
+        timestamp = self._timestamp()
+        balance = super().withdraw(amount)
+        self.history.record(self.account_number, -amount, timestamp)
+        return balance
+
+
+# запись большого объёма операций, память на операцию и время запросов
+def benchmark_history(operations=100_000_000, accounts=1000, queries=10_000):
+    print(f"\nИстория балансов: операций {operations}, счетов {accounts}")
+    rng = np.random.default_rng(7)
+    history = BalanceHistory()
+    per_account = operations // accounts
+    now = 1_700_000_000_000
+
+    start = time.perf_counter()
+    for number in range(accounts):
+        # операции раз в несколько секунд, суммы до 300 рублей в копейках
+        timestamps = now + np.cumsum(rng.integers(0, 5000, per_account))
+        amounts = rng.integers(-30_000, 30_000, per_account)
+        history.account(number).extend(timestamps, amounts)
+    build_time = time.perf_counter() - start
+    memory = history.nbytes()
+    total = len(history)
+    print(f"запись: {build_time:.1f} с ({total / build_time:,.0f} оп/с), "
+          f"{memory / total:.2f} байт на операцию ({memory / 2 ** 20:.0f} МБ)")
+
+    end_time = now + per_account * 2500
+    numbers = rng.integers(0, accounts, queries).tolist()
+    moments = rng.integers(now, end_time, queries).tolist()
+    start = time.perf_counter()
+    for number, moment in zip(numbers, moments):
+        history.balance_at(number, moment)
+    elapsed = time.perf_counter() - start
+    print(f"баланс на момент времени: {elapsed / queries * 1e6:.1f} мкс на запрос")
+
+    start = time.perf_counter()
+    for number, moment in zip(numbers[:1000], moments[:1000]):
+        history.window(number, moment, moment + 86_400_000)
+    elapsed = time.perf_counter() - start
+    print(f"агрегаты за сутки: {elapsed / 1000 * 1e6:.1f} мкс на запрос")
+
+
+if __name__ == "__main__":
+    benchmark_history()
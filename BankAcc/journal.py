@@ -0,0 +1,320 @@
+# подключаем библиотеки и модули
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from store import AccountStore
+
+# коды операций в журнале (записываются только успешные операции)
+OPEN = 0
+DEPOSIT = 1
+WITHDRAW = 2
+LOCK = 3
+UNLOCK = 4
+
+# запись журнала: код операции, номер счета, сумма (для OPEN - начальный баланс)
+RECORD = np.dtype([("op", "u1"), ("account", "<i8"), ("amount", "<i8")])
+# журнал состоит из блоков: длина полезной нагрузки и её crc32, затем сами записи.
+# Один блок - одна групповая фиксация, недописанный блок в конце файла отбрасывается
+BLOCK_HEADER = struct.Struct("<II")
+
+JOURNAL_FILE = "journal.bin"
+SNAPSHOT_PREFIX = "snapshot-"
+
+
+# журнал с групповой фиксацией: записи копятся в буфере, фоновый поток
+# сбрасывает их одним write и одним fsync на всю группу
+class Journal:
+    def __init__(self, path, commit_interval=0.002, fsync=True):
+        self.path = path
+        self.commit_interval = commit_interval
+        self.fsync = fsync
+        self._file = open(path, "ab")
+        self._buffer = []
+        self._next_seq = 0       # номер следующей записи
+        self._durable_seq = 0    # все записи с меньшими номерами уже на диске
+        self._offset = self._file.tell()
+        self._commits = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._error = None       # ошибка записи на диск: после неё журнал не принимает записи
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+
+    # добавление записи, возвращает её номер для ожидания фиксации
+    def append(self, op, account, amount=0):
+        with self._cond:
+            if self._closed:
+                raise ValueError("Журнал закрыт")
+            if self._error is not None:
+                raise self._error
+            self._buffer.append((op, account, amount))
+            self._next_seq += 1
+            self._cond.notify_all()
+            return self._next_seq
+
+    # ожидание, пока запись с номером seq не окажется на диске; если запись блока
+    # не удалась (например, кончилось место), ожидающие получают эту ошибку
+    def wait(self, seq):
+        with self._cond:
+            while self._durable_seq < seq:
+                if self._error is not None:
+                    raise self._error
+                self._cond.wait()
+
+    # принудительная фиксация всего, что накоплено; возвращает смещение конца журнала
+    def flush(self):
+        with self._cond:
+            seq = self._next_seq
+            self._cond.notify_all()
+        self.wait(seq)
+        with self._cond:
+            return self._offset
+
+    def _write_block(self, records):
+        payload = np.array(records, dtype=RECORD).tobytes()
+        self._file.write(BLOCK_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        return BLOCK_HEADER.size + len(payload)
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if not self._buffer and self._closed:
+                    return
+            # даём другим потокам время добавить записи в ту же группу
+            if self.commit_interval:
+                time.sleep(self.commit_interval)
+            with self._cond:
+                records, self._buffer = self._buffer, []
+                seq = self._next_seq
+            try:
+                written = self._write_block(records)
+            except Exception as e:
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._offset += written
+                self._durable_seq = seq
+                self._commits += 1
+                self._cond.notify_all()
+
+    @property
+    def commits(self):
+        return self._commits
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            self._writer.join()
+            self._file.close()
+
+
+# чтение записей журнала начиная со смещения offset; повреждённый хвост обрезается
+def read_journal(path, offset=0):
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=RECORD)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    blocks = []
+    position = 0
+    while position + BLOCK_HEADER.size <= len(data):
+        length, crc = BLOCK_HEADER.unpack_from(data, position)
+        start = position + BLOCK_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) != length or length % RECORD.itemsize or zlib.crc32(payload) != crc:
+            break
+        blocks.append(np.frombuffer(payload, dtype=RECORD))
+        position = start + length
+    if position != len(data):
+        with open(path, "r+b") as f:
+            f.truncate(offset + position)
+    if not blocks:
+        return np.zeros(0, dtype=RECORD)
+    return np.concatenate(blocks)
+
+
+# применение записей журнала к хранилищу целиком, без цикла по записям:
+# в журнале только успешные операции, поэтому итоговый баланс - просто сумма изменений,
+# а для блокировок важна последняя запись по каждому счету
+def replay(store, records):
+    if len(records) == 0:
+        return
+    ops = records["op"]
+    opened = records[ops == OPEN]
+    if len(opened):
+        store.open_accounts(opened["account"], opened["amount"])
+
+    moves = records[(ops == DEPOSIT) | (ops == WITHDRAW)]
+    if len(moves):
+        indexes = store._find_many(moves["account"])
+        signed = np.where(moves["op"] == DEPOSIT, moves["amount"], -moves["amount"])
+        np.add.at(store.balances(), indexes, signed)
+
+    locks = records[(ops == LOCK) | (ops == UNLOCK)]
+    if len(locks):
+        # последняя запись по каждому счету: unique по развёрнутому массиву
+        reversed_locks = locks[::-1]
+        _, last = np.unique(reversed_locks["account"], return_index=True)
+        latest = reversed_locks[last]
+        store.locked()[store._find_many(latest["account"])] = latest["op"] == LOCK
+
+
+# хранилище счетов с журналом и снимками: каждая успешная операция попадает в журнал,
+# снимок позволяет при восстановлении проигрывать только хвост журнала
+class JournaledStore:
+    def __init__(self, directory, commit_interval=0.002, fsync=True, keep_snapshots=2):
+        self.directory = directory
+        self.keep_snapshots = keep_snapshots
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self.store, self.recovered_records = recover(directory)
+        self.journal = Journal(os.path.join(directory, JOURNAL_FILE), commit_interval, fsync)
+
+    # операция выполняется под общей блокировкой, чтобы порядок в журнале совпадал
+    # с порядком применения; ожидание fsync - уже вне блокировки, так несколько
+    # потоков попадают в одну групповую фиксацию
+    def _run(self, op, account_number, amount, action, durable):
+        with self._lock:
+            result = action()
+            seq = self.journal.append(op, int(account_number), amount)
+        if durable:
+            self.journal.wait(seq)
+        return result
+
+    def open_account(self, account_number, initial_balance=0, durable=True):
+        self._run(OPEN, account_number, initial_balance,
+                  lambda: self.store.open_account(account_number, initial_balance), durable)
+
+    def deposit(self, account_number, amount, durable=True):
+        return self._run(DEPOSIT, account_number, amount,
+                         lambda: self.store.get(account_number).deposit(amount), durable)
+
+    def withdraw(self, account_number, amount, durable=True):
+        return self._run(WITHDRAW, account_number, amount,
+                         lambda: self.store.get(account_number).withdraw(amount), durable)
+
+    def lock(self, account_number, durable=True):
+        self._run(LOCK, account_number, 0, lambda: self.store.get(account_number).lock(), durable)
+
+    def unlock(self, account_number, durable=True):
+        self._run(UNLOCK, account_number, 0, lambda: self.store.get(account_number).unlock(), durable)
+
+    def balance(self, account_number):
+        return self.store.get(account_number).balance()
+
+    # снимок состояния: массивы копируются под блокировкой вместе со смещением журнала,
+    # запись на диск идёт уже без блокировки
+    def snapshot(self):
+        with self._lock:
+            offset = self.journal.flush()
+            numbers = self.store.account_numbers().copy()
+            balances = self.store.balances().copy()
+            locked = self.store.locked().copy()
+        write_snapshot(self.directory, offset, numbers, balances, locked)
+        for old in _list_snapshots(self.directory)[:-self.keep_snapshots]:
+            shutil.rmtree(os.path.join(self.directory, old))
+        return offset
+
+    def close(self):
+        self.journal.close()
+
+
+# снимок - каталог с тремя .npy файлами; он создаётся во временном каталоге
+# и переименовывается целиком, поэтому недописанный снимок никогда не виден
+def write_snapshot(directory, offset, numbers, balances, locked):
+    tmp = tempfile.mkdtemp(dir=directory, prefix=".tmp-")
+    for name, array in (("numbers", numbers), ("balances", balances), ("locked", locked)):
+        with open(os.path.join(tmp, name + ".npy"), "wb") as f:
+            np.save(f, array)
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(directory, f"{SNAPSHOT_PREFIX}{offset:020d}"))
+
+
+def _list_snapshots(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith(SNAPSHOT_PREFIX))
+
+
+# восстановление: последний снимок плюс хвост журнала. Файлы снимка открываются через mmap,
+# но массивы копируются в новое хранилище (open_accounts строит хэш-индекс номеров), так что
+# восстановление читает снимок целиком. Журнал после снимка не обрезается: он растёт, а снимок
+# лишь позволяет проигрывать записи с его смещения. Возвращает хранилище и количество проигранных записей
+def recover(directory):
+    offset = 0
+    store = AccountStore()
+    snapshots = _list_snapshots(directory) if os.path.isdir(directory) else []
+    if snapshots:
+        latest = os.path.join(directory, snapshots[-1])
+        offset = int(snapshots[-1][len(SNAPSHOT_PREFIX):])
+        numbers = np.load(os.path.join(latest, "numbers.npy"), mmap_mode="r")
+        balances = np.load(os.path.join(latest, "balances.npy"), mmap_mode="r")
+        locked = np.load(os.path.join(latest, "locked.npy"), mmap_mode="r")
+        store = AccountStore(len(numbers), dtype=balances.dtype)
+        store.open_accounts(numbers, balances)
+        store.locked()[:] = locked
+    records = read_journal(os.path.join(directory, JOURNAL_FILE), offset)
+    replay(store, records)
+    return store, len(records)
+
+
+# замер групповой фиксации и времени восстановления
+def benchmark_recovery(accounts=10_000_000, tail=1_000_000, threads=16, ops_per_thread=500):
+    directory = tempfile.mkdtemp(prefix="bank-journal-")
+    try:
+        print(f"\nЖурнал и восстановление: счетов {accounts}, хвост журнала {tail} записей")
+        bank = JournaledStore(directory)
+
+        # групповая фиксация: много потоков ждут fsync одновременно
+        for number in range(threads):
+            bank.open_account(number, 1000, durable=False)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda n: [bank.deposit(n, 1) for _ in range(ops_per_thread)], range(threads)))
+        elapsed = time.perf_counter() - start
+        operations = threads * ops_per_thread
+        commits_before = bank.journal.commits
+        print(f"групповая фиксация: {operations / elapsed:,.0f} оп/с, "
+              f"в среднем {operations / max(commits_before, 1):.1f} операций на fsync")
+
+        # большой реестр: создаём сразу снимком, потом дописываем хвост журнала
+        bank.store.open_accounts(np.arange(threads, accounts), 100)
+        start = time.perf_counter()
+        bank.snapshot()
+        print(f"снимок {accounts} счетов записан за {time.perf_counter() - start:.2f} с")
+        rng = np.random.default_rng(1)
+        numbers = rng.integers(0, accounts, tail).tolist()
+        for number in numbers:
+            bank.deposit(number, 5, durable=False)
+        bank.close()
+        expected = bank.store.total_balance()
+
+        start = time.perf_counter()
+        recovered = JournaledStore(directory)
+        recovery_time = time.perf_counter() - start
+        status = "совпадает" if recovered.store.total_balance() == expected else "НЕ СОВПАДАЕТ"
+        print(f"восстановление: {recovery_time:.2f} с (проиграно {recovered.recovered_records} записей), "
+              f"суммарный баланс {status}")
+        recovered.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark_recovery()
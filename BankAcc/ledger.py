@@ -0,0 +1,245 @@
+# подключаем библиотеки и модули
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from main import BankAccount, BankError, NegativeAmountError, InsufficientFundsError, AccountLockedError
+
+
+# ошибка при обращении к несуществующему счету
+class AccountNotFoundError(BankError):
+    def __init__(self, account_number):
+        self.account_number = account_number
+        super().__init__(f"Счет #{account_number} не найден")
+
+
+# ошибка при повторном открытии счета
+class AccountExistsError(BankError):
+    def __init__(self, account_number):
+        self.account_number = account_number
+        super().__init__(f"Счет #{account_number} уже существует")
+
+
+# сегмент реестра: свой словарь счетов и своя блокировка
+class _Shard:
+    __slots__ = ("lock", "accounts")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.accounts = {}
+
+
+# потокобезопасный реестр счетов, разбитый на сегменты (lock striping):
+# операции над счетами из разных сегментов не блокируют друг друга
+class Bank:
+    def __init__(self, shards=64):
+        if shards <= 0:
+            raise ValueError("Количество сегментов должно быть положительным")
+        self._shards = [_Shard() for _ in range(shards)]
+
+    # сегмент, которому принадлежит счет
+    def _shard(self, account_number):
+        return self._shards[hash(account_number) % len(self._shards)]
+
+    def _get(self, shard, account_number):
+        account = shard.accounts.get(account_number)
+        if account is None:
+            raise AccountNotFoundError(account_number)
+        return account
+
+    # открытие нового счета
+    def open_account(self, account_number, initial_balance=0):
+        shard = self._shard(account_number)
+        with shard.lock:
+            if account_number in shard.accounts:
+                raise AccountExistsError(account_number)
+            account = BankAccount(account_number, initial_balance)
+            shard.accounts[account_number] = account
+            return account
+
+    # закрытие счета, возвращает остаток
+    def close_account(self, account_number):
+        shard = self._shard(account_number)
+        with shard.lock:
+            account = self._get(shard, account_number)
+            del shard.accounts[account_number]
+            return account.balance()
+
+    # все операции выполняются под блокировкой сегмента счета,
+    # поэтому проверка и изменение баланса атомарны
+    def deposit(self, account_number, amount):
+        shard = self._shard(account_number)
+        with shard.lock:
+            return self._get(shard, account_number).deposit(amount)
+
+    def withdraw(self, account_number, amount):
+        shard = self._shard(account_number)
+        with shard.lock:
+            return self._get(shard, account_number).withdraw(amount)
+
+    def lock(self, account_number):
+        shard = self._shard(account_number)
+        with shard.lock:
+            self._get(shard, account_number).lock()
+
+    def unlock(self, account_number):
+        shard = self._shard(account_number)
+        with shard.lock:
+            self._get(shard, account_number).unlock()
+
+    def balance(self, account_number):
+        shard = self._shard(account_number)
+        with shard.lock:
+            return self._get(shard, account_number).balance()
+
+    # выполнение произвольной функции над счетом под блокировкой его сегмента
+    def apply(self, account_number, func):
+        shard = self._shard(account_number)
+        with shard.lock:
+            return func(self._get(shard, account_number))
+
+    # перевод между счетами: списание и зачисление выполняются атомарно
+    def transfer(self, source, destination, amount):
+        return self.atomic_batch([("withdraw", source, amount), ("deposit", destination, amount)])
+
+    # атомарное выполнение нескольких операций ("deposit"/"withdraw", номер счета, сумма):
+    # либо применяются все, либо ни одна. Блокировки сегментов берутся в порядке возрастания
+    # их индексов, поэтому параллельные пакеты не могут взаимно заблокироваться
+    def atomic_batch(self, operations):
+        indexes = sorted({hash(number) % len(self._shards) for _, number, _ in operations})
+        locks = [self._shards[index].lock for index in indexes]
+        for lock in locks:
+            lock.acquire()
+        try:
+            # сначала проверяем весь пакет на копиях балансов, чтобы ошибка
+            # в любой операции не оставила пакет применённым наполовину
+            accounts = {}
+            balances = {}
+            for operation_type, number, amount in operations:
+                if number not in accounts:
+                    accounts[number] = self._get(self._shard(number), number)
+                    balances[number] = accounts[number].balance()
+                account = accounts[number]
+                if account._is_locked:
+                    raise AccountLockedError()
+                if amount <= 0:
+                    raise NegativeAmountError(amount)
+                if operation_type == "deposit":
+                    balances[number] += amount
+                elif operation_type == "withdraw":
+                    if amount > balances[number]:
+                        raise InsufficientFundsError(balances[number], amount)
+                    balances[number] -= amount
+                else:
+                    raise ValueError("Неизвестный тип операции")
+
+            for operation_type, number, amount in operations:
+                if operation_type == "deposit":
+                    accounts[number].deposit(amount)
+                else:
+                    accounts[number].withdraw(amount)
+            return balances
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    # суммарный баланс всех счетов (согласованный снимок: берём все блокировки по порядку)
+    def total_balance(self):
+        for shard in self._shards:
+            shard.lock.acquire()
+        try:
+            return sum(account.balance() for shard in self._shards for account in shard.accounts.values())
+        finally:
+            for shard in reversed(self._shards):
+                shard.lock.release()
+
+    def __contains__(self, account_number):
+        shard = self._shard(account_number)
+        with shard.lock:
+            return account_number in shard.accounts
+
+    def __len__(self):
+        return sum(len(shard.accounts) for shard in self._shards)
+
+    def __str__(self):
+        return f"Банк: счетов {len(self)}, сегментов {len(self._shards)}"
+
+
+# нагрузочный тест: каждый поток пополняет и снимает средства со случайных счетов,
+# в конце проверяем, что ни одно обновление не потерялось
+def benchmark_bank(accounts=100_000, operations=400_000, threads=(1, 2, 4, 8), shards=64):
+    print(f"\nНагрузочный тест Bank: счетов {accounts}, операций {operations}, сегментов {shards}")
+    for n_threads in threads:
+        bank = Bank(shards)
+        for number in range(accounts):
+            bank.open_account(number, 100)
+        expected = bank.total_balance()
+        per_thread = operations // n_threads
+
+        def worker(seed):
+            # простой линейный конгруэнтный генератор, чтобы не упираться в random
+            state = seed * 2654435761 + 1
+            delta = 0
+            for _ in range(per_thread):
+                state = (state * 1103515245 + 12345) & 0x7FFFFFFF
+                number = state % accounts
+                if state & 1:
+                    bank.deposit(number, 1)
+                    delta += 1
+                else:
+                    try:
+                        bank.withdraw(number, 1)
+                        delta -= 1
+                    except BankError:
+                        pass
+            return delta
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_threads) as pool:
+            deltas = list(pool.map(worker, range(n_threads)))
+        elapsed = time.perf_counter() - start
+
+        expected += sum(deltas)
+        actual = bank.total_balance()
+        status = "OK" if actual == expected else f"ПОТЕРЯНЫ ОБНОВЛЕНИЯ ({actual} != {expected})"
+        done = per_thread * n_threads
+        print(f"потоков: {n_threads:2d}, {done / elapsed:12,.0f} оп/с, итоговый баланс: {status}")
+
+
+# конкурентные переводы между небольшим числом "горячих" счетов:
+# проверяем отсутствие взаимных блокировок и сохранение общей суммы денег
+def benchmark_transfers(hot_accounts=8, workers=(1, 4, 16), transfers=200_000, shards=64):
+    print(f"\nПереводы между {hot_accounts} горячими счетами, переводов: {transfers}")
+    for n_workers in workers:
+        bank = Bank(shards)
+        for number in range(hot_accounts):
+            bank.open_account(number, 1000)
+        expected = bank.total_balance()
+        per_worker = transfers // n_workers
+
+        def worker(seed):
+            state = seed * 2654435761 + 1
+            declined = 0
+            for _ in range(per_worker):
+                state = (state * 1103515245 + 12345) & 0x7FFFFFFF
+                source = state % hot_accounts
+                destination = (source + 1 + (state >> 8) % (hot_accounts - 1)) % hot_accounts
+                try:
+                    bank.transfer(source, destination, 1 + (state >> 16) % 50)
+                except BankError:
+                    declined += 1
+            return declined
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            declined = sum(pool.map(worker, range(n_workers)))
+        elapsed = time.perf_counter() - start
+
+        status = "OK" if bank.total_balance() == expected else "НАРУШЕН БАЛАНС"
+        done = per_worker * n_workers
+        print(f"потоков: {n_workers:2d}, {done / elapsed:10,.0f} переводов/с, "
+              f"отклонено: {declined}, общая сумма: {status}")
+
+
+if __name__ == "__main__":
+    benchmark_bank()
+    benchmark_transfers()
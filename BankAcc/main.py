@@ -24,6 +24,39 @@ class AccountLockedError(BankError):
         super().__init__("Счет заблокирован. Операция невозможна")
 
 
+# результат операции без исключений: объекты создаются один раз при загрузке модуля,
+# поэтому отказ в операции не создаёт ни исключения, ни строки сообщения
+class OperationStatus:
+    __slots__ = ("code", "ok", "error_class")
+
+    def __init__(self, code, ok, error_class=None):
+        self.code = code
+        self.ok = ok
+        self.error_class = error_class
+
+    def __bool__(self):
+        return self.ok
+
+    # построение исключения по требованию (например, для вывода сообщения пользователю)
+    def to_error(self, balance, amount):
+        if self.error_class is None:
+            return None
+        if self.error_class is NegativeAmountError:
+            return NegativeAmountError(amount)
+        if self.error_class is InsufficientFundsError:
+            return InsufficientFundsError(balance, amount)
+        return self.error_class()
+
+    def __repr__(self):
+        return f"OperationStatus({self.code!r})"
+
+
+SUCCESS = OperationStatus("success", True)
+DECLINED_LOCKED = OperationStatus("locked", False, AccountLockedError)
+DECLINED_NEGATIVE_AMOUNT = OperationStatus("negative_amount", False, NegativeAmountError)
+DECLINED_INSUFFICIENT_FUNDS = OperationStatus("insufficient_funds", False, InsufficientFundsError)
+
+
 # основной класс банковского счёта
 class BankAccount:
     def __init__(self, account_number, initial_balance=0):
@@ -59,6 +92,25 @@ class BankAccount:
         self._balance -= amount
         return self._balance
 
+    # варианты deposit/withdraw без исключений: возвращают статус операции
+    def try_deposit(self, amount):
+        if self._is_locked:
+            return DECLINED_LOCKED
+        if amount <= 0:
+            return DECLINED_NEGATIVE_AMOUNT
+        self._balance += amount
+        return SUCCESS
+
+    def try_withdraw(self, amount):
+        if self._is_locked:
+            return DECLINED_LOCKED
+        if amount <= 0:
+            return DECLINED_NEGATIVE_AMOUNT
+        if amount > self._balance:
+            return DECLINED_INSUFFICIENT_FUNDS
+        self._balance -= amount
+        return SUCCESS
+
     # блокировка/разблокировка счёта
     def lock(self):
         self._is_locked = True
@@ -71,17 +123,23 @@ class BankAccount:
         return f"Счет #{self.account_number}, баланс: {self._balance}, статус: {status}"
 
 
-# класс для реализации безопасных банковских операций
+# класс для реализации безопасных банковских операций.
+# При exceptions=False используется быстрый путь без исключений: причина отказа
+# сохраняется в status, а error остаётся пустым
 class SafeBankOperation:
-    def __init__(self, account, operation_type, amount):
+    def __init__(self, account, operation_type, amount, exceptions=True):
         self.account = account
         self.operation_type = operation_type
         self.amount = amount
+        self.exceptions = exceptions
         self.result = None
         self.error = None
+        self.status = None
 
     # переопределение оператора with
     def __enter__(self):
+        if not self.exceptions:
+            return self._enter_fast()
         try:
             if self.operation_type == "deposit":
                 self.result = self.account.deposit(self.amount)
@@ -94,6 +152,17 @@ class SafeBankOperation:
             self.error = e
             return None
 
+    def _enter_fast(self):
+        if self.operation_type == "deposit":
+            self.status = self.account.try_deposit(self.amount)
+        elif self.operation_type == "withdraw":
+            self.status = self.account.try_withdraw(self.amount)
+        else:
+            raise ValueError("Неизвестный тип операции")
+        if self.status.ok:
+            self.result = self.account.balance()
+        return self.result
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_type is not None and issubclass(exc_type, BankError):
             print(f"Ошибка банковской операции: {exc_val}")
@@ -155,4 +224,25 @@ def test_bank_account():
     print(account)
 
 
-test_bank_account()
+# сравнение быстрого пути и исключений на потоке операций с большим числом отказов
+def benchmark_declines(operations=1_000_000, decline_share=0.9):
+    import time
+    print(f"\nОперации с отказами ({decline_share:.0%}): {operations}")
+    account = BankAccount("1", 0)
+    declined_every = round(1 / (1 - decline_share))
+    amounts = [10 ** 9 if i % declined_every else 1 for i in range(operations)]
+
+    for exceptions in (True, False):
+        account._balance = operations
+        start = time.perf_counter()
+        for amount in amounts:
+            with SafeBankOperation(account, "withdraw", amount, exceptions=exceptions):
+                pass
+        elapsed = time.perf_counter() - start
+        label = "исключения" if exceptions else "коды результата"
+        print(f"{label:16s}: {elapsed:.2f} с ({operations / elapsed:,.0f} оп/с)")
+
+
+if __name__ == "__main__":
+    test_bank_account()
+    benchmark_declines()
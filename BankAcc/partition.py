@@ -0,0 +1,191 @@
+# подключаем библиотеки и модули
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import batch
+from ledger import AccountNotFoundError
+
+# отображение счета на процесс-владелец: мультипликативное хеширование номера
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+# как часто при ожидании результатов проверять, что рабочие процессы живы (секунды)
+RESULT_POLL = 1.0
+
+
+def owner_of(account_numbers, workers):
+    hashed = np.asarray(account_numbers, dtype=np.int64).astype(np.uint64) * _HASH_MULTIPLIER
+    return ((hashed >> np.uint64(32)) % np.uint64(workers)).astype(np.int64)
+
+
+# рабочий процесс: подключается к общим массивам и применяет пакеты операций
+# только к своим счетам, поэтому изменения разных процессов не пересекаются
+def _worker(names, size, tasks, results):
+    balances_memory = shared_memory.SharedMemory(name=names[0])
+    locked_memory = shared_memory.SharedMemory(name=names[1])
+    balances = np.ndarray(size, dtype=np.int64, buffer=balances_memory.buf)
+    locked = np.ndarray(size, dtype=bool, buffer=locked_memory.buf)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            batch_id, rows, indexes, ops, amounts = task
+            status = batch.apply_batch(balances, locked, indexes, ops, amounts)
+            results.put((batch_id, rows, status))
+    finally:
+        del balances, locked
+        balances_memory.close()
+        locked_memory.close()
+
+
+# банк, разделённый между процессами. Счета нумеруются подряд от 0 до size-1,
+# балансы и флаги блокировки лежат в разделяемой памяти: чтение (balance, __str__)
+# идёт напрямую без обмена сообщениями, изменения отправляются пакетами процессу-владельцу
+class PartitionedBank:
+    def __init__(self, size, workers=None, initial_balance=0):
+        self.size = size
+        self.workers = workers or mp.cpu_count()
+        self._balances_memory = shared_memory.SharedMemory(create=True, size=size * 8)
+        self._locked_memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.balances = np.ndarray(size, dtype=np.int64, buffer=self._balances_memory.buf)
+        self.locked = np.ndarray(size, dtype=bool, buffer=self._locked_memory.buf)
+        self.balances[:] = initial_balance
+        self.locked[:] = False
+
+        context = mp.get_context("spawn")
+        self._results = context.Queue()
+        self._tasks = []
+        self._processes = []
+        names = (self._balances_memory.name, self._locked_memory.name)
+        for _ in range(self.workers):
+            tasks = context.Queue()
+            process = context.Process(target=_worker, args=(names, size, tasks, self._results), daemon=True)
+            process.start()
+            self._tasks.append(tasks)
+            self._processes.append(process)
+        self._next_batch = 0
+        self._batch_lock = threading.Lock()
+        # результаты общей очереди разбираются по номеру пакета: ответы чужих пакетов
+        # откладываются для вызовов, которые их ждут
+        self._results_lock = threading.Lock()
+        self._stash = {}
+
+    # номер счета как индекс массива: отрицательный номер иначе читал бы с конца
+    def _index(self, account_number):
+        number = int(account_number)
+        if not 0 <= number < self.size:
+            raise AccountNotFoundError(account_number)
+        return number
+
+    # чтение без обращения к процессам
+    def balance(self, account_number):
+        return int(self.balances[self._index(account_number)])
+
+    def is_locked(self, account_number):
+        return bool(self.locked[self._index(account_number)])
+
+    def account_str(self, account_number):
+        index = self._index(account_number)
+        status = "заблокирован" if self.locked[index] else "активен"
+        return f"Счет #{account_number}, баланс: {self.balances[index]}, статус: {status}"
+
+    # блокировка меняет один байт и не конфликтует с пакетной обработкой балансов
+    def lock(self, account_number):
+        self.locked[self._index(account_number)] = True
+
+    def unlock(self, account_number):
+        self.locked[self._index(account_number)] = False
+
+    # отправка пакета: строки раскладываются по владельцам (с сохранением порядка),
+    # каждый процесс получает одно сообщение; возвращаются коды результата по строкам
+    def apply_batch(self, account_numbers, op_types, amounts):
+        account_numbers = np.asarray(account_numbers, dtype=np.int64)
+        op_types = batch.encode_operations(op_types)
+        amounts = np.asarray(amounts, dtype=np.int64)
+        status = np.full(len(account_numbers), batch.UNKNOWN_ACCOUNT, dtype=np.uint8)
+        known = (account_numbers >= 0) & (account_numbers < self.size)
+        owners = owner_of(account_numbers, self.workers)
+
+        # номер пакета и рассылка - под блокировкой, чтобы порядок пакетов у всех процессов был одинаковым
+        with self._batch_lock:
+            batch_id = self._next_batch
+            self._next_batch += 1
+            expected = 0
+            for worker in range(self.workers):
+                rows = np.flatnonzero(known & (owners == worker))
+                if len(rows) == 0:
+                    continue
+                self._tasks[worker].put((batch_id, rows, account_numbers[rows], op_types[rows], amounts[rows]))
+                expected += 1
+        for rows, worker_status in self._collect(batch_id, expected):
+            status[rows] = worker_status
+        return status
+
+    # ответы процессов для пакета batch_id; если процесс завершился, ожидание прерывается ошибкой
+    def _collect(self, batch_id, expected):
+        received = []
+        while len(received) < expected:
+            with self._results_lock:
+                received.extend(self._stash.pop(batch_id, []))
+                if len(received) >= expected:
+                    break
+                try:
+                    result_id, rows, worker_status = self._results.get(timeout=RESULT_POLL)
+                except queue.Empty:
+                    dead = [process.pid for process in self._processes if not process.is_alive()]
+                    if dead:
+                        raise RuntimeError(f"Рабочие процессы завершились: {dead}")
+                    continue
+                if result_id == batch_id:
+                    received.append((rows, worker_status))
+                else:
+                    self._stash.setdefault(result_id, []).append((rows, worker_status))
+        return received
+
+    def total_balance(self):
+        return int(self.balances.sum())
+
+    def close(self):
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join()
+        del self.balances, self.locked
+        self._balances_memory.close()
+        self._balances_memory.unlink()
+        self._locked_memory.close()
+        self._locked_memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+# масштабирование от одного процесса до числа ядер
+def benchmark_partitions(accounts=1_000_000, batches=20, batch_size=1_000_000):
+    print(f"\nРазделение по процессам: счетов {accounts}, пакетов {batches} по {batch_size} операций")
+    rng = np.random.default_rng(3)
+    data = [(rng.integers(0, accounts, batch_size), rng.integers(0, 2, batch_size).astype(np.int8),
+             rng.integers(1, 100, batch_size)) for _ in range(batches)]
+    counts = sorted({1, 2, 4, mp.cpu_count()})
+    for workers in counts:
+        with PartitionedBank(accounts, workers, initial_balance=1000) as bank:
+            start = time.perf_counter()
+            for numbers, ops, amounts in data:
+                bank.apply_batch(numbers, ops, amounts)
+            elapsed = time.perf_counter() - start
+            start = time.perf_counter()
+            for number in range(0, accounts, accounts // 10_000):
+                bank.balance(number)
+            read_time = (time.perf_counter() - start) / 10_000
+            print(f"процессов: {workers:2d}, {batches * batch_size / elapsed:12,.0f} оп/с, "
+                  f"чтение баланса: {read_time * 1e6:.2f} мкс, итог: {bank.total_balance()}")
+
+
+if __name__ == "__main__":
+    benchmark_partitions()
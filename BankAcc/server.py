@@ -0,0 +1,210 @@
+# подключаем библиотеки и модули
+import asyncio
+import statistics
+import threading
+import time
+import numpy as np
+from main import BankError
+from store import AccountStore
+import batch
+
+# протокол: одна команда на строку, ответ тоже одной строкой
+#   DEPOSIT <счет> <сумма>   -> OK <баланс> | ERR <код> <описание>
+#   WITHDRAW <счет> <сумма>  -> OK <баланс> | ERR <код> <описание>
+#   BALANCE <счет>           -> OK <баланс> | ERR ...
+#   LOCK <счет>, UNLOCK <счет> -> OK
+# Баланс в ответе на DEPOSIT/WITHDRAW - баланс счета после применения микропакета,
+# в который попала операция
+_OPERATIONS = {"DEPOSIT": batch.DEPOSIT, "WITHDRAW": batch.WITHDRAW}
+_INT64 = np.iinfo(np.int64)
+# самая длинная строка команды; более длинная строка - ошибка протокола, клиент отключается
+MAX_LINE = 64 * 1024
+
+
+# номер счета или сумма из команды: целое, помещающееся в int64 (в таких массивах хранится счет)
+def _parse_int(text):
+    value = int(text)
+    if not _INT64.min <= value <= _INT64.max:
+        raise ValueError(f"число вне допустимого диапазона: {text}")
+    return value
+
+
+# асинхронный сервер банка: операции от всех клиентов копятся в очереди и применяются
+# микропакетами через batch.apply_batch в отдельном потоке, не блокируя цикл событий
+class BankServer:
+    def __init__(self, store, max_batch=65536):
+        self.store = store
+        self.max_batch = max_batch
+        self._pending = []
+        self._in_flight = []          # микропакет, который сейчас применяется
+        # хранилище меняют и микропакеты (в потоке исполнителя), и LOCK/UNLOCK
+        self._store_lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+        self._server = None
+        self._batcher = None
+        self.batches = 0
+        self.operations = 0
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._server = await asyncio.start_server(self._handle_client, host, port, limit=MAX_LINE)
+        self._batcher = asyncio.create_task(self._batch_loop())
+        return self._server.sockets[0].getsockname()[1]
+
+    # остановка: запросы, которые так и не были применены, отменяются, чтобы их не ждали вечно
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        for item in self._in_flight + self._pending:
+            if not item[3].done():
+                item[3].cancel()
+        self._in_flight = []
+        self._pending = []
+
+    # постановка операции в очередь; результат придёт после применения микропакета
+    def submit(self, account_number, op_type, amount):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((account_number, op_type, amount, future))
+        self._wakeup.set()
+        return future
+
+    # пока один пакет применяется, новые запросы копятся в следующем. Ошибка при применении
+    # пакета передаётся запросам этого пакета, а цикл продолжает обслуживать остальных
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                chunk = self._in_flight = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                try:
+                    numbers = np.fromiter((item[0] for item in chunk), dtype=np.int64, count=len(chunk))
+                    ops = np.fromiter((item[1] for item in chunk), dtype=np.int8, count=len(chunk))
+                    amounts = np.fromiter((item[2] for item in chunk), dtype=np.int64, count=len(chunk))
+                    status, balances = await loop.run_in_executor(None, self._apply, numbers, ops, amounts)
+                except Exception as e:
+                    for item in chunk:
+                        if not item[3].done():
+                            item[3].set_exception(e)
+                    continue
+                finally:
+                    self._in_flight = []
+                self.batches += 1
+                self.operations += len(chunk)
+                for item, code, balance in zip(chunk, status.tolist(), balances.tolist()):
+                    if not item[3].done():
+                        item[3].set_result((code, balance))
+
+    def _apply(self, numbers, ops, amounts):
+        with self._store_lock:
+            status = self.store.apply_batch(numbers, ops, amounts)
+            indexes = self.store._find_many(numbers)
+            balances = np.where(indexes >= 0, self.store.balances()[indexes], 0)
+        return status, balances
+
+    # BALANCE/LOCK/UNLOCK: под той же блокировкой, что и микропакеты, в потоке исполнителя
+    async def _with_store(self, action):
+        def run():
+            with self._store_lock:
+                return action()
+        return await asyncio.get_running_loop().run_in_executor(None, run)
+
+    async def _execute(self, line):
+        parts = line.split()
+        if not parts:
+            return "ERR 0 пустая команда"
+        command = parts[0].upper()
+        try:
+            if command in _OPERATIONS and len(parts) == 3:
+                code, balance = await self.submit(_parse_int(parts[1]), _OPERATIONS[command], _parse_int(parts[2]))
+                if code == batch.OK:
+                    return f"OK {balance}"
+                return f"ERR {code} {batch.STATUS_NAMES[code]}"
+            if command == "BALANCE" and len(parts) == 2:
+                number = _parse_int(parts[1])
+                return f"OK {await self._with_store(lambda: self.store.get(number).balance())}"
+            if command == "LOCK" and len(parts) == 2:
+                number = _parse_int(parts[1])
+                await self._with_store(lambda: self.store.get(number).lock())
+                return "OK"
+            if command == "UNLOCK" and len(parts) == 2:
+                number = _parse_int(parts[1])
+                await self._with_store(lambda: self.store.get(number).unlock())
+                return "OK"
+        except (ValueError, BankError) as e:
+            return f"ERR 0 {e}"
+        except Exception as e:
+            # ошибка применения микропакета: клиент получает ответ, сервер продолжает работу
+            return f"ERR 0 внутренняя ошибка: {e}"
+        return "ERR 0 неизвестная команда"
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    # строка длиннее MAX_LINE: конец команды не найти, поэтому клиент получает
+                    # ошибку и отключается, остальные клиенты продолжают работу
+                    writer.write(f"ERR 0 строка длиннее {MAX_LINE} байт\n".encode())
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                response = await self._execute(line.decode(errors="replace"))
+                writer.write(response.encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+# генератор нагрузки: clients соединений, каждое шлёт запросы по одному и ждёт ответ
+async def load_generator(port, clients=200, requests_per_client=500, accounts=10_000):
+    latencies = []
+
+    async def client(seed):
+        rng = np.random.default_rng(seed)
+        numbers = rng.integers(0, accounts, requests_per_client).tolist()
+        commands = rng.choice(["DEPOSIT", "WITHDRAW"], requests_per_client).tolist()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for number, command in zip(numbers, commands):
+            start = time.perf_counter()
+            writer.write(f"{command} {number} 10\n".encode())
+            await writer.drain()
+            await reader.readline()
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(seed) for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+async def _benchmark(accounts, clients, requests_per_client):
+    store = AccountStore(accounts)
+    store.open_accounts(np.arange(accounts), 1000)
+    server = BankServer(store)
+    port = await server.start()
+    latencies, elapsed = await load_generator(port, clients, requests_per_client, accounts)
+    await server.stop()
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"клиентов: {clients}, запросов: {len(latencies)}, {len(latencies) / elapsed:,.0f} оп/с, "
+          f"p50: {p50:.2f} мс, p99: {p99:.2f} мс, "
+          f"в среднем {server.operations / max(server.batches, 1):.1f} операций на микропакет")
+
+
+def benchmark_server(accounts=10_000, clients=(10, 100, 500), requests_per_client=200):
+    print(f"\nАсинхронный сервер: счетов {accounts}")
+    for n_clients in clients:
+        asyncio.run(_benchmark(accounts, n_clients, requests_per_client))
+
+
+if __name__ == "__main__":
+    benchmark_server()
@@ -0,0 +1,227 @@
+# подключаем библиотеки и модули
+import os
+import struct
+import tempfile
+import time
+import zlib
+from itertools import islice
+import numpy as np
+import batch
+import journal
+
+# код операции открытия счета (начальный баланс) в потоке операций
+OPENING = 2
+
+# колонки выписки
+COLUMNS = ("account", "opening", "deposits", "withdrawals", "operations", "closing")
+# заголовок колоночного файла: сигнатура и число колонок; дальше идут группы строк:
+# число строк (uint32) и затем каждая колонка целиком как int64
+COLUMNAR_MAGIC = b"BNKSTMT1"
+ROW_GROUP_HEADER = struct.Struct("<I")
+
+_CSV_DTYPE = np.dtype([("account", np.int64), ("op", "U8"), ("amount", np.int64)])
+
+
+# поток операций из CSV (номер счета, deposit/withdraw, сумма) порциями по chunk_rows строк;
+# в памяти одновременно находится только одна порция
+def iter_csv(path, chunk_rows=1_000_000, skip_header=True):
+    with open(path, encoding="utf-8") as f:
+        if skip_header:
+            next(f, None)
+        while True:
+            lines = list(islice(f, chunk_rows))
+            if not lines:
+                return
+            rows = np.loadtxt(lines, delimiter=",", dtype=_CSV_DTYPE, ndmin=1)
+            yield rows["account"], batch.encode_operations(rows["op"]), rows["amount"]
+
+
+# поток операций из журнала journal.bin, блок за блоком; блокировки пропускаются.
+# Как и journal.read_journal, чтение останавливается на первом неполном или повреждённом блоке
+def iter_journal(path, chunk_records=1_000_000):
+    codes = np.full(5, -1, dtype=np.int8)
+    codes[journal.OPEN] = OPENING
+    codes[journal.DEPOSIT] = batch.DEPOSIT
+    codes[journal.WITHDRAW] = batch.WITHDRAW
+    pending = []
+    pending_size = 0
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(journal.BLOCK_HEADER.size)
+            if len(header) < journal.BLOCK_HEADER.size:
+                break
+            length, crc = journal.BLOCK_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) != length or length % journal.RECORD.itemsize or zlib.crc32(payload) != crc:
+                break
+            records = np.frombuffer(payload, dtype=journal.RECORD)
+            records = records[codes[records["op"]] >= 0]
+            pending.append(records)
+            pending_size += len(records)
+            if pending_size >= chunk_records:
+                yield _journal_chunk(pending, codes)
+                pending, pending_size = [], 0
+    if pending_size:
+        yield _journal_chunk(pending, codes)
+
+
+def _journal_chunk(parts, codes):
+    records = np.concatenate(parts)
+    return records["account"], codes[records["op"]], records["amount"]
+
+
+# накопление итогов по счетам: номера счетов отображаются в плотные индексы (numbers - отсортированные
+# номера, индекс счета - позиция в нём), поэтому память зависит от числа счетов, а не от величины номеров
+class StatementTotals:
+    COLUMNS = ("opening", "deposits", "withdrawals", "operations")
+
+    def __init__(self):
+        self.numbers = np.zeros(0, dtype=np.int64)
+        for name in self.COLUMNS:
+            setattr(self, name, np.zeros(0, dtype=np.int64))
+        self.rows = 0
+
+    def __len__(self):
+        return len(self.numbers)
+
+    # плотные индексы для номеров порции; новые номера вливаются в отсортированный список,
+    # а уже накопленные итоги переезжают на свои новые позиции
+    def _ids(self, accounts):
+        numbers, inverse = np.unique(accounts, return_inverse=True)
+        positions = np.searchsorted(self.numbers, numbers)
+        known = positions < len(self.numbers)
+        known[known] = self.numbers[positions[known]] == numbers[known]
+        if not known.all():
+            merged = np.union1d(self.numbers, numbers)
+            moved = np.searchsorted(merged, self.numbers)
+            for name in self.COLUMNS:
+                column = np.zeros(len(merged), dtype=np.int64)
+                column[moved] = getattr(self, name)
+                setattr(self, name, column)
+            self.numbers = merged
+            positions = np.searchsorted(merged, numbers)
+        return positions[inverse]
+
+    def add(self, accounts, ops, amounts):
+        if len(accounts) == 0:
+            return
+        accounts = np.asarray(accounts, dtype=np.int64)
+        ops = np.asarray(ops)
+        # порция проверяется целиком до изменения итогов
+        if len(ops) != len(accounts) or len(amounts) != len(accounts):
+            raise ValueError("Колонки порции должны быть одной длины")
+        if accounts.min() < 0:
+            raise ValueError("Номер счета не может быть отрицательным")
+        if not np.isin(ops, (batch.DEPOSIT, batch.WITHDRAW, OPENING)).all():
+            raise ValueError("Неизвестный код операции")
+        ids = self._ids(accounts)
+        for target, code in ((self.deposits, batch.DEPOSIT), (self.withdrawals, batch.WITHDRAW),
+                             (self.opening, OPENING)):
+            # np.add.at суммирует в int64 без потери точности (bincount с весами считает во float64)
+            selected = ops == code
+            np.add.at(target, ids[selected], amounts[selected].astype(np.int64, copy=False))
+        self.operations += np.bincount(ids[ops != OPENING], minlength=len(self))
+        self.rows += len(accounts)
+
+    def closing(self):
+        return self.opening + self.deposits - self.withdrawals
+
+    # итоги порциями по chunk_accounts счетов (только счета, по которым было движение)
+    def iter_chunks(self, chunk_accounts=1_000_000):
+        for start in range(0, len(self), chunk_accounts):
+            stop = min(start + chunk_accounts, len(self))
+            opening = self.opening[start:stop]
+            deposits = self.deposits[start:stop]
+            withdrawals = self.withdrawals[start:stop]
+            operations = self.operations[start:stop]
+            active = np.flatnonzero((operations > 0) | (opening != 0))
+            yield (self.numbers[start:stop][active], opening[active], deposits[active], withdrawals[active],
+                   operations[active], opening[active] + deposits[active] - withdrawals[active])
+
+
+# агрегирование потока порций операций
+def aggregate(chunks):
+    totals = StatementTotals()
+    for chunk in chunks:
+        totals.add(*chunk)
+    return totals
+
+
+# запись выписок в CSV порциями: строки формируются для одной порции и сразу уходят в файл
+def write_csv(totals, path, chunk_accounts=1_000_000):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(COLUMNS) + "\n")
+        for columns in totals.iter_chunks(chunk_accounts):
+            np.savetxt(f, np.column_stack(columns), fmt="%d", delimiter=",")
+
+
+# запись выписок в двоичный колоночный файл группами строк
+def write_columnar(totals, path, chunk_accounts=1_000_000):
+    with open(path, "wb") as f:
+        f.write(COLUMNAR_MAGIC + struct.pack("<I", len(COLUMNS)))
+        for columns in totals.iter_chunks(chunk_accounts):
+            f.write(ROW_GROUP_HEADER.pack(len(columns[0])))
+            for column in columns:
+                f.write(np.ascontiguousarray(column, dtype=np.int64).tobytes())
+
+
+# чтение колоночного файла по группам строк: словарь колонка -> массив
+def iter_columnar(path):
+    with open(path, "rb") as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError("Неверный формат файла выписок")
+        (n_columns,) = struct.unpack("<I", f.read(4))
+        while header := f.read(ROW_GROUP_HEADER.size):
+            (rows,) = ROW_GROUP_HEADER.unpack(header)
+            yield {name: np.frombuffer(f.read(rows * 8), dtype=np.int64) for name in COLUMNS[:n_columns]}
+
+
+# генерация CSV с операциями без хранения его в памяти
+def generate_csv(path, rows, accounts, chunk_rows=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    names = np.array(["deposit", "withdraw"])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("account,op,amount\n")
+        for start in range(0, rows, chunk_rows):
+            size = min(chunk_rows, rows - start)
+            chunk = np.empty(size, dtype=[("account", np.int64), ("op", "U8"), ("amount", np.int64)])
+            chunk["account"] = rng.integers(0, accounts, size)
+            chunk["op"] = names[rng.integers(0, 2, size)]
+            chunk["amount"] = rng.integers(1, 100_000, size)
+            np.savetxt(f, chunk, fmt=("%d", "%s", "%d"), delimiter=",")
+
+
+def _peak_rss_mb():
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# пропускная способность конвейера; пиковая память не растёт вместе с размером входа
+def benchmark_statements(rows=20_000_000, accounts=1_000_000):
+    directory = tempfile.mkdtemp(prefix="bank-statements-")
+    source = os.path.join(directory, "operations.csv")
+    print(f"\nВыписки: операций {rows}, счетов {accounts}")
+    generate_csv(source, rows, accounts)
+    size_mb = os.path.getsize(source) / 2 ** 20
+    rss_before = _peak_rss_mb()
+
+    start = time.perf_counter()
+    totals = aggregate(iter_csv(source))
+    aggregate_time = time.perf_counter() - start
+    print(f"агрегирование {size_mb:.0f} МБ CSV: {aggregate_time:.1f} с ({rows / aggregate_time:,.0f} строк/с)")
+
+    for writer, name in ((write_csv, "statements.csv"), (write_columnar, "statements.bin")):
+        target = os.path.join(directory, name)
+        start = time.perf_counter()
+        writer(totals, target)
+        elapsed = time.perf_counter() - start
+        print(f"запись {name}: {elapsed:.2f} с ({os.path.getsize(target) / 2 ** 20:.0f} МБ)")
+
+    print(f"пиковая память процесса: {_peak_rss_mb():.0f} МБ (до обработки {rss_before:.0f} МБ)")
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    benchmark_statements()
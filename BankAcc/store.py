@@ -0,0 +1,280 @@
+# подключаем библиотеки и модули
+import time
+import tracemalloc
+import numpy as np
+from main import (BankAccount, NegativeAmountError, InsufficientFundsError, AccountLockedError,
+                  SUCCESS, DECLINED_LOCKED, DECLINED_NEGATIVE_AMOUNT, DECLINED_INSUFFICIENT_FUNDS)
+from ledger import AccountNotFoundError, AccountExistsError
+import batch
+
+# константа для мультипликативного хеширования номеров счетов (64-битная, нечётная)
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+_EMPTY = -1
+
+
+# лёгкое представление счета в хранилище: хранит только ссылку на хранилище и индекс строки,
+# интерфейс совпадает с BankAccount
+class AccountView:
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def account_number(self):
+        return int(self._store._numbers[self._index])
+
+    @property
+    def _is_locked(self):
+        return bool(self._store._locked[self._index])
+
+    def balance(self):
+        return self._store._balances[self._index].item()
+
+    # пополнение счета
+    def deposit(self, amount):
+        store = self._store
+        if store._locked[self._index]:
+            raise AccountLockedError()
+
+        if amount <= 0:
+            raise NegativeAmountError(amount)
+
+        store._balances[self._index] += amount
+        return store._balances[self._index].item()
+
+    # снятие средств со счета
+    def withdraw(self, amount):
+        store = self._store
+        if store._locked[self._index]:
+            raise AccountLockedError()
+
+        if amount <= 0:
+            raise NegativeAmountError(amount)
+
+        balance = store._balances[self._index].item()
+        if amount > balance:
+            raise InsufficientFundsError(balance, amount)
+
+        store._balances[self._index] -= amount
+        return store._balances[self._index].item()
+
+    # варианты без исключений, как в BankAccount
+    def try_deposit(self, amount):
+        store = self._store
+        if store._locked[self._index]:
+            return DECLINED_LOCKED
+        if amount <= 0:
+            return DECLINED_NEGATIVE_AMOUNT
+        store._balances[self._index] += amount
+        return SUCCESS
+
+    def try_withdraw(self, amount):
+        store = self._store
+        if store._locked[self._index]:
+            return DECLINED_LOCKED
+        if amount <= 0:
+            return DECLINED_NEGATIVE_AMOUNT
+        if amount > store._balances[self._index]:
+            return DECLINED_INSUFFICIENT_FUNDS
+        store._balances[self._index] -= amount
+        return SUCCESS
+
+    # блокировка/разблокировка счёта
+    def lock(self):
+        self._store._locked[self._index] = True
+
+    def unlock(self):
+        self._store._locked[self._index] = False
+
+    def __str__(self):
+        status = "заблокирован" if self._is_locked else "активен"
+        return f"Счет #{self.account_number}, баланс: {self.balance()}, статус: {status}"
+
+
+# колоночное хранилище счетов: балансы, флаги блокировки и номера лежат в плотных массивах,
+# индекс номер->строка - хеш-таблица с открытой адресацией, тоже в массиве.
+# Номера счетов должны быть целыми числами (или строками из цифр), суммы - в минимальных
+# единицах (копейках), поэтому по умолчанию балансы хранятся как int64
+class AccountStore:
+    def __init__(self, capacity=1024, dtype=np.int64):
+        capacity = max(int(capacity), 16)
+        self._size = 0
+        self._balances = np.zeros(capacity, dtype=dtype)
+        self._locked = np.zeros(capacity, dtype=bool)
+        self._numbers = np.zeros(capacity, dtype=np.int64)
+        self._allocate_table(capacity * 2)
+
+    # хеш-таблица: размер - степень двойки, заполнение не больше половины
+    def _allocate_table(self, min_slots):
+        bits = max(int(min_slots - 1).bit_length(), 4)
+        self._table_bits = bits
+        self._table = np.full(1 << bits, _EMPTY, dtype=np.int32)
+
+    def _slot(self, number):
+        return ((number * _HASH_MULTIPLIER) & _MASK64) >> (64 - self._table_bits)
+
+    def _slots(self, numbers):
+        hashed = numbers.astype(np.uint64) * np.uint64(_HASH_MULTIPLIER)
+        return (hashed >> np.uint64(64 - self._table_bits)).astype(np.int64)
+
+    # поиск строки по номеру счета, -1 если счета нет
+    def _find(self, number):
+        table = self._table
+        mask = len(table) - 1
+        slot = self._slot(number)
+        while True:
+            index = table[slot]
+            if index == _EMPTY:
+                return _EMPTY
+            if self._numbers[index] == number:
+                return int(index)
+            slot = (slot + 1) & mask
+
+    # векторный поиск строк для массива номеров
+    def _find_many(self, numbers):
+        table = self._table
+        mask = len(table) - 1
+        result = np.full(len(numbers), _EMPTY, dtype=np.int64)
+        pending = np.arange(len(numbers))
+        slots = self._slots(numbers)
+        while len(pending):
+            indexes = table[slots]
+            empty = indexes == _EMPTY
+            found = ~empty & (self._numbers[np.where(empty, 0, indexes)] == numbers[pending])
+            result[pending[found]] = indexes[found]
+            keep = ~(empty | found)
+            pending = pending[keep]
+            slots = (slots[keep] + 1) & mask
+        return result
+
+    # векторная вставка строк в хеш-таблицу (номера уже проверены на уникальность)
+    def _insert_many(self, rows):
+        table = self._table
+        mask = len(table) - 1
+        slots = self._slots(self._numbers[rows])
+        while len(rows):
+            free = np.flatnonzero(table[slots] == _EMPTY)
+            # если несколько строк претендуют на один слот, его занимает одна из них,
+            # остальные пробуют следующий слот
+            table[slots[free]] = rows[free]
+            keep = table[slots] != rows
+            rows = rows[keep]
+            slots = (slots[keep] + 1) & mask
+
+    # увеличение ёмкости массивов и перестройка хеш-таблицы
+    def _reserve(self, capacity):
+        if capacity <= len(self._balances):
+            return
+        capacity = max(capacity, len(self._balances) * 2)
+        for name in ("_balances", "_locked", "_numbers"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+        self._allocate_table(capacity * 2)
+        self._insert_many(np.arange(self._size))
+
+    # открытие одного счета
+    def open_account(self, account_number, initial_balance=0):
+        number = int(account_number)
+        if self._find(number) != _EMPTY:
+            raise AccountExistsError(account_number)
+        self._reserve(self._size + 1)
+        index = self._size
+        self._numbers[index] = number
+        self._balances[index] = initial_balance
+        self._size += 1
+        self._insert_many(np.array([index]))
+        return AccountView(self, index)
+
+    # массовое открытие счетов без создания объектов для каждого счета
+    def open_accounts(self, account_numbers, initial_balances=0):
+        numbers = np.asarray(account_numbers, dtype=np.int64)
+        ordered = np.sort(numbers)
+        if (ordered[1:] == ordered[:-1]).any():
+            raise ValueError("Номера счетов в пакете повторяются")
+        existing = self._find_many(numbers)
+        if (existing != _EMPTY).any():
+            raise AccountExistsError(int(numbers[np.argmax(existing != _EMPTY)]))
+        self._reserve(self._size + len(numbers))
+        rows = np.arange(self._size, self._size + len(numbers))
+        self._numbers[rows] = numbers
+        self._balances[rows] = initial_balances
+        self._size += len(numbers)
+        self._insert_many(rows)
+
+    # получение представления счета по номеру
+    def get(self, account_number):
+        index = self._find(int(account_number))
+        if index == _EMPTY:
+            raise AccountNotFoundError(account_number)
+        return AccountView(self, index)
+
+    __getitem__ = get
+
+    def __contains__(self, account_number):
+        return self._find(int(account_number)) != _EMPTY
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield AccountView(self, index)
+
+    # массивы без свободного хвоста (представления, без копирования)
+    def balances(self):
+        return self._balances[:self._size]
+
+    def locked(self):
+        return self._locked[:self._size]
+
+    def account_numbers(self):
+        return self._numbers[:self._size]
+
+    # пакетная обработка операций (см. batch.apply_batch) по номерам счетов
+    def apply_batch(self, account_numbers, op_types, amounts):
+        indexes = self._find_many(np.asarray(account_numbers, dtype=np.int64))
+        return batch.apply_batch(self.balances(), self.locked(), indexes, op_types, amounts)
+
+    def total_balance(self):
+        return self.balances().sum().item()
+
+    def __str__(self):
+        return f"Хранилище счетов: {self._size}, суммарный баланс: {self.total_balance()}"
+
+
+# сравнение потребления памяти: объекты BankAccount в словаре против AccountStore
+def benchmark_memory(accounts=1_000_000):
+    print(f"\nПамять на {accounts} счетов")
+
+    tracemalloc.start()
+    objects = {number: BankAccount(number, 100) for number in range(accounts)}
+    objects_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = AccountStore(accounts)
+    store.open_accounts(np.arange(accounts), 100)
+    build_time = time.perf_counter() - start
+    store_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"BankAccount + dict: {objects_memory / 2 ** 20:8.1f} МБ ({objects_memory / accounts:.0f} байт на счет)")
+    print(f"AccountStore:       {store_memory / 2 ** 20:8.1f} МБ ({store_memory / accounts:.0f} байт на счет), "
+          f"создание за {build_time:.2f} с")
+    print(f"экономия: x{objects_memory / store_memory:.1f}")
+
+    account = store.get(accounts // 2)
+    account.deposit(50)
+    account.withdraw(30)
+    print(account)
+
+
+if __name__ == "__main__":
+    benchmark_memory()
@@ -0,0 +1,25 @@
+# регрессионные тесты истории балансов
+import pytest
+from history import AccountHistory, BLOCK_SIZE
+
+
+# отклонённая из-за порядка времени пачка не должна менять баланс и хвост
+def test_rejected_extend_keeps_balance():
+    history = AccountHistory()
+    history.record(10, 5)
+    with pytest.raises(ValueError):
+        history.extend([1, 2], [1, 1])
+    assert history.balance() == 5
+    assert len(history) == 1
+    assert history.balance_at(10) == 5
+
+
+def test_rejected_extend_after_sealed_block():
+    history = AccountHistory()
+    history.extend(range(BLOCK_SIZE), [1] * BLOCK_SIZE)
+    with pytest.raises(ValueError):
+        history.extend([0], [7])
+    assert history.balance() == BLOCK_SIZE
+    history.extend([BLOCK_SIZE, BLOCK_SIZE + 1], [2, 3])
+    assert history.balance() == BLOCK_SIZE + 5
+    assert history.balance_at(BLOCK_SIZE) == BLOCK_SIZE + 2
@@ -0,0 +1,129 @@
+# подключаем библиотеки и модули
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import engine
+
+
+# описание графика из командной строки: X:Y:тип[:агрегат], например Отдел:Зарплата:bar:sum
+def parse_chart(text):
+    parts = text.split(":")
+    if len(parts) not in (3, 4):
+        raise argparse.ArgumentTypeError(f"ожидается X:Y:тип[:агрегат], получено {text!r}")
+    x_col, y_col, chart_type = parts[:3]
+    agg = parts[3] if len(parts) == 4 else None
+    try:
+        engine.check_chart(chart_type, agg)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return x_col, y_col, chart_type, agg
+
+
+# задание одного процесса: файл загружается и фильтруется один раз, затем строятся все его графики
+def render_file(file_path, charts, output_dir, image_format, condition=None, use_cache=False):
+    cache = None
+    if use_cache:
+        from file_cache import FileCache
+        cache = FileCache()
+    data = engine.load(file_path, cache=cache)
+    if condition:
+        data = engine.apply_filter(data, condition)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    results = []
+    for index, (x_col, y_col, chart_type, agg) in enumerate(charts):
+        start = time.perf_counter()
+        output_path = os.path.join(output_dir, f"{stem}-{index + 1}-{chart_type}.{image_format}")
+        engine.render_chart(data, x_col, y_col, chart_type, output_path, agg=agg)
+        results.append((output_path, time.perf_counter() - start))
+    return results
+
+
+# все файлы x все графики в пуле процессов; возвращает [(путь к картинке, секунды)]
+def render_all(files, charts, output_dir, image_format="png", condition=None, workers=None, use_cache=False):
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    results = []
+    errors = []
+    with ProcessPoolExecutor(min(workers, len(files)) or 1) as pool:
+        futures = {pool.submit(render_file, file_path, charts, output_dir, image_format, condition, use_cache): file_path
+                   for file_path in files}
+        for future in as_completed(futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                errors.append((futures[future], e))
+    return results, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Построение графиков по файлам Excel/CSV без окна")
+    parser.add_argument("files", nargs="+", help="файлы данных (.csv, .xlsx, .xls)")
+    parser.add_argument("-c", "--chart", action="append", type=parse_chart, required=True,
+                        help="график X:Y:тип[:агрегат]; тип - bar, line, pie; агрегат - sum, mean, count, min, max")
+    parser.add_argument("-f", "--filter", help="условие отбора строк, например \"Возраст > 30\"")
+    parser.add_argument("-o", "--output", default="charts", help="каталог для картинок")
+    parser.add_argument("--format", choices=("png", "svg"), default="png")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="число процессов (по умолчанию - по числу ядер)")
+    parser.add_argument("--cache", action="store_true", help="использовать кэш загруженных файлов")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results, errors = render_all(args.files, args.chart, args.output, args.format, args.filter,
+                                 args.workers, args.cache)
+    elapsed = time.perf_counter() - start
+    for output_path, seconds in sorted(results):
+        print(f"{output_path} ({seconds:.2f} с)")
+    for file_path, error in errors:
+        print(f"Ошибка в файле {file_path}: {error}", file=sys.stderr)
+    print(f"Графиков: {len(results)} за {elapsed:.2f} с ({len(results) / elapsed:.1f} в секунду)")
+    return 1 if errors else 0
+
+
+# время импорта (движок против окна) и число графиков в секунду при разном числе процессов
+def benchmark_cli(files=8, rows=200_000):
+    import subprocess
+    import tempfile
+    from loader import generate_csv
+    here = os.path.dirname(os.path.abspath(__file__))
+    imports = {
+        "import engine": "import engine",
+        "import main (без запуска окна)": "import main",
+        "окно (customtkinter, pandas, matplotlib)":
+            "import customtkinter, pandas, matplotlib.pyplot, matplotlib.backends.backend_tkagg",
+    }
+    print("\nВремя импорта (отдельный процесс, лучшее из 3)")
+    for label, statement in imports.items():
+        code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+        best = min(float(subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True,
+                                        text=True, check=True).stdout) for _ in range(3))
+        print(f"{label:42s}: {best * 1000:.0f} мс")
+
+    directory = tempfile.mkdtemp(prefix="analyzer-cli-")
+    paths = []
+    for index in range(files):
+        paths.append(os.path.join(directory, f"data{index}.csv"))
+        generate_csv(paths[-1], rows, seed=index)
+    charts = [("Отдел", "Зарплата", "bar", "sum"), ("ID", "Рейтинг", "line", None),
+              ("Город", "Стаж", "pie", "mean")]
+    print(f"\n{files} файлов по {rows} строк, {len(charts)} графика на файл")
+    for workers in sorted({1, os.cpu_count() or 1}):
+        for image_format in ("png", "svg"):
+            start = time.perf_counter()
+            results, errors = render_all(paths, charts, os.path.join(directory, "out"), image_format, workers=workers)
+            elapsed = time.perf_counter() - start
+            per_chart = sum(seconds for _, seconds in results) / max(len(results), 1)
+            print(f"{workers} проц., {image_format}: {len(results)} графиков за {elapsed:.2f} с, "
+                  f"{len(results) / elapsed:.1f} графиков/с, отрисовка одного {per_chart * 1000:.0f} мс"
+                  f"{'' if not errors else f', ошибок {len(errors)}'}")
+    import shutil
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # python cli.py benchmark - замер; иначе построение графиков
+    if sys.argv[1:] == ["benchmark"]:
+        benchmark_cli()
+    else:
+        sys.exit(main())
@@ -0,0 +1,90 @@
+# загрузка, фильтр и построение графиков без окна - для скриптов и заданий по расписанию.
+# Тяжёлые библиотеки (pandas, matplotlib) импортируются только внутри функций,
+# поэтому сам модуль импортируется мгновенно
+
+# типы графиков: английские названия для командной строки -> названия в окне
+CHART_TYPES = {"bar": "Столбчатая", "line": "Линейная", "pie": "Круговая"}
+# названия агрегатов в окне -> агрегаты pandas
+AGGREGATIONS = {"Сумма": "sum", "Среднее": "mean", "Количество": "count", "Минимум": "min", "Максимум": "max"}
+
+
+def chart_type_name(chart_type):
+    return CHART_TYPES.get(chart_type, chart_type)
+
+
+# проверка графика до построения: ValueError с понятным сообщением вместо ошибки при отрисовке
+def check_chart(chart_type, agg=None):
+    name = chart_type_name(chart_type)
+    if name not in CHART_TYPES.values():
+        raise ValueError(f"неизвестный тип графика {chart_type!r}")
+    if agg is None:
+        return
+    if agg not in AGGREGATIONS.values():
+        raise ValueError(f"неизвестный агрегат {agg!r}, допустимы: {', '.join(AGGREGATIONS.values())}")
+    if name == "Линейная":
+        raise ValueError("Сводку можно показать столбчатой или круговой диаграммой")
+
+
+# загрузка файла в фоновом потоке (события - см. loader.LoadTask)
+def start_load(file_path, cache=None):
+    from loader import LoadTask
+    return LoadTask(file_path, cache=cache).start()
+
+
+# чтение файла целиком (порциями, с уменьшением типов и, если задан, с кэшем)
+def load(file_path, cache=None):
+    return start_load(file_path, cache).result()
+
+
+# отбор строк по условию в синтаксисе DataFrame.query
+def apply_filter(data, condition, engine=None):
+    from filters import FilterEngine
+    engine = engine or FilterEngine()
+    engine.set_data(data)
+    return engine.filter(condition)
+
+
+# сводка Y по группам X: по CSV - потоково в нескольких процессах, иначе по загруженной таблице
+# (top - сколько групп оставить, остальные сворачиваются в "Другие")
+def aggregate(by, value, agg, data=None, file_path=None, workers=None, top=None):
+    from groupby import GroupByTask, aggregate_frame
+    if data is None:
+        return GroupByTask(file_path, by, value, agg, workers=workers, top=top).start().result()
+    return aggregate_frame(data, by, value, agg, top)
+
+
+# сводка в виде таблицы для графика
+def summary_frame(result, x_col, y_col):
+    import pandas as pd
+    return pd.DataFrame({x_col: result.index, y_col: result.to_numpy()})
+
+
+# таблица сводки для графика по загруженным данным: top-N групп, остальные - в "Другие"
+def summary(data, x_col, y_col, agg):
+    from plotting import MAX_CATEGORIES
+    return summary_frame(aggregate(x_col, y_col, agg, data=data, top=MAX_CATEGORIES), x_col, y_col)
+
+
+# то же по CSV-файлу потоково в фоне: GroupByTask, результат которого передаётся в summary_frame
+def start_summary(file_path, x_col, y_col, agg, workers=None):
+    from groupby import GroupByTask
+    from plotting import MAX_CATEGORIES
+    return GroupByTask(file_path, x_col, y_col, agg, workers=workers, top=MAX_CATEGORIES).start()
+
+
+# график в файл (PNG, SVG - по расширению) через Agg, без pyplot и без окна
+def render_chart(data, x_col, y_col, chart_type, output_path, agg=None, figsize=(8, 4), dpi=100):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from plotting import draw_chart
+    check_chart(chart_type, agg)
+    if agg is not None:
+        data = summary(data, x_col, y_col, agg)
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    draw_chart(ax, data, x_col, y_col, chart_type_name(chart_type))
+    ax.tick_params(axis='x', labelrotation=90)
+    figure.tight_layout()
+    figure.savefig(output_path)
+    return output_path
@@ -0,0 +1,213 @@
+# подключаем библиотеки и модули
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+# каталог кэша по умолчанию и его предельный размер
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "data_analisator")
+MAX_CACHE_BYTES = 2 * 2 ** 30
+META_FILE = "meta.json"
+
+
+# кэш загруженных файлов в колоночном виде: каждый столбец - отдельный .npy,
+# который при чтении отображается в память (mmap), поэтому повторное открытие
+# не копирует данные. Запись кэша привязана к пути, времени изменения и размеру файла,
+# снятым до чтения, и хранит смещение, до которого файл был прочитан.
+# Кэшируются только таблицы, все столбцы которых восстанавливаются без изменений (cacheable)
+class FileCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, file_path):
+        name = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def signature(file_path, stat=None):
+        stat = stat or os.stat(file_path)
+        return {"path": os.path.abspath(file_path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    # чтение из кэша; None, если записи нет или файл изменился
+    def load(self, file_path):
+        loaded = self.load_entry(file_path)
+        return None if loaded is None else loaded[0]
+
+    # (таблица, смещение в файле, до которого она прочитана) или None. source - подпись файла,
+    # если она уже снята вызывающим
+    def load_entry(self, file_path, source=None):
+        entry = self._entry(file_path)
+        try:
+            with open(os.path.join(entry, META_FILE), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if meta["source"] != (source or self.signature(file_path)):
+            # файл изменился - запись устарела
+            shutil.rmtree(entry, ignore_errors=True)
+            self.misses += 1
+            return None
+
+        columns = {}
+        for index, column in enumerate(meta["columns"]):
+            columns[column["name"]] = self._load_column(entry, index, column)
+        # отметка времени использования для вытеснения давно не открывавшихся файлов
+        os.utime(os.path.join(entry, META_FILE))
+        self.hits += 1
+        return pd.DataFrame(columns, copy=False), meta.get("offset", meta["source"]["size"])
+
+    @staticmethod
+    def _load_column(entry, index, column):
+        values = np.load(os.path.join(entry, f"{index}.npy"), mmap_mode="r")
+        kind = column["kind"]
+        if kind == "category":
+            categories = np.load(os.path.join(entry, f"{index}.categories.npy"), allow_pickle=False)
+            if "categories_dtype" in column:
+                categories = pd.Index(categories, dtype=pd.api.types.pandas_dtype(column["categories_dtype"]))
+            else:
+                categories = pd.Index(categories.astype(object) if categories.dtype.kind == "U" else categories)
+            categorical = pd.Categorical.from_codes(values, categories=categories, ordered=column.get("ordered", False))
+            if "dtype" in column:
+                # строковый столбец, который хранился как категории
+                # (Series с явным типом: иначе DataFrame сам выводит тип для столбца из объектов)
+                dtype = pd.api.types.pandas_dtype(column["dtype"])
+                return pd.Series(categorical.astype(dtype), dtype=dtype, copy=False)
+            return categorical
+        if kind == "datetime":
+            return values.view(column["dtype"])
+        return values
+
+    # сохранение таблицы в кэш; False, если таблицу нельзя закэшировать без потерь.
+    # source - подпись файла, снятая до чтения (иначе дописанные за время загрузки строки
+    # оказались бы под подписью, в которой их нет), offset - до какого байта файл прочитан
+    def store(self, file_path, data, source=None, offset=None):
+        if not all(self.cacheable(data.iloc[:, index]) for index in range(data.shape[1])):
+            return False
+        entry = self._entry(file_path)
+        tmp = entry + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        try:
+            columns = []
+            for index, name in enumerate(data.columns):
+                columns.append(self._store_column(tmp, index, name, data[name]))
+            meta = {"source": source or self.signature(file_path), "offset": offset, "columns": columns,
+                    "created": time.time()}
+            with open(os.path.join(tmp, META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        self.evict()
+        return True
+
+    # столбец восстанавливается из кэша точно: числа, bool, даты без часового пояса, строки
+    # и категории с числовыми или строковыми значениями. Смешанные объекты, nullable-типы
+    # (Int64 и т.п.) и даты с часовым поясом не кэшируются
+    @staticmethod
+    def cacheable(series):
+        dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = dtype.categories
+            return (isinstance(categories.dtype, np.dtype) and categories.dtype.kind in "biuf"
+                    or _is_strings(categories))
+        if isinstance(dtype, pd.StringDtype) or dtype == object:
+            return _is_strings(series)
+        return isinstance(dtype, np.dtype) and dtype.kind in "biufM"
+
+    @staticmethod
+    def _store_column(directory, index, name, series):
+        path = os.path.join(directory, f"{index}.npy")
+        dtype = series.dtype
+        if pd.api.types.is_datetime64_dtype(dtype):
+            np.save(path, series.to_numpy().view(np.int64))
+            return {"name": str(name), "kind": "datetime", "dtype": str(series.to_numpy().dtype)}
+        if isinstance(dtype, pd.CategoricalDtype) or not isinstance(dtype, np.dtype) or dtype == object:
+            # строки хранятся как коды категорий + сами категории
+            categorical = series if isinstance(dtype, pd.CategoricalDtype) else series.astype("category")
+            codes = categorical.cat.codes.to_numpy()
+            categories = categorical.cat.categories
+            values = categories.to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            np.save(path, codes)
+            np.save(os.path.join(directory, f"{index}.categories.npy"), values)
+            column = {"name": str(name), "kind": "category", "ordered": bool(categorical.cat.ordered),
+                      "categories_dtype": str(categories.dtype)}
+            if not isinstance(dtype, pd.CategoricalDtype):
+                column["dtype"] = str(dtype)
+            return column
+        np.save(path, series.to_numpy())
+        return {"name": str(name), "kind": "array"}
+
+    def size(self):
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return total
+
+    # вытеснение записей, которые дольше всех не открывались, пока кэш больше предела
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            meta = os.path.join(entry, META_FILE)
+            if not os.path.exists(meta):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, item)) for item in os.listdir(entry))
+            entries.append((os.path.getmtime(meta), size, entry))
+            total += size
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+
+# все непустые значения - строки
+def _is_strings(values):
+    return pd.api.types.infer_dtype(values, skipna=True) == "string"
+
+
+# холодная и тёплая загрузка
+def benchmark_cache(rows=2_000_000):
+    import tempfile
+    from loader import LoadTask, generate_csv
+    directory = tempfile.mkdtemp(prefix="analyzer-cache-")
+    cache = FileCache(os.path.join(directory, "cache"))
+    csv_path = os.path.join(directory, "large.csv")
+    generate_csv(csv_path, rows)
+    here = os.path.dirname(os.path.abspath(__file__))
+    files = [os.path.join(here, "Employee Sample Data.xlsx"), csv_path]
+    print(f"\nКэш файлов данных (CSV: {rows} строк)")
+    for file_path in files:
+        start = time.perf_counter()
+        data = LoadTask(file_path).start().result()
+        cold = time.perf_counter() - start
+        cache.store(file_path, data)
+        start = time.perf_counter()
+        cached = cache.load(file_path)
+        warm = time.perf_counter() - start
+        same = cached.shape == data.shape
+        print(f"{os.path.basename(file_path):28s}: без кэша {cold:.3f} с, из кэша {warm:.4f} с, "
+              f"ускорение x{cold / warm:.0f}, форма совпадает: {'да' if same else 'НЕТ'}")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark_cache()
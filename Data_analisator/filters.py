@@ -0,0 +1,499 @@
+# подключаем библиотеки и модули
+import ast
+import io
+import operator
+import re
+import tokenize
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+# сколько разобранных условий и сколько масок строк хранить
+MAX_COMPILED = 256
+MAX_MASKS = 32
+# индекс столбца используется, если совпадений хотя бы в столько раз меньше, чем проверяемых строк
+INDEX_SELECTIVITY = 8
+
+_BINARY = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+           ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+           ast.Pow: operator.pow, ast.BitAnd: operator.and_, ast.BitOr: operator.or_}
+_COMPARE = {ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt,
+            ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge}
+_NUMEXPR_BINARY = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/", ast.Mod: "%", ast.Pow: "**"}
+_NUMEXPR_COMPARE = {ast.Eq: "==", ast.NotEq: "!=", ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">="}
+
+
+# конструкция, которую движок не переводит в операции над массивами, -
+# такое условие вычисляется через DataFrame.eval, как раньше
+class _Unsupported(Exception):
+    pass
+
+
+# логическая маска из результата сравнения (пропуски считаются несовпадением, как в query)
+def _as_mask(value, size):
+    if isinstance(value, (bool, np.bool_)):
+        return np.full(size, bool(value))
+    if isinstance(value, pd.Series):
+        value = value.array
+    if isinstance(value, pd.api.extensions.ExtensionArray):
+        return value.to_numpy(dtype=bool, na_value=False)
+    return np.asarray(value, dtype=bool)
+
+
+# значения столбцов на строках-кандидатах; столбец выбирается только при первом обращении
+class _Rows:
+    def __init__(self, data, positions):
+        self.data = data
+        self.positions = positions
+        self.size = len(data) if positions is None else len(positions)
+        self._columns = {}
+
+    def column(self, name):
+        values = self._columns.get(name)
+        if values is None:
+            series = self.data[name]
+            if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iufb":
+                # числовые столбцы - простые массивы NumPy
+                values = series.to_numpy()
+                if self.positions is not None:
+                    values = values[self.positions]
+            else:
+                values = series if self.positions is None else series.iloc[self.positions]
+                values = values.reset_index(drop=True)
+            self._columns[name] = values
+        return values
+
+    def frame(self):
+        return self.data if self.positions is None else self.data.iloc[self.positions]
+
+
+# одно слагаемое условия (части, соединённые через and): разбирается один раз,
+# затем вычисляется numexpr, операциями NumPy/pandas или, если конструкция
+# не поддерживается, через DataFrame.eval
+class Term:
+    def __init__(self, node, source, columns):
+        self.source = source
+        self.key = ast.unparse(node)
+        self.names = sorted({item.id for item in ast.walk(node) if isinstance(item, ast.Name)})
+        try:
+            self._function = self._compile(node, columns)
+        except _Unsupported:
+            self._function = None
+        self.predicate = _index_predicate(node)
+        self._numexpr = None
+        if numexpr is not None and self._function is not None:
+            try:
+                self._numexpr = self._numexpr_source(node)
+            except _Unsupported:
+                pass
+
+    def evaluate(self, data, positions=None, indexes=None):
+        if indexes is not None and self.predicate is not None:
+            mask = self._evaluate_index(data, positions, indexes)
+            if mask is not None:
+                return mask
+        rows = _Rows(data, positions)
+        if self._numexpr is not None and all(
+                isinstance(data[name].dtype, np.dtype) and data[name].dtype.kind in "iufb" for name in self.names):
+            source, names = self._numexpr
+            local = {alias: rows.column(name) for name, alias in names.items()}
+            return _as_mask(numexpr.evaluate(source, local_dict=local), rows.size)
+        if self._function is not None:
+            return _as_mask(self._function(rows), rows.size)
+        return _as_mask(rows.frame().eval(self.source), rows.size)
+
+    # оценка числа совпадений по индексу (None - индекса нет)
+    def estimate(self, indexes):
+        if indexes is None or self.predicate is None:
+            return None
+        kind, column, arguments = self.predicate
+        index = indexes.get(column)
+        if index is None:
+            return None
+        if kind == "range":
+            return index.count_range(*arguments) if hasattr(index, "range") else None
+        if hasattr(index, "range") and not all(_is_number(item) for item in arguments):
+            return None
+        return index.count_isin(arguments)
+
+    # ==, in и диапазон по индексированному столбцу. Индекс используется, только если
+    # совпадений мало по сравнению с числом проверяемых строк, иначе полный просмотр быстрее
+    def _evaluate_index(self, data, positions, indexes):
+        count = self.estimate(indexes)
+        candidates = len(data) if positions is None else len(positions)
+        if count is None or count * INDEX_SELECTIVITY > candidates:
+            return None
+        kind, column, arguments = self.predicate
+        index = indexes.get(column)
+        rows = index.range(*arguments) if kind == "range" else index.isin(arguments)
+        mask = np.zeros(len(data), dtype=bool)
+        mask[rows] = True
+        return mask if positions is None else mask[positions]
+
+    # дерево выражения -> функция от строк-кандидатов
+    def _compile(self, node, columns):
+        if isinstance(node, ast.Name):
+            if node.id not in columns:
+                raise _Unsupported(node.id)
+            name = node.id
+            return lambda rows: rows.column(name)
+        if isinstance(node, ast.Constant):
+            value = node.value
+            return lambda rows: value
+        if isinstance(node, (ast.List, ast.Tuple)):
+            items = self._constant(node)
+            return lambda rows: items
+        if isinstance(node, ast.BoolOp):
+            parts = [self._compile(value, columns) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+
+            def boolean(rows):
+                result = _as_mask(parts[0](rows), rows.size)
+                for part in parts[1:]:
+                    result = combine(result, _as_mask(part(rows), rows.size))
+                return result
+            return boolean
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile(node.operand, columns)
+            if isinstance(node.op, ast.Not):
+                return lambda rows: ~_as_mask(operand(rows), rows.size)
+            if isinstance(node.op, ast.Invert):
+                return lambda rows: _invert(operand(rows), rows.size)
+            if isinstance(node.op, ast.USub):
+                return lambda rows: -operand(rows)
+            return operand
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            left, right = self._compile(node.left, columns), self._compile(node.right, columns)
+            function = _BINARY[type(node.op)]
+            return lambda rows: function(_widen(left(rows)), _widen(right(rows)))
+        if isinstance(node, ast.Compare):
+            operands = [self._compile(node.left, columns)] + [self._compile(item, columns) for item in node.comparators]
+            tests = [_comparison(op) for op in node.ops]
+
+            def compare(rows):
+                values = [operand(rows) for operand in operands]
+                result = None
+                for index, test in enumerate(tests):
+                    mask = _as_mask(test(values[index], values[index + 1]), rows.size)
+                    result = mask if result is None else result & mask
+                return result
+            return compare
+        raise _Unsupported(type(node).__name__)
+
+    @staticmethod
+    def _constant(node):
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [Term._constant(item) for item in node.elts]
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant):
+            return -node.operand.value
+        raise _Unsupported("list item")
+
+    # строка для numexpr: только числа, арифметика и сравнения
+    def _numexpr_source(self, node):
+        names = {name: f"c{index}" for index, name in enumerate(self.names)}
+
+        def render(item):
+            if isinstance(item, ast.Name):
+                return names[item.id]
+            if isinstance(item, ast.Constant) and isinstance(item.value, (int, float)) and not isinstance(item.value, bool):
+                return repr(item.value)
+            if isinstance(item, ast.BoolOp):
+                joiner = " & " if isinstance(item.op, ast.And) else " | "
+                return "(" + joiner.join(render(value) for value in item.values) + ")"
+            if isinstance(item, ast.UnaryOp) and isinstance(item.op, (ast.Not, ast.Invert)):
+                return f"(~{render(item.operand)})"
+            if isinstance(item, ast.UnaryOp) and isinstance(item.op, ast.USub):
+                return f"(-{render(item.operand)})"
+            if isinstance(item, ast.BinOp) and type(item.op) in _NUMEXPR_BINARY:
+                return f"({render(item.left)} {_NUMEXPR_BINARY[type(item.op)]} {render(item.right)})"
+            if isinstance(item, ast.Compare) and all(type(op) in _NUMEXPR_COMPARE for op in item.ops):
+                operands = [item.left] + item.comparators
+                parts = [f"({render(operands[i])} {_NUMEXPR_COMPARE[type(op)]} {render(operands[i + 1])})"
+                         for i, op in enumerate(item.ops)]
+                return "(" + " & ".join(parts) + ")"
+            raise _Unsupported(type(item).__name__)
+        return render(node), names
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# слагаемое, на которое можно ответить по индексу столбца:
+#   ("in", столбец, [значения]) - для "столбец == значение", "столбец in [...]", "столбец == [...]"
+#   ("range", столбец, (low, low_inclusive, high, high_inclusive)) - для <, <=, >, >= и цепочек 1 < x < 5
+def _index_predicate(node):
+    if not isinstance(node, ast.Compare):
+        return None
+    operands = [node.left] + node.comparators
+    try:
+        values = [None if isinstance(item, ast.Name) else Term._constant(item) for item in operands]
+    except _Unsupported:
+        return None
+    names = {item.id for item in operands if isinstance(item, ast.Name)}
+    if len(names) != 1 or values.count(None) != 1:
+        return None
+    column = names.pop()
+
+    if len(node.ops) == 1 and isinstance(node.ops[0], (ast.Eq, ast.In)):
+        value = values[1] if values[0] is None else values[0]
+        if isinstance(node.ops[0], ast.In):
+            # "значение in столбец" индексом не проверяется
+            return ("in", column, value) if values[0] is None and isinstance(value, list) else None
+        return ("in", column, value if isinstance(value, list) else [value])
+
+    low = high = None
+    low_inclusive = high_inclusive = True
+    for op, left, right in zip(node.ops, values, values[1:]):
+        if not isinstance(op, (ast.Lt, ast.LtE, ast.Gt, ast.GtE)):
+            return None
+        # приводим к виду "константа <(=) столбец" или "столбец <(=) константа"
+        if isinstance(op, (ast.Gt, ast.GtE)):
+            left, right = right, left
+        inclusive = isinstance(op, (ast.LtE, ast.GtE))
+        if left is None and _is_number(right) and high is None:
+            high, high_inclusive = right, inclusive
+        elif right is None and _is_number(left) and low is None:
+            low, low_inclusive = left, inclusive
+        else:
+            return None
+    return ("range", column, (low, low_inclusive, high, high_inclusive))
+
+
+# целые столбцы после загрузки уменьшены (int8, int16), поэтому перед арифметикой
+# они расширяются, чтобы не было переполнения
+def _widen(value):
+    if isinstance(value, np.ndarray) and value.dtype.kind in "iu" and value.dtype.itemsize < 8:
+        return value.astype(np.int64)
+    return value
+
+
+def _invert(value, size):
+    if isinstance(value, np.ndarray) and value.dtype.kind in "iu":
+        return np.invert(value)
+    return ~_as_mask(value, size)
+
+
+# сравнение; "столбец == [список]" в query означает принадлежность списку
+def _comparison(op):
+    if isinstance(op, (ast.In, ast.NotIn)):
+        negate = isinstance(op, ast.NotIn)
+        return lambda left, right: _isin(left, right, negate)
+    if isinstance(op, (ast.Eq, ast.NotEq)):
+        function = _COMPARE[type(op)]
+        negate = isinstance(op, ast.NotEq)
+
+        def equal(left, right):
+            if isinstance(right, list):
+                return _isin(left, right, negate)
+            if isinstance(left, list):
+                return _isin(right, left, negate)
+            return function(left, right)
+        return equal
+    if type(op) in _COMPARE:
+        return _COMPARE[type(op)]
+    raise _Unsupported(type(op).__name__)
+
+
+def _isin(values, items, negate):
+    if not isinstance(items, list):
+        items = [items]
+    if isinstance(values, np.ndarray):
+        result = np.isin(values, items)
+    else:
+        result = _as_mask(pd.Series(values).isin(items), len(values))
+    return ~result if negate else result
+
+
+# разбор условия в синтаксисе DataFrame.query: `имя с пробелами` в обратных кавычках,
+# & и | с приоритетом ниже сравнений (как and/or). Возвращает список слагаемых
+def parse_condition(condition, columns):
+    quoted = {}
+
+    def quote(match):
+        alias = f"__column_{len(quoted)}__"
+        quoted[alias] = match.group(1)
+        return alias
+    text = re.sub(r"`([^`]*)`", quote, condition.strip())
+
+    tokens = []
+    for token in tokenize.generate_tokens(io.StringIO(text).readline):
+        if token.type == tokenize.OP and token.string in ("&", "|"):
+            token = token._replace(string=" and " if token.string == "&" else " or ")
+        tokens.append((token.type, token.string))
+    text = tokenize.untokenize(tokens).strip()
+    tree = ast.parse(text, mode="eval")
+
+    # обратные кавычки заменяются настоящими названиями столбцов
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in quoted:
+            node.id = quoted[node.id]
+
+    def restore(segment):
+        for alias, name in quoted.items():
+            segment = segment.replace(alias, f"`{name}`")
+        return segment
+
+    body = tree.body
+    nodes = body.values if isinstance(body, ast.BoolOp) and isinstance(body.op, ast.And) else [body]
+    terms = []
+    for node in _flatten(nodes):
+        terms.append(Term(node, restore(ast.get_source_segment(text, node) or ast.unparse(node)), columns))
+    return terms
+
+
+def _flatten(nodes):
+    for node in nodes:
+        if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+            yield from _flatten(node.values)
+        else:
+            yield node
+
+
+# фильтр таблицы с кэшами: разобранные условия хранятся по тексту условия,
+# маски строк - по нормализованному набору слагаемых (порядок и пробелы не важны).
+# Уточнение фильтра ("Возраст > 30" -> "Возраст > 30 and Отдел == 'IT'") вычисляет
+# новое слагаемое только на строках, прошедших предыдущий фильтр
+class FilterEngine:
+    def __init__(self, max_masks=MAX_MASKS, max_compiled=MAX_COMPILED):
+        self.data = None
+        self.max_masks = max_masks
+        self.max_compiled = max_compiled
+        self._compiled = OrderedDict()   # текст условия -> слагаемые
+        self._masks = OrderedDict()      # frozenset ключей слагаемых -> логическая маска
+        self.indexes = None              # ColumnIndexes текущей таблицы
+        self.hits = 0
+        self.refinements = 0
+        self.misses = 0
+
+    # новая таблица: маски и индексы старой таблицы больше не действительны
+    def set_data(self, data):
+        if data is self.data:
+            return
+        self.data = data
+        self._masks.clear()
+        self._compiled.clear()
+        if self.indexes is not None:
+            self.indexes.cancel()
+            self.indexes = None
+
+    # построение индексов столбцов в фоновом потоке (после загрузки файла)
+    def build_indexes(self):
+        from indexes import ColumnIndexes
+        if self.indexes is None or self.indexes.data is not self.data:
+            self.indexes = ColumnIndexes(self.data).start()
+        return self.indexes
+
+    def terms(self, condition):
+        terms = self._compiled.get(condition)
+        if terms is None:
+            terms = parse_condition(condition, set(self.data.columns))
+            self._compiled[condition] = terms
+            if len(self._compiled) > self.max_compiled:
+                self._compiled.popitem(last=False)
+        else:
+            self._compiled.move_to_end(condition)
+        return terms
+
+    def mask(self, condition):
+        terms = self.terms(condition)
+        key = frozenset(term.key for term in terms)
+        mask = self._masks.get(key)
+        if mask is not None:
+            self._masks.move_to_end(key)
+            self.hits += 1
+            return mask
+
+        # самая узкая из сохранённых масок, чьи слагаемые входят в новое условие
+        base_key, base = None, None
+        for cached_key, cached in self._masks.items():
+            if cached_key < key and (base_key is None or len(cached_key) > len(base_key)):
+                base_key, base = cached_key, cached
+        remaining = [term for term in terms if base_key is None or term.key not in base_key]
+        if self.indexes is not None and len(remaining) > 1:
+            # сначала слагаемые, у которых по индексу меньше всего совпадений
+            estimates = {term.key: term.estimate(self.indexes) for term in remaining}
+            remaining.sort(key=lambda term: len(self.data) if estimates[term.key] is None else estimates[term.key])
+        if base is None:
+            self.misses += 1
+            positions = None
+            mask = None
+        else:
+            self.refinements += 1
+            positions = np.flatnonzero(base)
+
+        for term in remaining:
+            if positions is None:
+                mask = term.evaluate(self.data, indexes=self.indexes)
+                positions = np.flatnonzero(mask) if len(remaining) > 1 else None
+                self._remember(frozenset([term.key]), mask)
+            else:
+                positions = positions[term.evaluate(self.data, positions, self.indexes)]
+        if positions is not None:
+            mask = np.zeros(len(self.data), dtype=bool)
+            mask[positions] = True
+        self._remember(key, mask)
+        return mask
+
+    def _remember(self, key, mask):
+        self._masks[key] = mask
+        self._masks.move_to_end(key)
+        while len(self._masks) > self.max_masks:
+            self._masks.popitem(last=False)
+
+    def filter(self, condition):
+        mask = self.mask(condition)
+        return self.data.iloc[np.flatnonzero(mask)]
+
+
+# интерактивное уточнение фильтра: data.query на каждом шаге против FilterEngine
+def benchmark_filters(rows=5_000_000, seed=0):
+    import time
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        "ID": np.arange(rows),
+        "Отдел": pd.Categorical(np.array(["Бухгалтерия", "IT", "Продажи", "Склад", "Маркетинг", "Логистика"])[
+            rng.integers(0, 6, rows)]),
+        "Возраст": rng.integers(18, 70, rows).astype(np.int8),
+        "Стаж": rng.integers(0, 40, rows).astype(np.int8),
+        "Зарплата": rng.integers(30_000, 300_000, rows).astype(np.int32),
+        "Рейтинг": rng.random(rows).round(3),
+    })
+    steps = [
+        "Возраст > 30",
+        "Возраст > 30 and Отдел == 'IT'",
+        "Возраст > 30 and Отдел == 'IT' and Зарплата < 100000",
+        "Возраст > 30 & Отдел == 'IT' & Зарплата < 100000 & Стаж >= 10",
+        "Возраст > 30 and Отдел == 'IT'",
+        "Отдел == 'IT' and Возраст > 30 and Рейтинг > 0.5",
+        "Возраст > 30",
+    ]
+    engine = FilterEngine()
+    engine.set_data(data)
+    print(f"\nУточнение фильтра на {rows} строках (numexpr: {'есть' if numexpr is not None else 'нет'})")
+    total_query = total_engine = 0.0
+    for condition in steps:
+        start = time.perf_counter()
+        expected = data.query(condition)
+        query_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = engine.filter(condition)
+        engine_time = time.perf_counter() - start
+        total_query += query_time
+        total_engine += engine_time
+        same = result.index.equals(expected.index)
+        print(f"{condition[:60]:60s}: query {query_time * 1000:7.1f} мс, движок {engine_time * 1000:7.1f} мс, "
+              f"строк {len(result)}{'' if same else ' РАСХОЖДЕНИЕ'}")
+    print(f"всего: query {total_query:.3f} с, движок {total_engine:.3f} с; "
+          f"попаданий {engine.hits}, уточнений {engine.refinements}, промахов {engine.misses}")
+
+
+if __name__ == "__main__":
+    benchmark_filters()
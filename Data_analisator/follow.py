@@ -0,0 +1,180 @@
+# подключаем библиотеки и модули
+import io
+import os
+import numpy as np
+import pandas as pd
+
+# сколько байт новых строк разбирается за один опрос (чтобы окно не замирало на больших дописках)
+MAX_TAIL_BYTES = 16 * 2 ** 20
+MIN_CAPACITY = 1024
+
+
+# чтение строк, дописанных в конец CSV после offset (LoadTask.offset - всегда начало строки).
+# Неполная последняя строка (файл дописывается прямо сейчас) остаётся до следующего опроса
+class TailReader:
+    def __init__(self, file_path, columns, offset, max_bytes=MAX_TAIL_BYTES):
+        self.file_path = file_path
+        self.columns = list(columns)
+        self.offset = offset
+        self.max_bytes = max_bytes
+
+    # новые строки (DataFrame, возможно пустой) или None, если файл стал короче -
+    # его перезаписали, и загружать нужно заново
+    def read_new(self):
+        size = os.path.getsize(self.file_path)
+        if size < self.offset:
+            return None
+        if size == self.offset:
+            return pd.DataFrame(columns=self.columns)
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.offset)
+            tail = f.read(min(size - self.offset, self.max_bytes))
+        end = tail.rfind(b"\n")
+        if end < 0:
+            return pd.DataFrame(columns=self.columns)
+        tail = tail[:end + 1]
+        self.offset += len(tail)
+        return pd.read_csv(io.BytesIO(tail), header=None, names=self.columns)
+
+
+# столбец растущей таблицы: буфер с запасом, который удваивается при заполнении
+class _Column:
+    def __init__(self, series, capacity):
+        dtype = series.dtype
+        self.categories = None
+        if isinstance(dtype, pd.CategoricalDtype):
+            self.categories = series.cat.categories
+            values = series.cat.codes.to_numpy().astype(np.int32)
+        elif isinstance(dtype, np.dtype) and dtype.kind in "iufbM":
+            values = series.to_numpy()
+        else:
+            values = series.to_numpy(dtype=object)
+        self.buffer = np.empty(capacity, dtype=values.dtype)
+        self.buffer[:len(values)] = values
+
+    def _grow(self, size, capacity, dtype=None):
+        buffer = np.empty(capacity, dtype=dtype or self.buffer.dtype)
+        buffer[:size] = self.buffer[:size]
+        self.buffer = buffer
+
+    # новые значения; тип столбца расширяется, если они в него не помещаются
+    def append(self, size, series, capacity):
+        if self.categories is not None:
+            values = self._codes(series)
+        else:
+            values = series.to_numpy()
+            if self.buffer.dtype.kind == "M" and values.dtype.kind != "M":
+                # в хвосте даты читаются строками
+                values = pd.to_datetime(series, errors="coerce").to_numpy().astype(self.buffer.dtype)
+            target = self._target_dtype(size, values)
+            if target != self.buffer.dtype:
+                self._grow(size, len(self.buffer), target)
+        if capacity > len(self.buffer):
+            self._grow(size, capacity)
+        self.buffer[size:size + len(values)] = values
+
+    # коды категорий для новых значений; незнакомые значения становятся новыми категориями
+    def _codes(self, series):
+        values = series.astype(object)
+        codes = self.categories.get_indexer(values)
+        unknown = (codes < 0) & values.notna().to_numpy()
+        if unknown.any():
+            new = pd.unique(values[unknown])
+            self.categories = self.categories.append(pd.Index(new, dtype=object))
+            codes = self.categories.get_indexer(values)
+        return codes.astype(np.int32)
+
+    def _target_dtype(self, size, values):
+        current = self.buffer.dtype
+        if current == object or values.dtype == current:
+            return current
+        if current.kind in "iu" and values.dtype.kind in "iu" and len(values):
+            # целые столбцы уменьшены при загрузке: если новые значения помещаются, тип не меняется
+            info = np.iinfo(current)
+            if info.min <= values.min() and values.max() <= info.max:
+                return current
+        if current.kind in "iufb" and values.dtype.kind in "iufb":
+            return np.result_type(current, values.dtype)
+        return np.dtype(object)
+
+    def view(self, size):
+        if self.categories is not None:
+            return pd.Categorical.from_codes(self.buffer[:size], categories=self.categories, validate=False)
+        return self.buffer[:size]
+
+
+# таблица, к которой дописываются строки без копирования уже прочитанных: каждый столбец -
+# буфер с запасом, frame() отдаёт DataFrame поверх первых size элементов буферов
+class GrowingFrame:
+    def __init__(self, data):
+        self.size = len(data)
+        self.capacity = max(MIN_CAPACITY, 2 * self.size)
+        self.column_names = list(data.columns)
+        self._columns = [_Column(data[name], self.capacity) for name in self.column_names]
+
+    def append(self, chunk):
+        if not len(chunk):
+            return 0
+        needed = self.size + len(chunk)
+        if needed > self.capacity:
+            self.capacity = max(needed, 2 * self.capacity)
+        for name, column in zip(self.column_names, self._columns):
+            column.append(self.size, chunk[name], self.capacity)
+        self.size = needed
+        return len(chunk)
+
+    def frame(self):
+        return pd.DataFrame({name: column.view(self.size) for name, column in zip(self.column_names, self._columns)},
+                            copy=False)
+
+
+# задержка обновления при росте файла: дописка порции строк и разбор только хвоста
+# против полной перезагрузки файла
+def benchmark_follow(total_rows=4_000_000, batch_rows=10_000, checkpoints=(500_000, 1_000_000, 2_000_000, 4_000_000)):
+    import tempfile
+    import time
+    from loader import LoadTask, generate_csv
+    directory = tempfile.mkdtemp(prefix="analyzer-follow-")
+    file_path = os.path.join(directory, "growing.csv")
+    generate_csv(file_path, batch_rows)
+    task = LoadTask(file_path).start()
+    data = task.result()
+    reader = TailReader(file_path, data.columns, task.offset)
+    growing = GrowingFrame(data)
+    rng = np.random.default_rng(1)
+    print(f"\nСлежение за растущим CSV: дописка по {batch_rows} строк")
+    rows = batch_rows
+    latencies = []
+    checkpoints = list(checkpoints)
+    while rows < total_rows:
+        batch = pd.DataFrame({
+            "ID": np.arange(rows, rows + batch_rows),
+            "Отдел": rng.choice(["Бухгалтерия", "IT", "Продажи", "Склад", "Маркетинг", "Логистика", "Новый"], batch_rows),
+            "Город": rng.choice(["Москва", "Казань", "Пермь"], batch_rows),
+            "Возраст": rng.integers(18, 70, batch_rows),
+            "Стаж": rng.integers(0, 40, batch_rows),
+            "Зарплата": rng.integers(30_000, 300_000, batch_rows),
+            "Рейтинг": rng.random(batch_rows).round(3),
+        })
+        batch.to_csv(file_path, mode="a", header=False, index=False)
+        rows += batch_rows
+        start = time.perf_counter()
+        growing.append(reader.read_new())
+        frame = growing.frame()
+        latencies.append(time.perf_counter() - start)
+        if checkpoints and rows >= checkpoints[0]:
+            checkpoints.pop(0)
+            start = time.perf_counter()
+            full = LoadTask(file_path).start().result()
+            reload = time.perf_counter() - start
+            same = len(full) == len(frame) and full["Зарплата"].to_numpy().sum() == frame["Зарплата"].to_numpy().sum()
+            recent = sorted(latencies[-50:])
+            print(f"{rows:>9d} строк: обновление медиана {recent[len(recent) // 2] * 1000:.1f} мс, "
+                  f"макс. {recent[-1] * 1000:.1f} мс; полная перезагрузка {reload:.2f} с"
+                  f"{'' if same else ' РАСХОЖДЕНИЕ'}")
+    os.remove(file_path)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    benchmark_follow()
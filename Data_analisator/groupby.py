@@ -0,0 +1,229 @@
+# подключаем библиотеки и модули
+import io
+import os
+import queue
+import threading
+import time
+import multiprocessing as mp
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+import pandas as pd
+from loader import FileSlice
+from plotting import OTHER_LABEL
+
+# сколько строк файла разбирается за раз в одном процессе
+CHUNK_ROWS = 500_000
+# на сколько частей делится файл на каждый процесс (чаще обновляется индикатор)
+PARTS_PER_WORKER = 4
+
+
+# частичный агрегат порции: по каждому значению X - сумма, число, минимум и максимум Y.
+# Из таких частей можно собрать любой агрегат из engine.AGGREGATIONS
+def partial_aggregate(chunk, by, value):
+    values = pd.to_numeric(chunk[value], errors="coerce")
+    groups = values.groupby(chunk[by].to_numpy(), sort=False)
+    return pd.DataFrame({"sum": groups.sum(), "count": groups.count(), "min": groups.min(), "max": groups.max()})
+
+
+# объединение частичных агрегатов
+def combine_partials(partials):
+    partials = [part for part in partials if len(part)]
+    if not partials:
+        return pd.DataFrame(columns=["sum", "count", "min", "max"])
+    merged = pd.concat(partials)
+    groups = merged.groupby(level=0, sort=False)
+    return pd.DataFrame({"sum": groups["sum"].sum(), "count": groups["count"].sum(),
+                         "min": groups["min"].min(), "max": groups["max"].max()})
+
+
+def _values(combined, agg):
+    if agg == "mean":
+        return combined["sum"] / combined["count"].replace(0, np.nan)
+    return combined[agg]
+
+
+# итоговое значение агрегата по группам. Если задан top и групп больше, остаются top - 1
+# групп с наибольшими значениями, а остальные сворачиваются в "Другие" по своим частичным
+# агрегатам: среднее "Других" - их общая сумма на общее число, а не среднее средних
+def finalize(combined, agg, top=None):
+    result = _values(combined, agg).sort_values(ascending=False)
+    if top is None or len(result) <= top:
+        return result
+    rest = combined.loc[result.index[top - 1:]]
+    other = pd.DataFrame({"sum": [rest["sum"].sum()], "count": [rest["count"].sum()],
+                          "min": [rest["min"].min()], "max": [rest["max"].max()]}, index=[OTHER_LABEL])
+    result = pd.concat([result.iloc[:top - 1], _values(other, agg)])
+    result.index = result.index.astype(str)
+    return result
+
+
+# агрегат по таблице, уже загруженной в память (Excel или файл, прочитанный целиком)
+def aggregate_frame(data, by, value, agg, top=None):
+    return finalize(combine_partials([partial_aggregate(data, by, value)]), agg, top)
+
+
+# деление CSV на части по границам строк: [(начало, конец)] в байтах, без заголовка
+def byte_ranges(file_path, parts):
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        f.readline()
+        body = f.tell()
+        edges = [body]
+        for part in range(1, parts):
+            f.seek(max(body + (size - body) * part // parts, edges[-1]))
+            f.readline()
+            edges.append(min(f.tell(), size))
+    edges.append(size)
+    return [(start, stop) for start, stop in zip(edges, edges[1:]) if stop > start]
+
+
+# работа одного процесса: разбор своей части файла порциями и её частичный агрегат.
+# Строки с переводом строки внутри кавычек на границе частей не поддерживаются
+def _aggregate_range(file_path, start, stop, columns, by, value, chunk_rows):
+    partials = []
+    with open(file_path, "rb") as f:
+        reader = io.BufferedReader(FileSlice(f, start, stop), buffer_size=1 << 20)
+        for chunk in pd.read_csv(reader, header=None, names=columns, usecols=[by, value], chunksize=chunk_rows):
+            partials.append(partial_aggregate(chunk, by, value))
+            # части сворачиваются сразу, чтобы память зависела от числа групп, а не от размера файла
+            if len(partials) > 8:
+                partials = [combine_partials(partials)]
+    return combine_partials(partials)
+
+
+# процессы не форкаются из процесса окна: fork копирует потоки Tk, загрузки и индексов
+# вместе с их захваченными блокировками, и дочерний процесс может зависнуть. Через forkserver
+# процессы порождаются от чистого сервера, иначе - spawn (окно в main.py под __main__ не импортируется)
+def _pool_context():
+    methods = mp.get_all_start_methods()
+    return mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+# потоковый group-by по CSV, который не помещается в память. События, как у LoadTask:
+#   ("progress", доля), ("done", Series значений по группам), ("cancelled", None), ("error", исключение)
+# top - сколько групп оставить (остальные сворачиваются в "Другие", см. finalize)
+class GroupByTask:
+    def __init__(self, file_path, by, value, agg="sum", workers=None, chunk_rows=CHUNK_ROWS, top=None):
+        self.file_path = file_path
+        self.by = by
+        self.value = value
+        self.agg = agg
+        self.top = top
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_rows = chunk_rows
+        self.events = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        try:
+            columns = pd.read_csv(self.file_path, nrows=0).columns.tolist()
+            for column in (self.by, self.value):
+                if column not in columns:
+                    raise KeyError(f"В файле нет столбца {column}")
+            ranges = byte_ranges(self.file_path, self.workers * PARTS_PER_WORKER)
+            total = sum(stop - start for start, stop in ranges) or 1
+            done = 0
+            partials = []
+            pool = ProcessPoolExecutor(self.workers, mp_context=_pool_context())
+            try:
+                futures = {pool.submit(_aggregate_range, self.file_path, start, stop, columns,
+                                       self.by, self.value, self.chunk_rows): stop - start
+                           for start, stop in ranges}
+                pending = set(futures)
+                # отмена проверяется и пока части ещё считаются, а не только между ними
+                while pending:
+                    if self._cancel.is_set():
+                        self.events.put(("cancelled", None))
+                        return
+                    finished, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        partials.append(future.result())
+                        done += futures[future]
+                        self.events.put(("progress", done / total))
+            finally:
+                # при отмене или ошибке не ждём уже запущенные части: ещё не начатые снимаются
+                pool.shutdown(wait=False, cancel_futures=True)
+            self.events.put(("done", finalize(combine_partials(partials), self.agg, self.top)))
+        except Exception as e:
+            self.events.put(("error", e))
+
+    def result(self):
+        self._thread.join()
+        last = None
+        while not self.events.empty():
+            last = self.events.get()
+        if last is None or last[0] == "cancelled":
+            return None
+        if last[0] == "error":
+            raise last[1]
+        return last[1]
+
+
+# замер в процессе с ограниченным адресным пространством: файл в несколько раз больше доступной памяти
+def _limited(limit_mb, function, args, results):
+    import resource
+    from loader import peak_memory_mb
+    resource.setrlimit(resource.RLIMIT_AS, (limit_mb * 2 ** 20, limit_mb * 2 ** 20))
+    start = time.perf_counter()
+    try:
+        result = function(*args)
+        status = "ok"
+    except Exception as e:
+        result, status = None, type(e).__name__
+    # пик по самому процессу и по рабочим процессам пула
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    results.put((status, time.perf_counter() - start, max(peak_memory_mb(), children), result))
+
+
+def _read_whole(file_path, by, value):
+    return aggregate_frame(pd.read_csv(file_path), by, value, "sum")
+
+
+def _stream(file_path, by, value, workers):
+    return GroupByTask(file_path, by, value, "sum", workers=workers).start().result()
+
+
+def benchmark_groupby(rows=60_000_000, limit_mb=1024, workers=None):
+    import tempfile
+    from loader import generate_csv
+    os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+    directory = tempfile.mkdtemp(prefix="analyzer-groupby-")
+    file_path = os.path.join(directory, "huge.csv")
+    generate_csv(file_path, rows)
+    size_mb = os.path.getsize(file_path) / 2 ** 20
+    workers = workers or os.cpu_count() or 1
+    print(f"\nGroup-by 'Отдел' -> сумма 'Зарплата': {rows} строк, файл {size_mb:.0f} МБ, "
+          f"память процесса ограничена {limit_mb} МБ (x{size_mb / limit_mb:.1f})")
+    context = mp.get_context("fork")
+    expected = None
+    for label, function, args in (("pd.read_csv целиком", _read_whole, (file_path, "Отдел", "Зарплата")),
+                                  (f"GroupByTask, {workers} проц.", _stream, (file_path, "Отдел", "Зарплата", workers))):
+        results = context.Queue()
+        process = context.Process(target=_limited, args=(limit_mb, function, args, results))
+        process.start()
+        status, elapsed, peak, result = results.get()
+        process.join()
+        if status != "ok":
+            print(f"{label:26s}: {status} через {elapsed:.1f} с")
+            continue
+        expected = result if expected is None else expected
+        same = result.sort_index().equals(expected.sort_index())
+        print(f"{label:26s}: {elapsed:.1f} с, {rows / elapsed / 1e6:.2f} млн строк/с, "
+              f"пиковая память {peak:.0f} МБ, групп {len(result)}{'' if same else ' РАСХОЖДЕНИЕ'}")
+    os.remove(file_path)
+    os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    benchmark_groupby()
@@ -0,0 +1,218 @@
+# подключаем библиотеки и модули
+import math
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+
+# номера строк занимают 4 байта, если таблица меньше 2^31 строк
+def _position_dtype(size):
+    return np.int32 if size < 2 ** 31 else np.int64
+
+
+# индекс числового столбца: значения в отсортированном порядке и номера их строк.
+# Равенство и диапазон - два двоичных поиска и срез номеров строк
+class SortedIndex:
+    kind = "sorted"
+
+    def __init__(self, values):
+        self.order = np.argsort(values, kind="stable").astype(_position_dtype(len(values)))
+        self.values = values[self.order]
+        self.integer = values.dtype.kind in "iu"
+        # NaN при сортировке попадают в конец и ни одному условию не удовлетворяют
+        self.valid = len(values) if self.integer else int(np.searchsorted(self.values, np.nan, side="left"))
+
+    @property
+    def nbytes(self):
+        return self.order.nbytes + self.values.nbytes
+
+    # границы среза отсортированных значений для lo (<|<=) x (<|<=) hi; None - нет границы
+    def _bounds(self, low, low_inclusive, high, high_inclusive):
+        start, stop = 0, self.valid
+        if (low is not None and low != low) or (high is not None and high != high):
+            return 0, 0  # сравнение с NaN всегда ложно
+        if self.integer:
+            # для целых строгие границы и дробные константы сводятся к нестрогим целым,
+            # а константы вне диапазона типа (столбцы уменьшены до int8/int16) - к его краям
+            info = np.iinfo(self.values.dtype)
+            if low is not None:
+                low = math.ceil(low) if low_inclusive else math.floor(low) + 1
+                if low > info.max:
+                    return 0, 0
+                # ключ приводится к типу столбца, иначе NumPy расширил бы весь массив
+                start = int(np.searchsorted(self.values, self.values.dtype.type(max(low, info.min)), side="left"))
+            if high is not None:
+                high = math.floor(high) if high_inclusive else math.ceil(high) - 1
+                if high < info.min:
+                    return 0, 0
+                stop = int(np.searchsorted(self.values, self.values.dtype.type(min(high, info.max)), side="right"))
+        else:
+            if low is not None:
+                start = int(np.searchsorted(self.values, low, side="left" if low_inclusive else "right"))
+            if high is not None:
+                stop = min(stop, int(np.searchsorted(self.values, high, side="right" if high_inclusive else "left")))
+        return start, max(start, stop)
+
+    def range(self, low=None, low_inclusive=True, high=None, high_inclusive=True):
+        start, stop = self._bounds(low, low_inclusive, high, high_inclusive)
+        return self.order[start:stop]
+
+    def count_range(self, low=None, low_inclusive=True, high=None, high_inclusive=True):
+        start, stop = self._bounds(low, low_inclusive, high, high_inclusive)
+        return stop - start
+
+    def isin(self, items):
+        parts = [self.range(item, True, item, True) for item in items]
+        return np.concatenate(parts) if parts else self.order[:0]
+
+    def count_isin(self, items):
+        return sum(self.count_range(item, True, item, True) for item in items)
+
+
+# инвертированный индекс категориального столбца: для каждой категории - номера её строк
+# (номера строк, отсортированные по коду категории, и смещения начала каждой категории)
+class CategoryIndex:
+    kind = "inverted"
+
+    def __init__(self, values):
+        codes = values.cat.codes.to_numpy()
+        self.categories = values.cat.categories
+        self.order = np.argsort(codes, kind="stable").astype(_position_dtype(len(codes)))
+        # код -1 (пропуск) оказывается первым, поэтому смещения считаются от кода + 1
+        counts = np.bincount(codes.astype(np.int64) + 1, minlength=len(self.categories) + 1)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    @property
+    def nbytes(self):
+        return self.order.nbytes + self.offsets.nbytes
+
+    def _codes(self, items):
+        try:
+            codes = self.categories.get_indexer(pd.Index(items))
+        except (TypeError, ValueError):
+            return []
+        return sorted({int(code) for code in codes if code >= 0})
+
+    def isin(self, items):
+        parts = [self.order[self.offsets[code + 1]:self.offsets[code + 2]] for code in self._codes(items)]
+        return np.concatenate(parts) if parts else self.order[:0]
+
+    def count_isin(self, items):
+        return sum(int(self.offsets[code + 2] - self.offsets[code + 1]) for code in self._codes(items))
+
+
+# индексы всех подходящих столбцов таблицы. Строятся в фоновом потоке по одному столбцу;
+# пока индекс столбца не готов, фильтр по нему работает полным просмотром
+class ColumnIndexes:
+    def __init__(self, data):
+        self.data = data
+        self.indexes = {}
+        self.timings = {}
+        self.build_time = 0.0
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self.build, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def wait(self):
+        if self._thread.is_alive():
+            self._thread.join()
+        return self
+
+    def build(self):
+        started = time.perf_counter()
+        for column in self.data.columns:
+            if self._cancel.is_set():
+                return
+            start = time.perf_counter()
+            index = make_index(self.data[column])
+            if index is not None:
+                self.indexes[column] = index
+                self.timings[column] = time.perf_counter() - start
+        self.build_time = time.perf_counter() - started
+
+    def get(self, column):
+        return self.indexes.get(column)
+
+    @property
+    def nbytes(self):
+        return sum(index.nbytes for index in list(self.indexes.values()))
+
+    def summary(self):
+        return f"Индексы: {len(self.indexes)} столбцов, {self.nbytes / 2 ** 20:.1f} МБ, {self.build_time:.2f} с"
+
+
+# индекс для столбца или None, если столбец не индексируется (строки без категорий, даты, bool)
+def make_index(series):
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return CategoryIndex(series)
+    if isinstance(dtype, np.dtype) and dtype.kind in "iuf":
+        return SortedIndex(series.to_numpy())
+    return None
+
+
+# время построения, память и ускорение запросов по индексам
+def benchmark_indexes(rows=5_000_000, seed=0):
+    from filters import FilterEngine
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        "ID": np.arange(rows),
+        "Отдел": pd.Categorical(np.array(["Бухгалтерия", "IT", "Продажи", "Склад", "Маркетинг", "Логистика"])[
+            rng.integers(0, 6, rows)]),
+        "Город": pd.Categorical(np.array([f"Город {i}" for i in range(1000)])[rng.integers(0, 1000, rows)]),
+        "Возраст": rng.integers(18, 70, rows).astype(np.int8),
+        "Зарплата": rng.integers(30_000, 300_000, rows).astype(np.int32),
+        "Рейтинг": rng.random(rows).round(3),
+    })
+    indexes = ColumnIndexes(data).start().wait()
+    print(f"\nИндексы столбцов, {rows} строк (таблица {data.memory_usage(deep=True).sum() / 2 ** 20:.0f} МБ)")
+    for column, index in indexes.indexes.items():
+        print(f"{column:10s}: {index.kind:9s} построение {indexes.timings[column]:.2f} с, "
+              f"память {index.nbytes / 2 ** 20:.1f} МБ")
+    print(indexes.summary())
+
+    queries = [
+        "ID == 123456",
+        "ID >= 1000000 and ID < 1000100",
+        "1000000 <= ID < 1000100",
+        "Город == 'Город 17'",
+        "Город in ['Город 1', 'Город 2', 'Город 3']",
+        "Зарплата > 299000",
+        "100000 <= Зарплата <= 100050",
+        "Рейтинг > 0.999",
+        "Отдел == 'IT' and Зарплата < 31000",
+        "Возраст > 30",
+    ]
+    plain = FilterEngine(max_masks=0)
+    plain.set_data(data)
+    indexed = FilterEngine(max_masks=0)
+    indexed.set_data(data)
+    indexed.indexes = indexes
+    for condition in queries:
+        timings = []
+        for engine in (plain, indexed):
+            best = float("inf")
+            for _ in range(5):
+                start = time.perf_counter()
+                mask = engine.mask(condition)
+                best = min(best, time.perf_counter() - start)
+            timings.append(best)
+            if engine is plain:
+                expected = mask
+        same = np.array_equal(mask, expected)
+        print(f"{condition:45s}: просмотр {timings[0] * 1000:7.2f} мс, индекс {timings[1] * 1000:7.2f} мс, "
+              f"x{timings[0] / timings[1]:.1f}, строк {int(mask.sum())}{'' if same else ' РАСХОЖДЕНИЕ'}")
+
+
+if __name__ == "__main__":
+    benchmark_indexes()
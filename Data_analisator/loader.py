@@ -0,0 +1,340 @@
+# подключаем библиотеки и модули
+import io
+import os
+import queue
+import threading
+import time
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# сколько строк читается за одну порцию
+CHUNK_ROWS = 200_000
+# строковый столбец переводится в категории, если уникальных значений не больше этой доли
+CATEGORY_RATIO = 0.5
+
+
+# чтение только части файла [start, stop) как отдельного файла
+class FileSlice(io.RawIOBase):
+    def __init__(self, f, start, stop):
+        self._file = f
+        self._file.seek(start)
+        self._left = stop - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._left)
+        if size <= 0:
+            return 0
+        read = self._file.readinto(memoryview(buffer)[:size])
+        self._left -= read
+        return read
+
+
+# чтение файла порциями; вместе с каждой порцией возвращается доля прочитанного (0..1).
+# CSV читается до байта stop (по умолчанию - до конца), строки, дописанные позже, не попадают
+def read_chunks(file_path, chunk_rows=CHUNK_ROWS, stop=None):
+    if file_path.endswith('.csv'):
+        total = max(stop if stop is not None else os.path.getsize(file_path), 1)
+        with open(file_path, 'rb') as f:
+            source = f if stop is None else io.BufferedReader(FileSlice(f, 0, stop), buffer_size=1 << 20)
+            for chunk in pd.read_csv(source, chunksize=chunk_rows):
+                yield chunk, min(f.tell() / total, 1.0)
+    else:
+        yield from _read_excel_chunks(file_path, chunk_rows)
+
+
+# конец последней полной строки CSV до байта size (0, если перевода строки нет):
+# строка, которую как раз дописывают, не должна попасть в таблицу обрезанной
+def complete_lines_end(file_path, size, block=1 << 16):
+    with open(file_path, 'rb') as f:
+        end = size
+        while end > 0:
+            start = max(end - block, 0)
+            f.seek(start)
+            position = f.read(end - start).rfind(b"\n")
+            if position >= 0:
+                return start + position + 1
+            end = start
+    return 0
+
+
+# у read_excel нет чтения порциями, поэтому строки листа читаются через openpyxl в режиме read_only
+def _read_excel_chunks(file_path, chunk_rows):
+    if file_path.endswith('.xls'):
+        yield pd.read_excel(file_path), 1.0
+        return
+    from openpyxl import load_workbook
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        total = max((sheet.max_row or 1) - 1, 1)
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        # пустые столбцы справа от заголовка отбрасываются, как в read_excel
+        width = max((i + 1 for i, name in enumerate(header) if name is not None), default=0)
+        columns = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header[:width])]
+        buffer = []
+        done = 0
+        for row in rows:
+            done += 1
+            # пустые строки пропускаются, как это делает read_excel
+            if all(value is None for value in row):
+                continue
+            buffer.append(row[:width])
+            if len(buffer) >= chunk_rows:
+                yield _excel_frame(buffer, columns), min(done / total, 1.0)
+                buffer = []
+        if buffer:
+            yield _excel_frame(buffer, columns), 1.0
+    finally:
+        workbook.close()
+
+
+# порция строк листа в DataFrame; пустые строки ячеек считаются пропусками, как в read_excel
+def _excel_frame(rows, columns):
+    chunk = pd.DataFrame(rows, columns=columns)
+    for column in chunk.columns:
+        if chunk[column].dtype == object or pd.api.types.is_string_dtype(chunk[column].dtype):
+            chunk[column] = chunk[column].mask(chunk[column] == '')
+    return chunk.infer_objects()
+
+
+# план уменьшения типов по первой порции: какие строковые столбцы перевести в категории
+def plan_downcast(chunk):
+    categories = []
+    for column in chunk.columns:
+        values = chunk[column]
+        if values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            if values.nunique(dropna=True) <= max(len(values) * CATEGORY_RATIO, 1):
+                categories.append(column)
+    return categories
+
+
+# уменьшение типов одной порции: целые - до минимального подходящего типа, строки - в категории
+def downcast(chunk, categories):
+    for column in chunk.columns:
+        values = chunk[column]
+        if column in categories:
+            chunk[column] = values.astype('category')
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            chunk[column] = pd.to_numeric(values, downcast='integer')
+    return chunk
+
+
+# склейка порций: категориальные столбцы объединяются через union_categoricals,
+# иначе pandas превратил бы их обратно в object
+def combine(chunks, categories):
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    merged = {}
+    for column in chunks[0].columns:
+        parts = [chunk[column] for chunk in chunks]
+        if column in categories and all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            try:
+                merged[column] = pd.Series(union_categoricals(parts, ignore_order=True))
+            except TypeError:
+                # в разных порциях категории получили разные типы (например, пустая порция)
+                merged[column] = pd.concat([part.astype(object) for part in parts],
+                                           ignore_index=True).astype('category')
+        else:
+            # порция, где столбец целиком пустой, приводится к типу остальных порций,
+            # иначе склейка дала бы object
+            filled = [part for part in parts if part.notna().any()]
+            if filled:
+                target = filled[0].dtype
+                parts = [part if part.notna().any() else part.astype(target) for part in parts]
+            merged[column] = pd.concat(parts, ignore_index=True)
+            if pd.api.types.is_integer_dtype(merged[column].dtype):
+                merged[column] = pd.to_numeric(merged[column], downcast='integer')
+    return pd.DataFrame(merged)
+
+
+# фоновая загрузка файла. Tk нельзя трогать из другого потока, поэтому рабочий поток
+# только кладёт события в очередь, а окно забирает их через root.after:
+#   ("first_rows", DataFrame) - первая прочитанная порция
+#   ("progress", доля)        - доля прочитанного файла
+#   ("done", DataFrame)       - весь файл
+#   ("cancelled", None), ("error", исключение)
+# После загрузки CSV offset - сколько байт файла прочитано (всегда граница строки,
+# с этого места продолжает слежение)
+class LoadTask:
+    def __init__(self, file_path, chunk_rows=CHUNK_ROWS, reduce_types=True, cache=None):
+        self.file_path = file_path
+        self.chunk_rows = chunk_rows
+        self.reduce_types = reduce_types
+        self.cache = cache
+        self.offset = None
+        self.events = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        try:
+            # размер фиксируется до чтения: строки, дописанные во время загрузки, дочитает слежение
+            stat = os.stat(self.file_path)
+            size = stat.st_size
+            source = None
+            # файл, который уже открывали и который не изменился, берётся из кэша
+            if self.cache is not None:
+                source = self.cache.signature(self.file_path, stat)
+                loaded = self.cache.load_entry(self.file_path, source)
+                if loaded is not None:
+                    data, self.offset = loaded
+                    self.events.put(("progress", 1.0))
+                    self.events.put(("done", data))
+                    return
+            chunks = []
+            categories = []
+            stop = None
+            if self.file_path.endswith('.csv'):
+                stop = complete_lines_end(self.file_path, size) or size
+            for chunk, progress in read_chunks(self.file_path, self.chunk_rows, stop):
+                if self._cancel.is_set():
+                    self.events.put(("cancelled", None))
+                    return
+                if self.reduce_types:
+                    if not chunks:
+                        categories = plan_downcast(chunk)
+                    chunk = downcast(chunk, categories)
+                chunks.append(chunk)
+                if len(chunks) == 1:
+                    self.events.put(("first_rows", chunk))
+                self.events.put(("progress", progress))
+            if stop is not None and stop < size and chunks and self._unchanged(stat):
+                # за время загрузки файл не менялся: строка без перевода строки - последняя строка файла
+                chunks.append(self._last_line(stop, size, chunks[0].columns, categories))
+                stop = size
+            data = combine(chunks, categories)
+            self.offset = stop
+            if self._cancel.is_set():
+                self.events.put(("cancelled", None))
+                return
+            self.events.put(("done", data))
+            if self.cache is not None:
+                try:
+                    self.cache.store(self.file_path, data, source, self.offset)
+                except Exception:
+                    pass  # "done" уже отправлено; без кэша приложение работает как раньше
+        except Exception as e:
+            self.events.put(("error", e))
+
+    def _unchanged(self, stat):
+        current = os.stat(self.file_path)
+        return current.st_size == stat.st_size and current.st_mtime_ns == stat.st_mtime_ns
+
+    def _last_line(self, start, stop, columns, categories):
+        with open(self.file_path, 'rb') as f:
+            f.seek(start)
+            chunk = pd.read_csv(io.BytesIO(f.read(stop - start)), header=None, names=columns)
+        return downcast(chunk, categories) if self.reduce_types else chunk
+
+    # синхронное ожидание результата (для скриптов и замеров)
+    def result(self):
+        self._thread.join()
+        last = None
+        while not self.events.empty():
+            last = self.events.get()
+        if last is None or last[0] == "cancelled":
+            return None
+        if last[0] == "error":
+            raise last[1]
+        return last[1]
+
+
+# генерация большого CSV для замеров
+def generate_csv(file_path, rows, chunk_rows=500_000, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    departments = np.array(["Бухгалтерия", "IT", "Продажи", "Склад", "Маркетинг", "Логистика"])
+    cities = np.array(["Москва", "Казань", "Пермь", "Омск", "Томск", "Самара", "Тверь"])
+    header = True
+    for start in range(0, rows, chunk_rows):
+        size = min(chunk_rows, rows - start)
+        chunk = pd.DataFrame({
+            "ID": np.arange(start, start + size),
+            "Отдел": departments[rng.integers(0, len(departments), size)],
+            "Город": cities[rng.integers(0, len(cities), size)],
+            "Возраст": rng.integers(18, 70, size),
+            "Стаж": rng.integers(0, 40, size),
+            "Зарплата": rng.integers(30_000, 300_000, size),
+            "Рейтинг": rng.random(size).round(3),
+        })
+        chunk.to_csv(file_path, mode="w" if header else "a", header=header, index=False)
+        header = False
+
+
+# пиковая память процесса в МБ (VmHWM, в отличие от ru_maxrss, сбрасывается при exec)
+def peak_memory_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# замер в отдельном процессе, чтобы пиковая память одного способа не влияла на другой
+def _measure(file_path, chunked, results):
+    start = time.perf_counter()
+    first_rows = None
+    if chunked:
+        task = LoadTask(file_path).start()
+        while True:
+            kind, value = task.events.get()
+            if kind == "first_rows" and first_rows is None:
+                first_rows = time.perf_counter() - start
+            if kind in ("done", "error", "cancelled"):
+                data = value
+                break
+    else:
+        data = pd.read_csv(file_path)
+        first_rows = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    results.put((first_rows, elapsed, peak_memory_mb(),
+                 data.memory_usage(deep=True).sum() / 2 ** 20))
+
+
+def benchmark_loading(rows=5_000_000):
+    import multiprocessing as mp
+    import tempfile
+    file_path = os.path.join(tempfile.mkdtemp(prefix="analyzer-"), "large.csv")
+    generate_csv(file_path, rows)
+    print(f"\nЗагрузка CSV: {rows} строк, {os.path.getsize(file_path) / 2 ** 20:.0f} МБ")
+    context = mp.get_context("spawn")
+    for chunked, label in ((False, "pd.read_csv целиком"), (True, "LoadTask порциями")):
+        results = context.Queue()
+        process = context.Process(target=_measure, args=(file_path, chunked, results))
+        process.start()
+        first_rows, elapsed, peak, frame = results.get()
+        process.join()
+        print(f"{label:20s}: первые строки через {first_rows:.2f} с, всего {elapsed:.2f} с, "
+              f"пиковая память {peak:.0f} МБ, таблица {frame:.0f} МБ")
+    os.remove(file_path)
+    os.rmdir(os.path.dirname(file_path))
+
+
+if __name__ == "__main__":
+    benchmark_loading()
@@ -1,20 +1,33 @@
+# загрузка, фильтр и сводки - в engine.py (общие с cli.py); здесь только окно.
+# Модули окна (customtkinter, matplotlib, pandas) импортируются при запуске main.py
 from tkinter import filedialog, messagebox
-import customtkinter as ctk
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
-# настройка внешнего вида
-ctk.set_appearance_mode("dark")
-ctk.set_default_color_theme("blue")
+import engine
 
 data = None
-current_plot = None
-
-
-# функция для загрузки файла
+load_task = None
+groupby_task = None
+current_file = None
+loaded_offset = None
+# условие фильтра, показанного в таблице (None - показана вся таблица)
+current_filter = None
+follow_reader = None
+growing_frame = None
+last_plot = None
+# как часто проверять, не дописан ли файл
+FOLLOW_INTERVAL_MS = 1000
+file_cache = None
+filter_engine = None
+
+
+# функция для загрузки файла: чтение идёт порциями в фоновом потоке,
+# окно при этом не зависает, а загрузку можно отменить
 def load_file():
-    global data
+    global load_task, current_file, loaded_offset
+    stop_following()
+    if load_task is not None and load_task.is_alive():
+        messagebox.showwarning("Ошибка", "Файл уже загружается")
+        return 0
+
     file_path = filedialog.askopenfilename(
         filetypes=[("Excel/CSV", "*.xlsx *.xls *.csv")],
         title="Выберите файл данных"
@@ -22,26 +35,103 @@ def load_file():
     if not file_path:
         return 0
 
-    try:
-        if file_path.endswith('.csv'):
-            data = pd.read_csv(file_path)
-        else:
-            data = pd.read_excel(file_path)
+    # смещение прошлого файла к новому не относится: слежение доступно только после "done"
+    current_file = file_path
+    loaded_offset = None
+    load_task = engine.start_load(file_path, cache=file_cache)
+    show_progress()
+    root.after(100, poll_load_task)
 
-        update_table()
-        update_comboboxes()
 
-    except Exception as e:
-        messagebox.showerror("Ошибка", f"Не удалось загрузить файл:\n{e}")
+# отмена загрузки и сводки (кнопка одна на обе фоновые задачи)
+def cancel_tasks():
+    for task in (load_task, groupby_task):
+        if task is not None:
+            task.cancel()
+
+
+# индикатор и кнопка отмены видны, пока идёт хотя бы одна фоновая задача
+def show_progress():
+    progress_bar.set(0)
+    progress_bar.pack(pady=5, after=button_load)
+    button_cancel.pack(pady=5, after=progress_bar)
+
+
+def hide_progress():
+    if load_task is None and groupby_task is None:
+        progress_bar.pack_forget()
+        button_cancel.pack_forget()
+
+
+# обработка событий фоновой загрузки (вызывается из цикла Tk)
+def poll_load_task():
+    global data, loaded_offset
+    task = load_task
+    if task is None:
+        return 0
+
+    while not task.events.empty():
+        kind, value = task.events.get()
+        if kind == "first_rows":
+            # первые строки показываем сразу, не дожидаясь конца файла
+            data = value
+            update_table()
+            update_comboboxes()
+        elif kind == "progress":
+            progress_bar.set(value)
+        elif kind == "done":
+            data = value
+            loaded_offset = task.offset
+            update_table()
+            update_comboboxes()
+            finish_loading()
+            # индексы столбцов для фильтра строятся в фоне, пока пользователь смотрит таблицу
+            filter_engine.build_indexes()
+            label_indexes.configure(text="Индексы: построение...")
+            root.after(200, poll_indexes)
+            return 0
+        elif kind == "cancelled":
+            loaded_offset = None
+            finish_loading()
+            messagebox.showinfo("Загрузка", "Загрузка файла отменена")
+            return 0
+        elif kind == "error":
+            loaded_offset = None
+            finish_loading()
+            messagebox.showerror("Ошибка", f"Не удалось загрузить файл:\n{value}")
+            return 0
+
+    root.after(100, poll_load_task)
+
+
+def finish_loading():
+    global load_task
+    load_task = None
+    hide_progress()
+
+
+# отчёт о построенных индексах (время и память)
+def poll_indexes():
+    indexes = filter_engine.indexes
+    if indexes is None:
+        label_indexes.configure(text="")
+        return 0
+    if indexes.is_alive():
+        root.after(200, poll_indexes)
+        return 0
+    label_indexes.configure(text=indexes.summary())
 
 
 # обновление таблицы с данными
 def update_table():
+    global current_filter
     if data is None:
         return 0
 
-    text_table.delete(1.0, 'end')
-    text_table.insert('end', data.to_string(index=False))
+    current_filter = None
+    # таблица форматирует только видимые строки, поэтому размер данных не важен
+    table_view.set_data(data)
+    filter_engine.set_data(data)
 
 
 # обновление выпадающих списков
@@ -61,7 +151,7 @@ def update_comboboxes():
 
 # построение графика
 def plot_data():
-    global current_plot
+    global last_plot
     if data is None:
         messagebox.showwarning("Ошибка", "Данные не загружены!")
         return 0
@@ -74,41 +164,133 @@ def plot_data():
         messagebox.showwarning("Ошибка", "Выберите столбцы для графика!")
         return 0
 
-    for widget in plot_frame.winfo_children():
-        widget.destroy()
-
-    fig, ax = plt.subplots(figsize=(8, 4))
+    aggregation = aggregation_var.get()
+    if aggregation in engine.AGGREGATIONS:
+        agg = engine.AGGREGATIONS[aggregation]
+        try:
+            engine.check_chart(chart_type, agg)
+        except ValueError as e:
+            messagebox.showwarning("Ошибка", str(e))
+            return 0
+        plot_aggregate(x_col, y_col, chart_type, agg)
+        last_plot = None
+        return 0
 
     try:
-        if chart_type == "Столбчатая":
-            ax.bar(data[x_col], data[y_col])
-            ax.set_xlabel(x_col)
-            ax.set_ylabel(y_col)
-            ax.set_title("Столбчатая диаграмма")
-        elif chart_type == "Линейная":
-            ax.plot(data[x_col], data[y_col], marker='o')
-            ax.set_xlabel(x_col)
-            ax.set_ylabel(y_col)
-            ax.set_title("Линейный график")
-        elif chart_type == "Круговая":
-            ax.pie(data[y_col], labels=data[x_col], autopct='%1.1f%%')
-            ax.set_title("Круговая диаграмма")
-        plt.xticks(rotation=90)
-
-        plt.tight_layout()
-
-        canvas = FigureCanvasTkAgg(fig, master=plot_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-
-        current_plot = canvas
+        # фигура и холст создаются один раз; здесь меняются только данные графика,
+        # а число точек перед отрисовкой сокращается (прореживание линии, top-N категорий)
+        plot_surface.update(data, x_col, y_col, chart_type)
+        last_plot = (x_col, y_col, chart_type)
 
     except Exception as e:
         messagebox.showerror("Ошибка", f"Не удалось построить график:\n{e}")
 
 
+# сводка Y по группам X. CSV читается заново порциями в нескольких процессах,
+# поэтому файл может быть больше памяти (достаточно загрузить первые строки и отменить загрузку)
+def plot_aggregate(x_col, y_col, chart_type, agg):
+    global groupby_task
+    if groupby_task is not None and groupby_task.is_alive():
+        messagebox.showwarning("Ошибка", "Сводка уже считается")
+        return 0
+
+    if current_file is None or not current_file.endswith('.csv'):
+        try:
+            plot_surface.update(engine.summary(data, x_col, y_col, agg), x_col, y_col, chart_type)
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось построить сводку:\n{e}")
+        return 0
+
+    groupby_task = engine.start_summary(current_file, x_col, y_col, agg)
+    show_progress()
+    root.after(100, poll_groupby_task, x_col, y_col, chart_type)
+
+
+def poll_groupby_task(x_col, y_col, chart_type):
+    global groupby_task
+    task = groupby_task
+    while not task.events.empty():
+        kind, value = task.events.get()
+        if kind == "progress":
+            progress_bar.set(value)
+        elif kind in ("done", "error", "cancelled"):
+            groupby_task = None
+            hide_progress()
+            if kind == "done":
+                plot_surface.update(engine.summary_frame(value, x_col, y_col), x_col, y_col, chart_type)
+            elif kind == "error":
+                messagebox.showerror("Ошибка", f"Не удалось построить сводку:\n{value}")
+            else:
+                messagebox.showinfo("Сводка", "Построение сводки отменено")
+            return 0
+
+    root.after(100, poll_groupby_task, x_col, y_col, chart_type)
+
+
+# слежение за CSV, который дописывается: разбирается только хвост файла после
+# уже прочитанного байта, строки дописываются в таблицу без копирования старых
+def toggle_follow():
+    global follow_reader, growing_frame
+    if not follow_var.get():
+        stop_following()
+        return 0
+
+    if data is None or loaded_offset is None or current_file is None or not current_file.endswith('.csv'):
+        messagebox.showwarning("Ошибка", "Слежение доступно для полностью загруженного CSV-файла")
+        follow_var.set(False)
+        return 0
+
+    follow_reader = TailReader(current_file, data.columns, loaded_offset)
+    growing_frame = GrowingFrame(data)
+    root.after(FOLLOW_INTERVAL_MS, poll_follow)
+
+
+def stop_following():
+    global follow_reader, growing_frame
+    follow_reader = None
+    growing_frame = None
+    if follow_var.get():
+        follow_var.set(False)
+
+
+def poll_follow():
+    global data
+    if follow_reader is None:
+        return 0
+
+    try:
+        chunk = follow_reader.read_new()
+    except Exception as e:
+        stop_following()
+        messagebox.showerror("Ошибка", f"Не удалось прочитать новые строки:\n{e}")
+        return 0
+    if chunk is None:
+        stop_following()
+        messagebox.showinfo("Слежение", "Файл был перезаписан, загрузите его заново")
+        return 0
+
+    if growing_frame.append(chunk):
+        data = growing_frame.frame()
+        filter_engine.set_data(data)
+        # если таблица отфильтрована, новые строки проходят тот же фильтр
+        shown = data
+        if current_filter is not None:
+            try:
+                shown = engine.apply_filter(data, current_filter, filter_engine)
+            except Exception as e:
+                stop_following()
+                messagebox.showerror("Ошибка", f"Не удалось отфильтровать новые строки:\n{e}")
+                return 0
+        table_view.append_rows(shown)
+        # график обновляется, только если он был построен по данным таблицы
+        if last_plot is not None:
+            plot_surface.update(data, *last_plot)
+    root.after(FOLLOW_INTERVAL_MS, poll_follow)
+
+
 # фильтрация данных
 def filter_data():
+    global current_filter
     if data is None:
         messagebox.showwarning("Ошибка", "Данные не загружены!")
         return 0
@@ -120,64 +302,109 @@ def filter_data():
         return 0
 
     try:
-        filtered_data = data.query(condition)
-        text_table.delete('0.0', 'end')
-        text_table.insert('end', filtered_data.to_string(index=False))
+        # условие разбирается один раз, а уточнение прошлого фильтра
+        # проверяется только на уже отобранных строках
+        filtered_data = engine.apply_filter(data, condition, filter_engine)
+        table_view.set_data(filtered_data)
+        current_filter = condition
     except Exception as e:
         messagebox.showerror("Ошибка", f"Неверное условие фильтрации:\n{e}")
 
 
-# Создание главного окна
-root = ctk.CTk()
-root.title("Визуализатор данных Excel/CSV")
-root.geometry("1200x900")
-root.protocol("WM_DELETE_WINDOW", lambda: root.quit())
+# закрытие окна: фигура графика освобождается вместе с холстом
+def close_window():
+    plot_surface.close()
+    root.quit()
+
+
+# окно создаётся только при запуске main.py; загрузка, фильтр и графики без окна - в engine.py и cli.py
+if __name__ == "__main__":
+    import customtkinter as ctk
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from table_view import VirtualTable
+    from file_cache import FileCache
+    from plotting import PlotSurface
+    from filters import FilterEngine
+    from follow import GrowingFrame, TailReader
+
+    file_cache = FileCache()
+    filter_engine = FilterEngine()
+
+    # настройка внешнего вида
+    ctk.set_appearance_mode("dark")
+    ctk.set_default_color_theme("blue")
+
+    # Создание главного окна
+    root = ctk.CTk()
+    root.title("Визуализатор данных Excel/CSV")
+    root.geometry("1200x900")
+    root.protocol("WM_DELETE_WINDOW", lambda: close_window())
+
+    # фрейм для "панели инструментов"
+    frame_left = ctk.CTkFrame(root, width=300, corner_radius=10)
+    frame_left.pack(side="left", fill="y", padx=10, pady=10)
+
+    # фрейм для визуализации данных
+    frame_right = ctk.CTkFrame(root, corner_radius=10)
+    frame_right.pack(side="right", expand=True, fill="both", padx=10, pady=10)
+
+    # Виджеты в левом фрейме
+    label_title = ctk.CTkLabel(frame_left, text="Анализатор данных", font=("Arial", 20))
+    label_title.pack(pady=10)
+
+    button_load = ctk.CTkButton(frame_left, text="Загрузить файл", command=load_file)
+    button_load.pack(pady=10)
+
+    # индикатор и кнопка отмены (показываются только во время загрузки или сводки)
+    progress_bar = ctk.CTkProgressBar(frame_left)
+    button_cancel = ctk.CTkButton(frame_left, text="Отменить", command=cancel_tasks)
 
-# фрейм для "панели инструментов"
-frame_left = ctk.CTkFrame(root, width=300, corner_radius=10)
-frame_left.pack(side="left", fill="y", padx=10, pady=10)
+    label_columns = ctk.CTkLabel(frame_left, text="Столбцы для графика:")
+    label_columns.pack(pady=5)
 
-# фрейм для визуализации данных
-frame_right = ctk.CTkFrame(root, corner_radius=10)
-frame_right.pack(side="right", expand=True, fill="both", padx=10, pady=10)
+    # выпадающие списки с названиями столбцов (изначально оставляем их пустыми)
+    combo_x = ctk.CTkComboBox(frame_left, values=[], state="readonly")
+    combo_x.pack(pady=5)
+    combo_y = ctk.CTkComboBox(frame_left, values=[], state="readonly")
+    combo_y.pack(pady=5)
 
-# Виджеты в левом фрейме
-label_title = ctk.CTkLabel(frame_left, text="Анализатор данных", font=("Arial", 20))
-label_title.pack(pady=10)
+    label_chart = ctk.CTkLabel(frame_left, text="Тип графика:")
+    label_chart.pack(pady=5)
 
-button_load = ctk.CTkButton(frame_left, text="Загрузить файл", command=load_file)
-button_load.pack(pady=10)
+    chart_type_var = ctk.StringVar(value="Столбчатая")
+    chart_type = ctk.CTkComboBox(master=frame_left, values=["Столбчатая", "Линейная", "Круговая"], variable=chart_type_var)
+    chart_type.pack(pady=5)
 
-label_columns = ctk.CTkLabel(frame_left, text="Столбцы для графика:")
-label_columns.pack(pady=5)
+    label_aggregation = ctk.CTkLabel(frame_left, text="Сводка Y по группам X:")
+    label_aggregation.pack(pady=5)
 
-# выпадающие списки с названиями столбцов (изначально оставляем их пустыми)
-combo_x = ctk.CTkComboBox(frame_left, values=[], state="readonly")
-combo_x.pack(pady=5)
-combo_y = ctk.CTkComboBox(frame_left, values=[], state="readonly")
-combo_y.pack(pady=5)
+    aggregation_var = ctk.StringVar(value="Нет")
+    aggregation = ctk.CTkComboBox(master=frame_left, values=["Нет"] + list(engine.AGGREGATIONS), variable=aggregation_var)
+    aggregation.pack(pady=5)
 
-label_chart = ctk.CTkLabel(frame_left, text="Тип графика:")
-label_chart.pack(pady=5)
+    button_plot = ctk.CTkButton(frame_left, text="Построить график", command=plot_data)
+    button_plot.pack(pady=10)
 
-chart_type_var = ctk.StringVar(value="Столбчатая")
-chart_type = ctk.CTkComboBox(master=frame_left, values=["Столбчатая", "Линейная", "Круговая"], variable=chart_type_var)
-chart_type.pack(pady=5)
+    button_filter = ctk.CTkButton(frame_left, text="Фильтровать данные", command=filter_data)
+    button_filter.pack(pady=10)
 
-button_plot = ctk.CTkButton(frame_left, text="Построить график", command=plot_data)
-button_plot.pack(pady=10)
+    follow_var = ctk.BooleanVar(value=False)
+    switch_follow = ctk.CTkSwitch(frame_left, text="Следить за файлом", variable=follow_var, command=toggle_follow)
+    switch_follow.pack(pady=10)
 
-button_filter = ctk.CTkButton(frame_left, text="Фильтровать данные", command=filter_data)
-button_filter.pack(pady=10)
+    label_indexes = ctk.CTkLabel(frame_left, text="", wraplength=250)
+    label_indexes.pack(pady=5)
 
-# таблица для отображения данных
-table_frame = ctk.CTkFrame(frame_right)
-table_frame.pack(fill="both", expand=True, padx=10, pady=10)
-text_table = ctk.CTkTextbox(table_frame)
-text_table.pack(fill="both", expand=True)
+    # таблица для отображения данных
+    table_frame = ctk.CTkFrame(frame_right)
+    table_frame.pack(fill="both", expand=True, padx=10, pady=10)
+    table_view = VirtualTable(table_frame)
+    table_view.pack(fill="both", expand=True)
 
-# фрейм для графика
-plot_frame = ctk.CTkFrame(frame_right, height=300)
-plot_frame.pack(fill="x", padx=10, pady=10)
+    # фрейм для графика
+    plot_frame = ctk.CTkFrame(frame_right, height=300)
+    plot_frame.pack(fill="x", padx=10, pady=10)
+    plot_surface = PlotSurface(lambda figure: FigureCanvasTkAgg(figure, master=plot_frame))
+    plot_surface.canvas.get_tk_widget().pack(fill="both", expand=True)
 
-root.mainloop()
+    root.mainloop()
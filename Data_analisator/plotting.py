@@ -0,0 +1,277 @@
+# подключаем библиотеки и модули
+import numpy as np
+import pandas as pd
+
+# сколько точек оставлять на линейном графике (примерно ширина графика в пикселях)
+MAX_LINE_POINTS = 2000
+# сколько столбцов/секторов показывать, остальное - в "Другие"
+MAX_CATEGORIES = 20
+OTHER_LABEL = "Другие"
+
+
+# Largest-Triangle-Three-Buckets: из каждого интервала выбирается точка, образующая
+# наибольший треугольник с уже выбранной точкой и средним следующего интервала,
+# поэтому форма графика (пики и провалы) сохраняется. Возвращает индексы выбранных точек
+def lttb(x, y, n_out):
+    size = len(x)
+    if n_out >= size or n_out < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, size - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    # средние значения всех интервалов считаются разом
+    counts = np.diff(edges)
+    x_means = np.add.reduceat(x[:edges[-1]], edges[:-1]) / counts
+    y_means = np.add.reduceat(y[:edges[-1]], edges[:-1]) / counts
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 1 < n_out - 2:
+            next_x, next_y = x_means[bucket + 1], y_means[bucket + 1]
+        else:
+            next_x, next_y = x[-1], y[-1]
+        px, py = x[previous], y[previous]
+        areas = np.abs((px - next_x) * (y[start:stop] - py) - (px - x[start:stop]) * (next_y - py))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+# прореживание "минимум/максимум на интервал": быстрее LTTB, гарантированно сохраняет выбросы
+def minmax_decimate(y, n_buckets):
+    size = len(y)
+    if size <= 2 * n_buckets:
+        return np.arange(size)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, size, n_buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    # индексы минимума и максимума в каждом интервале без цикла по интервалам
+    bucket = np.repeat(np.arange(n_buckets), np.diff(edges))
+    order = np.lexsort((y, bucket))
+    first = order[starts]
+    last = order[edges[1:] - 1]
+    return np.unique(np.concatenate([first, last, [0, size - 1]]))
+
+
+# суммирование значений по категориям в порядке их появления. Если категорий больше top,
+# остаются первые top - 1 по сумме, а остальные сворачиваются в "Другие" (подписи тогда
+# становятся строками). other - как свернуть остальные категории
+def top_categories(labels, values, top=MAX_CATEGORIES, other="sum"):
+    sums = pd.Series(np.asarray(values, dtype=np.float64)).groupby(
+        pd.Series(labels).to_numpy(), sort=False).sum()
+    if len(sums) > top:
+        sums = sums.sort_values(ascending=False)
+        rest = getattr(sums.iloc[top - 1:], other)()
+        sums = pd.concat([sums.iloc[:top - 1], pd.Series({OTHER_LABEL: rest})])
+        sums.index = sums.index.astype(str)
+    return sums.index.tolist(), sums.to_numpy()
+
+
+# точки линейного графика после прореживания
+def reduce_line(x_values, y_values, max_points=MAX_LINE_POINTS, method="lttb"):
+    y = pd.to_numeric(pd.Series(y_values), errors="coerce").to_numpy(dtype=np.float64)
+    x = pd.Series(x_values)
+    keep = ~np.isnan(y)
+    if not keep.all():
+        y = y[keep]
+        x = x[keep]
+    if len(y) <= max_points:
+        return x.to_numpy(), y
+    # если x - числа или даты и идут по возрастанию, прореживаем по ним, иначе по номеру строки
+    if pd.api.types.is_numeric_dtype(x.dtype) or pd.api.types.is_datetime64_any_dtype(x.dtype):
+        raw = x.to_numpy()
+        numeric_x = (raw.view(np.int64) if raw.dtype.kind == "M" else raw).astype(np.float64)
+        if not np.all(np.diff(numeric_x) >= 0):
+            numeric_x = np.arange(len(y), dtype=np.float64)
+    else:
+        numeric_x = np.arange(len(y), dtype=np.float64)
+    if method == "minmax":
+        selected = minmax_decimate(y, max_points // 2)
+    else:
+        selected = lttb(numeric_x, y, max_points)
+    return x.to_numpy()[selected], y[selected]
+
+
+# построение графика выбранного типа с сокращением числа точек перед отрисовкой
+def draw_chart(ax, data, x_col, y_col, chart_type, max_points=MAX_LINE_POINTS, top=MAX_CATEGORIES):
+    if chart_type == "Столбчатая":
+        labels, values = top_categories(data[x_col], data[y_col], top)
+        ax.bar(labels, values)
+        ax.set_xlabel(x_col)
+        ax.set_ylabel(y_col)
+        ax.set_title("Столбчатая диаграмма")
+    elif chart_type == "Линейная":
+        x, y = reduce_line(data[x_col], data[y_col], max_points)
+        # маркеры имеют смысл только пока точек немного
+        ax.plot(x, y, marker='o' if len(y) <= 200 else None)
+        ax.set_xlabel(x_col)
+        ax.set_ylabel(y_col)
+        ax.set_title("Линейный график")
+    elif chart_type == "Круговая":
+        labels, values = top_categories(data[x_col], data[y_col], top)
+        ax.pie(values, labels=labels, autopct='%1.1f%%')
+        ax.set_title("Круговая диаграмма")
+
+
+# постоянная поверхность для графиков: одна фигура и один холст на всё время работы окна.
+# Повторное построение линейного графика меняет данные существующей линии (set_data),
+# а если масштаб осей не изменился - перерисовывается только линия (blitting).
+# canvas_factory(figure) создаёт холст (в окне - FigureCanvasTkAgg)
+class PlotSurface:
+    def __init__(self, canvas_factory, figsize=(8, 4)):
+        from matplotlib.figure import Figure
+        self.figure = Figure(figsize=figsize)
+        self.ax = self.figure.add_subplot()
+        self.canvas = canvas_factory(self.figure)
+        self._line = None
+        self._key = None
+        self._background = None
+        self._limits = None
+
+    # полная перерисовка с запоминанием фона без линии для последующего blitting
+    def _full_draw(self):
+        self.figure.tight_layout()
+        if self._line is not None:
+            self._line.set_visible(False)
+            self.canvas.draw()
+            self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+            self._line.set_visible(True)
+            self.ax.draw_artist(self._line)
+            self.canvas.blit(self.ax.bbox)
+        else:
+            self.canvas.draw()
+            self._background = None
+
+    def update(self, data, x_col, y_col, chart_type, max_points=MAX_LINE_POINTS):
+        key = (chart_type, x_col, y_col)
+        if chart_type == "Линейная" and self._line is not None and self._key == key:
+            x, y = reduce_line(data[x_col], data[y_col], max_points)
+            self._line.set_data(x, y)
+            self._line.set_marker('o' if len(y) <= 200 else '')
+            self.ax.relim()
+            self.ax.autoscale_view()
+            limits = (self.ax.get_xlim(), self.ax.get_ylim())
+            if limits == self._limits and self._background is not None:
+                self.canvas.restore_region(self._background)
+                self.ax.draw_artist(self._line)
+                self.canvas.blit(self.ax.bbox)
+            else:
+                self._limits = limits
+                self._full_draw()
+            return
+
+        # другой тип графика или столбцы - оси очищаются, но фигура и холст остаются
+        self.ax.clear()
+        draw_chart(self.ax, data, x_col, y_col, chart_type, max_points)
+        self.ax.tick_params(axis='x', labelrotation=90)
+        self._line = self.ax.lines[0] if chart_type == "Линейная" and self.ax.lines else None
+        self._key = key
+        self._limits = (self.ax.get_xlim(), self.ax.get_ylim())
+        self._full_draw()
+
+    # освобождение фигуры (при закрытии окна)
+    def close(self):
+        widget = getattr(self.canvas, "get_tk_widget", None)
+        if widget is not None:
+            widget().destroy()
+        self.figure.clear()
+        self._line = None
+        self._background = None
+
+
+# время перерисовки с сокращением точек и без него
+def benchmark_plotting(sizes=(1_000, 10_000, 100_000, 1_000_000)):
+    import time
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    rng = np.random.default_rng(0)
+    print("\nПерерисовка графиков (время в секундах)")
+    print(f"{'точек':>10s} {'тип':>12s} {'без сокращения':>16s} {'с сокращением':>15s}")
+    for size in sizes:
+        data = pd.DataFrame({
+            "x": np.arange(size),
+            "y": np.cumsum(rng.normal(size=size)),
+            "category": rng.choice([f"Категория {i}" for i in range(500)], size),
+        })
+        for chart_type, x_col in (("Линейная", "x"), ("Столбчатая", "category"), ("Круговая", "category")):
+            timings = []
+            for reduced in (False, True):
+                if not reduced and (chart_type != "Линейная" and size > 10_000):
+                    timings.append(float("nan"))  # тысячи столбцов/секторов рисуются минутами
+                    continue
+                fig, ax = plt.subplots(figsize=(8, 4))
+                start = time.perf_counter()
+                if reduced:
+                    draw_chart(ax, data, x_col, "y" if chart_type == "Линейная" else "x", chart_type)
+                elif chart_type == "Линейная":
+                    ax.plot(data["x"], data["y"], marker='o')
+                elif chart_type == "Столбчатая":
+                    ax.bar(data["category"], data["x"])
+                else:
+                    ax.pie(data["x"], labels=data["category"])
+                fig.canvas.draw()
+                timings.append(time.perf_counter() - start)
+                plt.close(fig)
+            print(f"{size:>10d} {chart_type:>12s} {timings[0]:>16.3f} {timings[1]:>15.3f}")
+
+
+# текущая занятая память процесса в МБ (VmRSS)
+def _rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# 1000 перерисовок подряд: новая фигура на каждый раз (как раньше) против PlotSurface
+def benchmark_redraws(redraws=1000, size=100_000):
+    import gc
+    import time
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"x": np.arange(size), "y": np.cumsum(rng.normal(size=size))})
+    print(f"\n{redraws} перерисовок линейного графика по {size} точкам")
+
+    for label in ("новая фигура", "PlotSurface"):
+        gc.collect()
+        memory_before = _rss_mb()
+        surface = PlotSurface(FigureCanvasAgg) if label == "PlotSurface" else None
+        timings = []
+        for i in range(redraws):
+            # небольшой сдвиг данных, как при повторных нажатиях "Построить график"
+            frame = data.iloc[i % 100:]
+            start = time.perf_counter()
+            if surface is None:
+                fig, ax = plt.subplots(figsize=(8, 4))
+                draw_chart(ax, frame, "x", "y", "Линейная")
+                plt.xticks(rotation=90)
+                plt.tight_layout()
+                FigureCanvasAgg(fig).draw()
+            else:
+                surface.update(frame, "x", "y", "Линейная")
+            timings.append(time.perf_counter() - start)
+        gc.collect()
+        memory = _rss_mb() - memory_before
+        timings.sort()
+        print(f"{label:14s}: медиана {timings[len(timings) // 2] * 1000:.1f} мс, "
+              f"p99 {timings[int(len(timings) * 0.99)] * 1000:.1f} мс, "
+              f"прирост памяти {memory:.1f} МБ, открытых фигур pyplot: {len(plt.get_fignums())}")
+        plt.close("all")
+        if surface is not None:
+            surface.close()
+
+
+if __name__ == "__main__":
+    benchmark_plotting()
+    benchmark_redraws()
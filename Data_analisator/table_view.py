@@ -0,0 +1,291 @@
+# подключаем библиотеки и модули
+import threading
+import tkinter as tk
+import numpy as np
+import pandas as pd
+import customtkinter as ctk
+
+ROW_HEIGHT = 22
+CHAR_WIDTH = 8
+MAX_COLUMN_CHARS = 30
+
+
+# ранги категорий: у упорядоченных - их собственный порядок, иначе - по значениям категорий
+# (числа сравниваются как числа); как текст - только категории несравнимых типов
+def _category_ranks(values):
+    categories = values.cat.categories
+    if values.cat.ordered:
+        return np.arange(len(categories))
+    try:
+        order = np.argsort(categories.to_numpy(), kind="stable")
+    except TypeError:
+        order = np.argsort(np.asarray(categories, dtype=object).astype(str), kind="stable")
+    ranks = np.empty(len(categories), dtype=np.int64)
+    ranks[order] = np.arange(len(categories))
+    return ranks
+
+
+# порядок строк для сортировки по столбцу (NaN - в конце)
+def sort_order(series):
+    values = series.reset_index(drop=True)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # категории сортируются один раз, строки - по рангу своей категории (пропуски - последний ранг)
+        ranks = np.append(_category_ranks(values), len(values.cat.categories))
+        return np.argsort(ranks[values.cat.codes.to_numpy()], kind="stable")
+    if pd.api.types.is_numeric_dtype(values.dtype) and not values.hasnans:
+        return np.argsort(values.to_numpy(), kind="stable")
+    return values.sort_values(kind="stable", na_position="last").index.to_numpy()
+
+
+# порядки по возрастанию и по убыванию. Убывание - устойчивая сортировка по рангам значений
+# со знаком минус (а не переворот возрастания), поэтому равные значения сохраняют исходный
+# порядок в обоих направлениях; NaN в обоих случаях в конце
+def sort_orders(series):
+    values = series.reset_index(drop=True)
+    ascending = sort_order(values)
+    valid = len(values) - int(values.isna().sum())
+    head = ascending[:valid]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        keys = values.cat.codes.to_numpy()[head]
+    else:
+        keys = values.to_numpy()[head]
+    ranks = np.concatenate(([0], np.cumsum(keys[1:] != keys[:-1]))) if valid else np.zeros(0, dtype=np.int64)
+    descending = np.concatenate((head[np.argsort(-ranks, kind="stable")], ascending[valid:]))
+    return ascending, descending
+
+
+# формат одной ячейки
+def format_cell(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return ""
+    if isinstance(value, float):
+        return f"{value:g}"
+    text = str(value)
+    return text if len(text) <= MAX_COLUMN_CHARS else text[:MAX_COLUMN_CHARS - 1] + "…"
+
+
+# виртуальная таблица: на холсте есть только столько текстовых элементов, сколько строк
+# помещается в окно; при прокрутке меняется их текст, а значения форматируются
+# только для видимого окна строк. Сортировка по щелчку на заголовке использует
+# индекс argsort, который считается один раз для столбца в фоновом потоке
+class VirtualTable(ctk.CTkFrame):
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.data = None
+        self._order = None            # текущий порядок строк (None - исходный)
+        self._sort_cache = {}         # столбец -> (порядок по возрастанию, порядок по убыванию)
+        self._sort_column = None
+        self._descending = False
+        self._first_row = 0
+        self._cells = []              # [строка][столбец] -> id текстового элемента
+        self._widths = []
+        self._sorting = None
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        colors = dict(bg="#2b2b2b", highlightthickness=0)
+        self.header = tk.Canvas(self, height=ROW_HEIGHT + 4, **colors)
+        self.header.grid(row=0, column=0, sticky="ew")
+        self.canvas = tk.Canvas(self, **colors)
+        self.canvas.grid(row=1, column=0, sticky="nsew")
+        self.v_scroll = ctk.CTkScrollbar(self, command=self._on_vertical_scroll)
+        self.v_scroll.grid(row=1, column=1, sticky="ns")
+        self.h_scroll = ctk.CTkScrollbar(self, orientation="horizontal", command=self._on_horizontal_scroll)
+        self.h_scroll.grid(row=2, column=0, sticky="ew")
+        self.status = ctk.CTkLabel(self, text="", anchor="w")
+        self.status.grid(row=3, column=0, columnspan=2, sticky="ew")
+
+        self.canvas.bind("<Configure>", lambda event: self._build_cells())
+        for widget in (self.canvas, self.header):
+            widget.bind("<MouseWheel>", self._on_mouse_wheel)
+            widget.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+            widget.bind("<Button-5>", lambda event: self.scroll_rows(3))
+        self.header.bind("<Button-1>", self._on_header_click)
+
+    # новые данные (полная таблица или результат фильтра)
+    def set_data(self, data, keep_sort_cache=False):
+        self.data = data
+        self._order = None
+        self._first_row = 0
+        if not keep_sort_cache:
+            self._sort_cache = {}
+        self._sort_column = None
+        self._descending = False
+        self._widths = self._column_widths()
+        self._draw_header()
+        self._build_cells()
+
+    # дописанные в конец строки (слежение за файлом): позиция прокрутки сохраняется, столбцы
+    # только расширяются по новым строкам, перерисовывается только видимое окно; если было
+    # видно последние строки, таблица остаётся прокрученной к концу
+    def append_rows(self, data):
+        at_end = self._first_row + len(self._cells) >= self._row_count()
+        added = len(data) - self._row_count()
+        self.data = data
+        self._sort_cache = {}
+        if self._sort_column is not None:
+            self._order = None
+            self.sort_by(self._sort_column)
+        if added > 0:
+            widths = [max(old, new) for old, new in
+                      zip(self._widths, self._column_widths(data.tail(min(added, 200))))]
+            if widths != self._widths:
+                self._widths = widths
+                self._draw_header()
+                self._build_cells()
+        if at_end:
+            self._first_row = max(self._row_count() - len(self._cells), 0)
+        self._render()
+
+    def _row_count(self):
+        return 0 if self.data is None else len(self.data)
+
+    def _visible_rows(self):
+        return max(self.canvas.winfo_height() // ROW_HEIGHT, 1)
+
+    # ширина столбца по заголовку и первым строкам (или по переданным строкам)
+    def _column_widths(self, sample=None):
+        if self.data is None:
+            return []
+        if sample is None:
+            sample = self.data.head(200)
+        widths = []
+        for column in self.data.columns:
+            chars = max([len(str(column)) + 2] + [len(format_cell(value)) for value in sample[column].tolist()])
+            widths.append(min(chars, MAX_COLUMN_CHARS) * CHAR_WIDTH + 16)
+        return widths
+
+    def _draw_header(self):
+        self.header.delete("all")
+        x = 0
+        for index, (column, width) in enumerate(zip(self._columns(), self._widths)):
+            title = str(column)
+            if column == self._sort_column:
+                title += " ▼" if self._descending else " ▲"
+            self.header.create_rectangle(x, 0, x + width, ROW_HEIGHT + 4, fill="#1f538d", outline="#2b2b2b")
+            self.header.create_text(x + 6, ROW_HEIGHT // 2 + 2, text=title, anchor="w", fill="white",
+                                    font=("Arial", 11, "bold"), tags=(f"column-{index}",))
+            x += width
+        total = sum(self._widths)
+        self.header.configure(scrollregion=(0, 0, total, ROW_HEIGHT + 4))
+        self.canvas.configure(scrollregion=(0, 0, total, self._visible_rows() * ROW_HEIGHT))
+
+    def _columns(self):
+        return [] if self.data is None else list(self.data.columns)
+
+    # текстовые элементы создаются заново только при изменении размера окна или набора столбцов
+    def _build_cells(self):
+        self.canvas.delete("all")
+        self._cells = []
+        rows = self._visible_rows()
+        for row in range(rows):
+            x = 0
+            ids = []
+            for width in self._widths:
+                ids.append(self.canvas.create_text(x + 6, row * ROW_HEIGHT + ROW_HEIGHT // 2, text="",
+                                                   anchor="w", fill="white", font=("Arial", 11)))
+                x += width
+            self._cells.append(ids)
+        self.canvas.configure(scrollregion=(0, 0, sum(self._widths), rows * ROW_HEIGHT))
+        self._render()
+
+    # отрисовка видимого окна строк: форматируются только они
+    def _render(self):
+        total = self._row_count()
+        rows = len(self._cells)
+        self._first_row = max(0, min(self._first_row, max(total - rows, 0)))
+        start, stop = self._first_row, min(self._first_row + rows, total)
+        if total:
+            positions = np.arange(start, stop) if self._order is None else self._order[start:stop]
+            window = self.data.iloc[positions]
+            columns = [window[column].tolist() for column in window.columns]
+        else:
+            columns = []
+        for row, ids in enumerate(self._cells):
+            for column, item in enumerate(ids):
+                text = format_cell(columns[column][row]) if row < stop - start else ""
+                self.canvas.itemconfigure(item, text=text)
+        if total:
+            self.v_scroll.set(start / total, stop / total)
+            self.status.configure(text=f"Строки {start + 1}-{stop} из {total}")
+        else:
+            self.v_scroll.set(0, 1)
+            self.status.configure(text="Нет данных")
+
+    def scroll_rows(self, delta):
+        self._first_row += delta
+        self._render()
+
+    def _on_mouse_wheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_vertical_scroll(self, action, value, unit=None):
+        rows = len(self._cells)
+        if action == "moveto":
+            self._first_row = int(float(value) * self._row_count())
+        elif action == "scroll":
+            self._first_row += int(value) * (rows if unit == "pages" else 1)
+        self._render()
+
+    def _on_horizontal_scroll(self, *args):
+        self.canvas.xview(*args)
+        self.header.xview(*args)
+        first, last = self.canvas.xview()
+        self.h_scroll.set(first, last)
+
+    # сортировка по щелчку на заголовке; повторный щелчок меняет направление
+    def _on_header_click(self, event):
+        x = self.header.canvasx(event.x)
+        edges = np.cumsum(self._widths)
+        index = int(np.searchsorted(edges, x, side="right"))
+        if self.data is None or index >= len(edges):
+            return
+        column = self.data.columns[index]
+        if column == self._sort_column:
+            self._descending = not self._descending
+            self._apply_sort()
+        else:
+            self._sort_column = column
+            self._descending = False
+            self.sort_by(column)
+
+    # сортировка по столбцу; если другая сортировка ещё идёт, эта запустится после неё
+    # (заголовок и порядок строк меняются только когда порядок для столбца готов)
+    def sort_by(self, column):
+        if column in self._sort_cache:
+            self._apply_sort()
+            return
+        self.status.configure(text=f"Сортировка по столбцу {column}...")
+        if self._sorting is not None:
+            return
+        data = self.data
+        result = {}
+
+        def run():
+            result["orders"] = sort_orders(data[column])
+        self._sorting = threading.Thread(target=run, daemon=True)
+        self._sorting.start()
+        self._wait_sort(column, data, result)
+
+    def _wait_sort(self, column, data, result):
+        if self._sorting.is_alive():
+            self.after(50, self._wait_sort, column, data, result)
+            return
+        self._sorting = None
+        if "orders" not in result:
+            self.status.configure(text=f"Не удалось отсортировать по столбцу {column}")
+            return
+        if data is self.data:
+            self._sort_cache[column] = result["orders"]
+        # пока шла сортировка, мог быть выбран другой столбец или пришли новые данные
+        if self._sort_column is not None:
+            self.sort_by(self._sort_column)
+
+    def _apply_sort(self):
+        cached = self._sort_cache.get(self._sort_column)
+        if cached is None:
+            return
+        self._order = cached[1] if self._descending else cached[0]
+        self._first_row = 0
+        self._draw_header()
+        self._render()
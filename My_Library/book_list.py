@@ -0,0 +1,228 @@
+# подключаем библиотеки и модули
+import queue
+import threading
+import tkinter as tk
+from collections import OrderedDict
+import customtkinter as ctk
+from catalog import PAGE_SIZE, get_books_page, get_books_at, count_books
+
+# сколько страниц держать в памяти и сколько загружать заранее за краем окна
+MAX_PAGES = 50
+PREFETCH_PAGES = 1
+# сколько страниц может загружаться одновременно
+MAX_LOADING = 4
+POLL_MS = 30
+# пауза перед повтором неудачного запроса: удваивается с каждой неудачей подряд
+RETRY_MS = 500
+MAX_RETRY_MS = 30_000
+
+
+# строка списка для одной книги
+def format_book(position, book):
+    book_info = f"{position}. {book[1]}"
+    if book[2]: book_info += f" ({book[2]})"
+    if book[3]: book_info += f", {book[3]} г."
+    return book_info
+
+
+# виртуальный список книг: на холсте столько текстовых элементов, сколько строк помещается
+# в окно, а книги загружаются страницами по PAGE_SIZE в фоновых потоках по мере прокрутки.
+# Следующая страница читается по ключу (название, id) последней книги предыдущей; при переходе
+# бегунком в далёкое место, где ключ неизвестен, страница читается по номеру строки
+class BookList(ctk.CTkFrame):
+    def __init__(self, master, font, **kwargs):
+        super().__init__(master, **kwargs)
+        self.font = font
+        self.row_height = font.metrics("linespace") + 6
+        self.total = None                 # число книг (None, пока не посчитано)
+        self._pages = OrderedDict()       # номер страницы -> книги (недавно показанные - в конце)
+        self._keys = {0: None}            # номер страницы -> ключ, после которого она начинается
+        self._loading = set()
+        self._results = queue.Queue()
+        self._generation = 0              # растёт при сбросе: ответы старых запросов отбрасываются
+        self._failures = {}               # страница (None - число книг) -> неудач подряд
+        self._waiting = set()             # страницы, которые ждут повтора после ошибки
+        self._error = None                # последняя ошибка, пока есть неудачные запросы
+        self._polling = False
+        self._first_row = 0
+        self._items = []
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.canvas = tk.Canvas(self, bg="#f9f9fa", highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.v_scroll = ctk.CTkScrollbar(self, command=self._on_vertical_scroll)
+        self.v_scroll.grid(row=0, column=1, sticky="ns")
+        self.status = ctk.CTkLabel(self, text="", anchor="w")
+        self.status.grid(row=1, column=0, columnspan=2, sticky="ew")
+
+        self.canvas.bind("<Configure>", lambda event: self._build_items())
+        self.canvas.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_rows(3))
+
+    # загрузка списка заново (кнопка "Обновить", добавление книги)
+    def reset(self):
+        self._generation += 1
+        self.total = None
+        self._pages.clear()
+        self._keys = {0: None}
+        self._loading.clear()
+        self._failures.clear()
+        self._waiting.clear()
+        self._error = None
+        self._first_row = 0
+        self._start("count", None, count_books)
+        self._render()
+
+    # запрос к БД в фоновом потоке; результат забирается из очереди в _poll
+    def _start(self, kind, page, function, *args):
+        generation = self._generation
+
+        def run():
+            try:
+                self._results.put((generation, kind, page, function(*args)))
+            except Exception as e:
+                self._results.put((generation, "error", page, e))
+        threading.Thread(target=run, daemon=True).start()
+        if not self._polling:
+            self._polling = True
+            self.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        changed = False
+        while not self._results.empty():
+            generation, kind, page, result = self._results.get()
+            if generation != self._generation:
+                continue
+            changed = True
+            if kind == "error":
+                self._failed(page, result)
+                continue
+            self._failures.pop(page, None)
+            if not self._failures:
+                self._error = None
+            if kind == "count":
+                self.total = result
+            else:
+                self._store_page(page, result)
+        if changed:
+            self._render()
+        if self._loading or self.total is None:
+            self.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
+
+    # неудачный запрос повторяется не сразу, а после паузы, растущей с каждой неудачей
+    def _failed(self, page, error):
+        self._loading.discard(page)
+        self._error = error
+        failures = self._failures.get(page, 0) + 1
+        self._failures[page] = failures
+        self._waiting.add(page)
+        self.after(min(RETRY_MS * 2 ** (failures - 1), MAX_RETRY_MS), self._retry, self._generation, page)
+
+    def _retry(self, generation, page):
+        if generation != self._generation:
+            return
+        self._waiting.discard(page)
+        if page is None and self.total is None:
+            self._start("count", None, count_books)
+            return
+        self._render()
+        if page not in self._loading:
+            # запрос больше не нужен: число книг уже известно или страница ушла из окна
+            self._failures.pop(page, None)
+            if not self._failures:
+                self._error = None
+                self._render()
+
+    def _store_page(self, page, books):
+        self._loading.discard(page)
+        self._pages[page] = books
+        if len(books) == PAGE_SIZE:
+            last = books[-1]
+            self._keys[page + 1] = (last[1], last[0])
+        elif self.total is None:
+            # неполная страница - последняя, число книг известно и без COUNT(*)
+            self.total = page * PAGE_SIZE + len(books)
+        while len(self._pages) > MAX_PAGES:
+            self._pages.popitem(last=False)
+
+    # загрузка недостающих страниц видимого окна и соседних с ним
+    def _request_pages(self):
+        first = max(self._first_row // PAGE_SIZE - PREFETCH_PAGES, 0)
+        last = (self._first_row + len(self._items)) // PAGE_SIZE + PREFETCH_PAGES
+        if self.total is not None:
+            last = min(last, max(self.total - 1, 0) // PAGE_SIZE)
+        for page in range(first, last + 1):
+            if len(self._loading) >= MAX_LOADING:
+                break
+            if page in self._pages or page in self._loading or page in self._waiting:
+                continue
+            self._loading.add(page)
+            if page in self._keys:
+                self._start("page", page, get_books_page, self._keys[page])
+            else:
+                self._start("page", page, get_books_at, page * PAGE_SIZE)
+
+    def _visible_rows(self):
+        return max(self.canvas.winfo_height() // self.row_height, 1)
+
+    # текстовые элементы создаются заново только при изменении размера окна
+    def _build_items(self):
+        self.canvas.delete("all")
+        self._items = [self.canvas.create_text(10, row * self.row_height + self.row_height // 2, text="",
+                                               anchor="w", font=self.font)
+                       for row in range(self._visible_rows())]
+        self._render()
+
+    # отрисовка видимого окна; строки ещё не загруженных страниц показываются как "..."
+    def _render(self):
+        rows = len(self._items)
+        if self.total is not None:
+            self._first_row = max(0, min(self._first_row, max(self.total - rows, 0)))
+        start = self._first_row
+        for row, item in enumerate(self._items):
+            position = start + row
+            text = ""
+            if self.total == 0:
+                text = "Каталог пуст" if row == 0 else ""
+            elif self.total is None or position < self.total:
+                books = self._pages.get(position // PAGE_SIZE)
+                if books is not None:
+                    self._pages.move_to_end(position // PAGE_SIZE)
+                    if position % PAGE_SIZE < len(books):
+                        text = format_book(position + 1, books[position % PAGE_SIZE])
+                else:
+                    text = "..."
+            self.canvas.itemconfigure(item, text=text)
+        if self.total:
+            stop = min(start + rows, self.total)
+            self.v_scroll.set(start / self.total, stop / self.total)
+            status = f"Книги {start + 1}-{stop} из {self.total}"
+        elif self.total is None:
+            status = "Загрузка..."
+        else:
+            self.v_scroll.set(0, 1)
+            status = ""
+        if self._error is not None:
+            # ошибка остаётся в строке состояния, пока все неудачные запросы не выполнятся
+            status = f"Ошибка загрузки: {self._error}"
+        self.status.configure(text=status)
+        self._request_pages()
+
+    def scroll_rows(self, delta):
+        self._first_row = max(self._first_row + delta, 0)
+        self._render()
+
+    def _on_mouse_wheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_vertical_scroll(self, action, value, unit=None):
+        if action == "moveto":
+            if self.total:
+                self._first_row = int(float(value) * self.total)
+        elif action == "scroll":
+            self._first_row = max(self._first_row + int(value) * (len(self._items) if unit == "pages" else 1), 0)
+        self._render()
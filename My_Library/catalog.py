@@ -0,0 +1,554 @@
+# подключаем библиотеки и модули
+import threading
+from contextlib import contextmanager
+from tkinter import messagebox
+from pool import ConnectionPool, DirectConnections
+from result_cache import ResultCache
+from search_index import SearchIndex
+
+# параметры подключения к MySQL
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "************",
+    "database": "my_library",
+}
+# сколько соединений держит пул
+POOL_SIZE = 5
+# сколько книг возвращает поиск по индексу и сколько id передаётся в одном запросе IN (...)
+SEARCH_LIMIT = 1000
+FETCH_CHUNK = 500
+# сколько книг в одной странице списка
+PAGE_SIZE = 100
+
+_pool = None
+_search_index = None                 # готовый индекс поиска (None, пока строится)
+_index_generation = 0                # растёт при замене индекса новым (после импорта)
+_index_lock = threading.Lock()       # согласует построение индекса с добавлением книг
+_version = 0                         # версия каталога: растёт при каждом изменении списка книг
+_version_lock = threading.Lock()
+_cache = ResultCache()               # кэш списка и поиска (None - без кэша)
+
+
+# функция для подключения к базе данных my_library
+def mysql_connect():
+    import mysql.connector
+    return mysql.connector.connect(**DB_CONFIG)
+
+
+# общий пул соединений для всех функций работы с БД (создаётся при первом обращении)
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(mysql_connect, max_size=POOL_SIZE)
+    return _pool
+
+
+# замена источника соединений (например, SQLite для замеров); pooled=False - соединение на каждый вызов
+def set_backend(connect, pooled=True, **pool_options):
+    global _pool
+    if _pool is not None:
+        _pool.close()
+    _pool = ConnectionPool(connect, **pool_options) if pooled else DirectConnections(connect)
+    return _pool
+
+
+# соединение из пула на время блока with. Ошибка подключения пробрасывается вызывающему:
+# функции каталога вызываются и из фоновых потоков, где окно трогать нельзя
+@contextmanager
+def create_connection():
+    pool = get_pool()
+    conn = pool.acquire()
+    broken = False
+    try:
+        yield conn
+    except Exception:
+        broken = not ConnectionPool.is_healthy(conn)
+        raise
+    finally:
+        pool.release(conn, broken)
+
+
+# замена кэша результатов (None - каждый запрос идёт в БД)
+def set_cache(cache):
+    global _cache
+    _cache = cache
+    return cache
+
+
+def cache_stats():
+    return _cache.stats() if _cache is not None else {}
+
+
+def catalog_version():
+    return _version
+
+
+# отметка изменения каталога: результаты, закэшированные при прежней версии, больше не выдаются
+def mark_changed():
+    global _version
+    with _version_lock:
+        _version += 1
+
+
+# результат из кэша или из БД (load); версия запоминается до запроса, поэтому результат,
+# прочитанный во время добавления книги, помечается старой версией и не переживёт его.
+# Ошибка load пробрасывается и ничего не кэширует
+def _read_through(key, load):
+    cache = _cache
+    version = _version
+    if cache is not None:
+        found, value = cache.get(key, version)
+        if found:
+            return value
+    value = load()
+    if cache is not None:
+        cache.put(key, version, value)
+    return value
+
+
+# функция для инициализации базы данных (создаём БД и таблицу с книгами, если её не существовало)
+def initialize_database():
+    try:
+        import mysql.connector
+        conn = mysql.connector.connect(
+            host=DB_CONFIG["host"],
+            user=DB_CONFIG["user"],
+            password=DB_CONFIG["password"]
+        )
+        cursor = conn.cursor()  # курсор для выполнения sql-запросов
+        cursor.execute("CREATE DATABASE IF NOT EXISTS my_library")
+        cursor.execute("USE my_library")
+        cursor.execute("""CREATE TABLE IF NOT EXISTS books (id INT AUTO_INCREMENT PRIMARY KEY,
+        title VARCHAR(100) NOT NULL, author VARCHAR(100), year INT)""")
+        # индекс (название, id) для постраничного вывода: страница читается из индекса без сортировки таблицы
+        cursor.execute("SHOW INDEX FROM books WHERE Key_name = 'idx_books_title_id'")
+        if not cursor.fetchall():
+            cursor.execute("CREATE INDEX idx_books_title_id ON books (title, id)")
+        conn.commit()  # сохраняем изменения в базе данных
+        conn.close()  # закрываем соединение с клиентом
+    except Exception as e:
+        messagebox.showerror("Ошибка", f"Ошибка БД: {e}")
+
+
+# функция для получения списка всех книг, хранящихся в БД
+def get_all_books():
+    # соединение берётся из пула и возвращается в него после запроса
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM books ORDER BY title")
+        return cursor.fetchall()  # возвращаем записи в виде упорядоченного списка
+
+
+# страница списка книг в порядке (название, id), начиная после книги с ключом after = (название, id).
+# Ключ вместо OFFSET: сервер находит начало страницы по индексу, не пропуская предыдущие строки
+def get_books_page(after=None, limit=PAGE_SIZE):
+    return _read_through(("page", after, limit), lambda: _load_books_page(after, limit))
+
+
+def _load_books_page(after, limit):
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        if after is None:
+            cursor.execute("SELECT * FROM books ORDER BY title, id LIMIT %s", (limit,))
+        else:
+            title, book_id = after
+            cursor.execute("SELECT * FROM books WHERE title >= %s AND (title > %s OR id > %s) "
+                           "ORDER BY title, id LIMIT %s", (title, title, book_id, limit))
+        return cursor.fetchall()
+
+
+# страница по номеру первой строки - для перехода в произвольное место списка, когда ключ
+# предыдущей страницы неизвестен (дальше список снова читается по ключам)
+def get_books_at(offset, limit=PAGE_SIZE):
+    return _read_through(("offset", offset, limit), lambda: _load_books_at(offset, limit))
+
+
+def _load_books_at(offset, limit):
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM books ORDER BY title, id LIMIT %s OFFSET %s", (limit, offset))
+        return cursor.fetchall()
+
+
+def count_books():
+    return _read_through(("count",), _count_books)
+
+
+def _count_books():
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM books")
+        return cursor.fetchone()[0]
+
+
+# строки результата запроса порциями, без загрузки всей таблицы разом
+def _stream_rows(cursor, size=10_000):
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+# все книги по порядку через потоковый курсор: строки приходят порциями fetchmany,
+# в памяти одновременно не больше batch строк
+def iter_books(batch=1000):
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM books ORDER BY title, id")
+        yield from _stream_rows(cursor, batch)
+
+
+# функция для добавления книг в БД (вызывается из окна: ошибка показывается сообщением)
+def add_book(title, author="", year=""):
+    try:
+        with create_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO books (title, author, year) VALUES (%s, %s, %s)",
+                (title, author if author else None, int(year) if year.isdigit() else None))
+            conn.commit()
+            # новая книга сразу попадает в индекс поиска
+            with _index_lock:
+                if _search_index is not None:
+                    _search_index.add(cursor.lastrowid, title, author)
+            mark_changed()
+            return True
+    except Exception as e:
+        messagebox.showerror("Ошибка", f"Ошибка добавления: {e}")
+        return False
+
+
+# построение индекса поиска по названию и автору (по умолчанию - в фоновом потоке);
+# пока индекс строится (или если построить его не удалось), поиск работает через LIKE
+def build_search_index(background=True):
+    def build():
+        global _search_index, _index_generation
+        with create_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, title, author FROM books")
+            index = SearchIndex().build(_stream_rows(cursor))
+            # книги, добавленные во время построения; новый снимок данных - после rollback
+            with _index_lock:
+                conn.rollback()
+                cursor.execute("SELECT id, title, author FROM books WHERE id > %s", (index.max_id,))
+                for book_id, title, author in cursor.fetchall():
+                    index.add(book_id, title, author)
+                _search_index = index
+                # результаты поиска по прежнему индексу больше не выдаются из кэша
+                _index_generation += 1
+
+    def build_in_background():
+        try:
+            build()
+        except Exception:
+            pass  # окно из фонового потока трогать нельзя, поиск остаётся на LIKE
+
+    if not background:
+        build()
+        return None
+    thread = threading.Thread(target=build_in_background, daemon=True)
+    thread.start()
+    return thread
+
+
+# после массового импорта индекс поиска строится заново (если он уже был построен):
+# до готовности нового индекса поиск идёт по старому
+def refresh_after_import():
+    if _search_index is not None:
+        build_search_index()
+
+
+# функция для поиска книг, хранящихся в БД: по индексу - подстрока в названии или авторе
+# без учёта регистра, самые подходящие книги первыми
+def search_books(query, limit=SEARCH_LIMIT):
+    # поколение читается до индекса: индекс заменяется раньше, чем растёт поколение,
+    # поэтому результат нового индекса не попадёт в кэш под ключом старого
+    generation = _index_generation
+    index = _search_index
+    # до готовности индекса поиск идёт только по названию - это другой результат
+    return _read_through(("search", query, limit, generation if index is not None else None),
+                         lambda: _search_books(query, limit, index))
+
+
+def _search_books(query, limit, index):
+    with create_connection() as conn:
+        cursor = conn.cursor()
+        if index is None:
+            cursor.execute("SELECT * FROM books WHERE LOWER(title) LIKE LOWER(%s) ORDER BY title",
+                           (f"%{query}%",))
+            return cursor.fetchall()
+        ids = index.search(query, limit)
+        found = {}
+        for first in range(0, len(ids), FETCH_CHUNK):
+            part = ids[first:first + FETCH_CHUNK]
+            cursor.execute(f"SELECT * FROM books WHERE id IN ({', '.join(['%s'] * len(part))})", part)
+            found.update((row[0], row) for row in cursor.fetchall())
+        # порядок - по релевантности из индекса
+        return [found[book_id] for book_id in ids if book_id in found]
+
+
+# задержка вызовов с пулом и без него на заменителе MySQL (SQLite); задержка соединения
+# имитирует TCP-рукопожатие и авторизацию на сервере
+def benchmark_pool(calls=300, books=2000, delays=(0.0, 0.002, 0.01)):
+    import os
+    import tempfile
+    import threading
+    import time
+    from sqlite_backend import initialize_sqlite, sqlite_connector
+    set_cache(None)  # замеряются запросы к БД, а не кэш
+    directory = tempfile.mkdtemp(prefix="library-")
+    path = os.path.join(directory, "library.db")
+    initialize_sqlite(path)
+    set_backend(sqlite_connector(path), pooled=False)
+    for i in range(books):
+        add_book(f"Книга {i}", f"Автор {i % 97}", str(1900 + i % 120))
+
+    print(f"\nПул соединений: {calls} вызовов каждой функции, каталог {books} книг (SQLite)")
+    operations = {
+        "search_books": lambda i: search_books("книга 12"),
+        "add_book": lambda i: add_book(f"Новая книга {i}", "Автор", "2024"),
+        "get_all_books": lambda i: get_all_books(),
+    }
+    for delay in delays:
+        for pooled in (False, True):
+            pool = set_backend(sqlite_connector(path, delay), pooled=pooled)
+            line = []
+            for name, operation in operations.items():
+                timings = []
+                for i in range(calls):
+                    start = time.perf_counter()
+                    operation(i)
+                    timings.append(time.perf_counter() - start)
+                timings.sort()
+                line.append(f"{name} {timings[len(timings) // 2] * 1000:.2f} мс")
+            print(f"соединение {delay * 1000:4.0f} мс, {'пул     ' if pooled else 'без пула'}: "
+                  f"{', '.join(line)} (открыто соединений: {pool.stats()['created']})")
+
+    # ограничение размера: 16 потоков делят 4 соединения
+    pool = set_backend(sqlite_connector(path, 0.002), max_size=4)
+    peak = []
+
+    def worker():
+        for _ in range(50):
+            search_books("книга 7")
+            peak.append(pool.stats()["opened"])
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"16 потоков x 50 поисков с пулом на 4 соединения: {time.perf_counter() - start:.2f} с, "
+          f"открыто не больше {max(peak)}, {pool.stats()}")
+    pool.close()
+    import shutil
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+# тестовый каталог в файле SQLite: названия и авторы из случайных русских слов
+def generate_catalog(path, books, seed=0):
+    import random
+    import string
+    from sqlite_backend import SQLiteConnection, initialize_sqlite
+    rng = random.Random(seed)
+    words = ("война мир преступление наказание отцы дети мёртвые души герой нашего времени мастер маргарита "
+             "идиот бесы братья карамазовы горе от ума вишнёвый сад чайка тихий дон белая гвардия собачье сердце "
+             "капитанская дочка евгений онегин обломов накануне записки охотника старик море остров сокровищ "
+             "золотой телёнок двенадцать стульев солнце ветер дорога дом город река лес зима лето ночь").split()
+    # редкие слова, чтобы среди запросов были и редкие, и частые
+    words += ["".join(rng.choices(string.ascii_lowercase, k=7)) for _ in range(200)]
+    first = "Лев Фёдор Антон Иван Михаил Александр Николай Анна Марина Борис Сергей Евгений".split()
+    last = "Толстой Достоевский Чехов Тургенев Булгаков Пушкин Гоголь Ахматова Цветаева Пастернак Есенин " \
+           "Шолохов Гончаров Лермонтов Грибоедов Ильф Петров Хемингуэй Стивенсон".split()
+    initialize_sqlite(path)
+    conn = SQLiteConnection(path)
+    cursor = conn.cursor()
+    rows = ((" ".join(rng.choices(words, k=rng.randint(1, 4))).capitalize(),
+             f"{rng.choice(first)} {rng.choice(last)}", rng.randint(1800, 2024)) for _ in range(books))
+    cursor.executemany("INSERT INTO books (title, author, year) VALUES (%s, %s, %s)", rows)
+    conn.commit()
+    conn.close()
+
+
+# задержка поиска: LIKE-перебор таблицы против триграммного индекса, время построения
+# и размер индекса (SQLite вместо MySQL)
+def benchmark_search(books=5_000_000, repeats=5):
+    import os
+    import resource
+    import shutil
+    import tempfile
+    import time
+    global _search_index
+    from sqlite_backend import sqlite_connector
+    set_cache(None)  # замеряются запросы к БД, а не кэш
+    directory = tempfile.mkdtemp(prefix="library-")
+    path = os.path.join(directory, "library.db")
+    start = time.perf_counter()
+    generate_catalog(path, books)
+    print(f"\nПоиск: каталог {books} книг (SQLite) создан за {time.perf_counter() - start:.1f} с")
+    set_backend(sqlite_connector(path))
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    build_search_index(background=False)
+    print(f"построение индекса: {time.perf_counter() - start:.1f} с, индекс {_search_index.nbytes / 2 ** 20:.0f} МБ, "
+          f"прирост пика памяти {(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024:.0f} МБ")
+
+    queries = ["война", "МАСТЕР", "толстой", "мёртвые души", "ёж", "карамазовы горе", "несуществующее"]
+    index = _search_index
+    for query in queries:
+        timings = {}
+        counts = {}
+        for label, ready in (("LIKE", None), ("индекс", index)):
+            _search_index = ready
+            best = None
+            for _ in range(1 if ready is None else repeats):
+                start = time.perf_counter()
+                found = search_books(query)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[label] = best
+            counts[label] = len(found)
+        print(f"{query!r:18s}: LIKE {timings['LIKE'] * 1000:7.0f} мс ({counts['LIKE']} книг), "
+              f"индекс {timings['индекс'] * 1000:6.1f} мс (первые {counts['индекс']}), "
+              f"в {timings['LIKE'] / timings['индекс']:.0f} раз быстрее")
+
+    start = time.perf_counter()
+    add_book("Ёжик в тумане", "Сергей Козлов", "1969")
+    found = search_books("ЁЖИК В ТУМАНЕ")
+    print(f"добавление книги и поиск её по индексу: {(time.perf_counter() - start) * 1000:.1f} мс, "
+          f"первая найденная: {found[0][1] if found else None}")
+    _search_index = None
+    get_pool().close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+# время до первой страницы списка: полная выгрузка get_all_books с форматированием всех строк
+# (как было в окне) против страницы по ключу; глубокие страницы - по ключу и через OFFSET
+def benchmark_pages(books=5_000_000, pages=200):
+    import os
+    import resource
+    import shutil
+    import tempfile
+    import time
+    from book_list import format_book
+    from sqlite_backend import sqlite_connector
+    set_cache(None)  # замеряются запросы к БД, а не кэш
+    directory = tempfile.mkdtemp(prefix="library-")
+    path = os.path.join(directory, "library.db")
+    start = time.perf_counter()
+    generate_catalog(path, books)
+    print(f"\nСписок книг: каталог {books} книг (SQLite) создан за {time.perf_counter() - start:.1f} с")
+    set_backend(sqlite_connector(path))
+
+    def timed(function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        return result, time.perf_counter() - start
+
+    first, elapsed = timed(get_books_page)
+    lines = [format_book(position + 1, book) for position, book in enumerate(first)]
+    print(f"первая страница ({len(lines)} книг) по ключу: {elapsed * 1000:.1f} мс")
+    key = None
+    start = time.perf_counter()
+    for _ in range(pages):
+        page = get_books_page(key)
+        key = (page[-1][1], page[-1][0])
+    print(f"{pages} страниц подряд по ключу: {(time.perf_counter() - start) / pages * 1000:.2f} мс на страницу")
+    for offset in (books // 2, books - PAGE_SIZE):
+        page, by_offset = timed(get_books_at, offset)
+        previous = get_books_at(offset - 1, 1)[0]
+        _, by_key = timed(get_books_page, (previous[1], previous[0]))
+        print(f"страница с книги {offset}: OFFSET {by_offset * 1000:.0f} мс, по ключу {by_key * 1000:.1f} мс")
+    total, elapsed = timed(count_books)
+    print(f"COUNT(*): {elapsed * 1000:.0f} мс")
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    streamed = sum(1 for _ in iter_books())
+    print(f"потоковый курсор: {streamed} книг за {time.perf_counter() - start:.1f} с, прирост пика памяти "
+          f"{(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024:.0f} МБ")
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    lines = [format_book(position + 1, book) for position, book in enumerate(get_all_books())]
+    print(f"get_all_books и форматирование {len(lines)} строк до показа первой: {time.perf_counter() - start:.1f} с, "
+          f"прирост пика памяти {(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024:.0f} МБ")
+    get_pool().close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+# задержка повторяющихся поисков и обновления списка с кэшем и без него: запросы выбираются
+# из небольшого набора с убывающей частотой (популярные запросы повторяются чаще)
+def benchmark_cache(books=1_000_000, calls=2000, like_calls=30):
+    import os
+    import random
+    import shutil
+    import tempfile
+    import time
+    global _search_index
+    from sqlite_backend import sqlite_connector
+    directory = tempfile.mkdtemp(prefix="library-")
+    path = os.path.join(directory, "library.db")
+    generate_catalog(path, books)
+    set_backend(sqlite_connector(path))
+    set_cache(None)
+    build_search_index(background=False)
+    print(f"\nКэш результатов: каталог {books} книг (SQLite)")
+    queries = ["война", "мир", "мастер", "толстой", "чехов", "мёртвые души", "сад", "ночь", "дом", "река",
+               "тихий дон", "евгений", "белая гвардия", "горе от ума", "остров", "солнце", "зима", "лето",
+               "собачье сердце", "чайка"]
+    rng = random.Random(0)
+    weights = [1 / (rank + 1) for rank in range(len(queries))]
+    operations = []
+    for _ in range(calls):
+        if rng.random() < 0.1:
+            # кнопка "Обновить": число книг и первая страница
+            operations.append(lambda: (count_books(), get_books_page()))
+        else:
+            query = rng.choices(queries, weights)[0]
+            operations.append(lambda query=query: search_books(query))
+
+    def run(label, operations):
+        timings = []
+        for operation in operations:
+            start = time.perf_counter()
+            operation()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        stats = cache_stats()
+        ratio = f", попаданий {stats['hits'] / max(stats['hits'] + stats['misses'], 1):.0%}" if stats else ""
+        print(f"{label:32s}: среднее {sum(timings) / len(timings) * 1000:7.2f} мс, медиана "
+              f"{timings[len(timings) // 2] * 1000:7.3f} мс, 95% {timings[int(len(timings) * 0.95)] * 1000:7.2f} мс{ratio}")
+
+    index = _search_index
+    for label, ready, count in (("индекс", index, calls), ("LIKE (индекс не готов)", None, like_calls)):
+        _search_index = ready
+        set_cache(None)
+        run(f"{label}, без кэша", operations[:count])
+        set_cache(ResultCache())
+        run(f"{label}, с кэшем", operations[:count])
+
+    # точная инвалидация: после add_book повторный поиск идёт в БД и находит новую книгу
+    _search_index = index
+    before = search_books("уэллс")
+    add_book("Война миров", "Герберт Уэллс", "1897")
+    found = search_books("уэллс")
+    print(f"после add_book: найдено книг было {len(before)}, стало {len(found)}, {cache_stats()}")
+    _search_index = None
+    get_pool().close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import sys
+    # python catalog.py search | pages | cache - замер поиска, списка или кэша; без аргументов - замер пула
+    if sys.argv[1:] == ["search"]:
+        benchmark_search()
+    elif sys.argv[1:] == ["pages"]:
+        benchmark_pages()
+    elif sys.argv[1:] == ["cache"]:
+        benchmark_cache()
+    else:
+        benchmark_pool()
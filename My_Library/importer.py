@@ -0,0 +1,368 @@
+# подключаем библиотеки и модули
+import csv
+import datetime
+import json
+import os
+import queue
+import re
+import threading
+import time
+import catalog
+
+# книг в одной порции проверки и executemany; строк в одной транзакции
+BATCH_ROWS = 5000
+TRANSACTION_ROWS = 50_000
+MAX_TEXT = 100                 # длина полей VARCHAR(100)
+MIN_YEAR = 1000
+MAX_ERRORS = 100               # сколько отклонённых строк запоминать для отчёта
+# названия полей в файле (без учёта регистра)
+FIELDS = {
+    "title": ("title", "название", "name"),
+    "author": ("author", "автор", "authors"),
+    "year": ("year", "год", "год издания"),
+}
+YEAR_PATTERN = re.compile(r"(?<!\d)\d{4}(?!\d)")   # отдельное четырёхзначное число
+SEPARATORS = re.compile(r"[\s,]*")         # между объектами массива JSON
+INSERT = "INSERT INTO books (title, author, year) VALUES (%s, %s, %s)"
+
+
+# записи CSV по одной (словарь по заголовку); разделитель определяется по началу файла.
+# Второе значение - сколько байт файла уже прочитано (для прогресса)
+def read_csv_records(file_path):
+    with open(file_path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        for record in csv.DictReader(f, dialect=dialect):
+            yield record, f.buffer.tell()
+
+
+# записи JSON: массив объектов разбирается по частям (файл не читается целиком)
+# или JSON Lines - по объекту в строке
+def read_json_records(file_path, chunk_size=1024 * 1024):
+    decoder = json.JSONDecoder()
+    with open(file_path, encoding="utf-8-sig") as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            # JSON Lines
+            f.seek(0)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line), f.buffer.tell()
+            return
+        position = 1
+        failed = None
+        while True:
+            position = SEPARATORS.match(buffer, position).end()
+            if len(buffer) - position < chunk_size // 2:
+                # в буфере кончаются данные: остаток переносится в начало и дочитывается файл
+                buffer = buffer[position:] + f.read(chunk_size)
+                position = SEPARATORS.match(buffer).end()
+            if buffer.startswith("]", position) or position >= len(buffer):
+                return
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                # та же ошибка в том же месте записи после дочитывания: запись целиком в буфере,
+                # но не разбирается (или она длиннее chunk_size) - дальше файл не читается
+                error = (e.msg, e.pos - position)
+                more = f.read(chunk_size) if error != failed else ""
+                if not more:
+                    raise
+                buffer = buffer[position:] + more
+                position = 0
+                failed = error
+                continue
+            failed = None
+            yield record, f.buffer.tell()
+
+
+def read_records(file_path):
+    if file_path.lower().endswith((".json", ".jsonl")):
+        return read_json_records(file_path)
+    return read_csv_records(file_path)
+
+
+def _field(record, name):
+    for key in FIELDS[name]:
+        if key in record:
+            return record[key]
+    return None
+
+
+def _text(value):
+    if value is None:
+        return ""
+    return " ".join(str(value).split())
+
+
+# автор: лишние пробелы убираются, "Толстой, Лев" -> "Лев Толстой",
+# записанный целиком строчными или заглавными - с заглавной буквы каждое слово
+def normalize_author(author):
+    author = _text(author)
+    if not author:
+        return None
+    if author.count(",") == 1:
+        last, first = (part.strip() for part in author.split(","))
+        if last and first:
+            author = f"{first} {last}"
+    if author.isupper() or author.islower():
+        author = author.title()
+    return author[:MAX_TEXT]
+
+
+# год: число из строки ("1869", "1869 г.", 1869.0); неправдоподобный год не сохраняется
+def normalize_year(year, max_year=None):
+    if year is None or year == "":
+        return None
+    if isinstance(year, float) and year.is_integer():
+        year = int(year)
+    if isinstance(year, int) and not isinstance(year, bool):
+        value = year
+    else:
+        match = YEAR_PATTERN.search(str(year))
+        if not match:
+            return None
+        value = int(match.group())
+    max_year = max_year or datetime.date.today().year + 1
+    return value if MIN_YEAR <= value <= max_year else None
+
+
+# проверка и приведение порции записей: строки для INSERT и отклонённые записи (номер, причина)
+def normalize_batch(records, first_number=1):
+    max_year = datetime.date.today().year + 1
+    rows = []
+    rejected = []
+    for number, record in enumerate(records, first_number):
+        if not isinstance(record, dict):
+            rejected.append((number, "запись не является объектом"))
+            continue
+        # заголовки и ключи сравниваются без учёта регистра и пробелов по краям
+        record = {str(key).strip().lower(): value for key, value in record.items() if key is not None}
+        title = _text(_field(record, "title"))
+        if not title:
+            rejected.append((number, "нет названия"))
+            continue
+        rows.append((title[:MAX_TEXT], normalize_author(_field(record, "author")),
+                     normalize_year(_field(record, "year"), max_year)))
+    return rows, rejected
+
+
+# очистка очереди порций (при отмене или ошибке записи)
+def _drain(batches):
+    while True:
+        try:
+            batches.get_nowait()
+        except queue.Empty:
+            return
+
+
+# фоновый импорт файла CSV/JSON: чтение и проверка порциями в этом потоке, запись - в writers
+# потоках, у каждого своё соединение из пула; порции записываются executemany и фиксируются
+# транзакциями примерно по transaction_rows строк. События в очереди events:
+# ("progress", статистика), ("done", статистика), ("cancelled", статистика), ("error", исключение)
+class ImportTask:
+    def __init__(self, file_path, batch_rows=BATCH_ROWS, transaction_rows=TRANSACTION_ROWS, writers=1):
+        self.file_path = file_path
+        self.batch_rows = batch_rows
+        self.transaction_rows = transaction_rows
+        self.writers = max(writers, 1)
+        self.events = queue.Queue()
+        self.errors = []                   # первые MAX_ERRORS отклонённых записей (номер, причина)
+        self.read = 0
+        self.written = 0                   # строк в зафиксированных транзакциях
+        self.rejected = 0
+        self.progress = 0.0
+        self._started = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._failure = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def stats(self):
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        with self._lock:
+            return {"read": self.read, "written": self.written, "rejected": self.rejected,
+                    "progress": self.progress, "elapsed": elapsed,
+                    "rate": self.written / elapsed if elapsed else 0.0}
+
+    def _run(self):
+        self._started = time.perf_counter()
+        # очередь ограничена: чтение не убегает вперёд записи и не копит файл в памяти
+        batches = queue.Queue(maxsize=2 * self.writers)
+        writers = [threading.Thread(target=self._write, args=(batches,), daemon=True) for _ in range(self.writers)]
+        for writer in writers:
+            writer.start()
+        try:
+            size = os.path.getsize(self.file_path) or 1
+            records = []
+            for record, position in read_records(self.file_path):
+                records.append(record)
+                if len(records) == self.batch_rows:
+                    self._put_batch(batches, records, position / size)
+                    records = []
+                if self._cancel.is_set():
+                    break
+            if records and not self._cancel.is_set():
+                self._put_batch(batches, records, 1.0)
+        except Exception as e:
+            self._failure = self._failure or e
+            self._cancel.set()
+        if self._cancel.is_set():
+            _drain(batches)
+        for _ in writers:
+            batches.put(None)
+        for writer in writers:
+            writer.join()
+        if self.written:
+            # индекс поиска перестраивается целиком: миллионы книг в добавочном индексе были бы медленнее
+            catalog.refresh_after_import()
+        if self._failure is not None:
+            self.events.put(("error", self._failure))
+        elif self._cancel.is_set():
+            self.events.put(("cancelled", self.stats()))
+        else:
+            self.progress = 1.0
+            self.events.put(("done", self.stats()))
+
+    def _put_batch(self, batches, records, progress):
+        rows, rejected = normalize_batch(records, self.read + 1)
+        with self._lock:
+            self.read += len(records)
+            self.rejected += len(rejected)
+            self.progress = progress
+            self.errors.extend(rejected[:MAX_ERRORS - len(self.errors)])
+        while not self._cancel.is_set():
+            try:
+                batches.put(rows, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self.events.put(("progress", self.stats()))
+
+    # поток записи: executemany по порции, commit после transaction_rows строк
+    def _write(self, batches):
+        try:
+            with catalog.get_pool().connection() as conn:
+                cursor = conn.cursor()
+                pending = 0
+                while True:
+                    rows = batches.get()
+                    if rows is None or self._cancel.is_set():
+                        break
+                    if rows:
+                        cursor.executemany(INSERT, rows)
+                        pending += len(rows)
+                    if pending >= self.transaction_rows:
+                        conn.commit()
+                        catalog.mark_changed()
+                        with self._lock:
+                            self.written += pending
+                        pending = 0
+                if pending and not self._cancel.is_set():
+                    conn.commit()
+                    catalog.mark_changed()
+                    with self._lock:
+                        self.written += pending
+        except Exception as e:
+            self._failure = self._failure or e
+            self._cancel.set()
+            # освобождаем чтение, если оно ждёт места в очереди
+            _drain(batches)
+
+    # синхронное ожидание результата (для скриптов и замеров)
+    def result(self):
+        self._thread.join()
+        last = None
+        while not self.events.empty():
+            last = self.events.get()
+        if last is not None and last[0] == "error":
+            raise last[1]
+        return None if last is None else last[1]
+
+
+# тестовый файл издательского каталога с "грязными" данными: авторы в разном регистре
+# и в виде "Фамилия, Имя", годы с буквами и неправдоподобные, строки без названия
+def generate_books_file(file_path, rows, seed=0):
+    import random
+    rng = random.Random(seed)
+    words = "война мир отцы дети мёртвые души мастер маргарита идиот бесы чайка сад дом река лес ночь".split()
+    authors = ["Лев Толстой", "ТОЛСТОЙ, ЛЕВ", "фёдор достоевский", "Чехов, Антон", "  Иван   Тургенев ", "", None]
+    years = [1869, "1880 г.", "около 1900", "3000", "", 1966.0, "н/д"]
+
+    def record(i):
+        title = " ".join(rng.choices(words, k=rng.randint(1, 4))).capitalize() if i % 97 else " "
+        return {"Название": title, "Автор": rng.choice(authors), "Год": rng.choice(years)}
+
+    if file_path.endswith(".json"):
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write("[\n")
+            for i in range(rows):
+                f.write(("," if i else "") + json.dumps(record(i), ensure_ascii=False) + "\n")
+            f.write("]\n")
+    else:
+        with open(file_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["Название", "Автор", "Год"], delimiter=";")
+            writer.writeheader()
+            for i in range(rows):
+                writer.writerow(record(i))
+
+
+# строк в секунду: add_book по одной книге против импорта порциями при разных размерах
+# порции, транзакции и числе потоков записи (SQLite вместо MySQL)
+def benchmark_import(rows=1_000_000, single_rows=2000,
+                     settings=((1000, 50_000, 1), (5000, 50_000, 1), (5000, 500_000, 1), (5000, 50_000, 4))):
+    import shutil
+    import tempfile
+    from sqlite_backend import initialize_sqlite, sqlite_connector
+    directory = tempfile.mkdtemp(prefix="library-import-")
+    csv_path = os.path.join(directory, "books.csv")
+    json_path = os.path.join(directory, "books.json")
+    generate_books_file(csv_path, rows)
+    generate_books_file(json_path, rows)
+    print(f"\nИмпорт каталога: {rows} строк, CSV {os.path.getsize(csv_path) / 2 ** 20:.0f} МБ, "
+          f"JSON {os.path.getsize(json_path) / 2 ** 20:.0f} МБ (SQLite)")
+
+    def fresh_database(name):
+        path = os.path.join(directory, name)
+        initialize_sqlite(path)
+        catalog.set_backend(sqlite_connector(path))
+
+    fresh_database("single.db")
+    start = time.perf_counter()
+    for record, _ in zip((record for record, _ in read_csv_records(csv_path)), range(single_rows)):
+        catalog.add_book(record["Название"].strip() or "-", record["Автор"], record["Год"])
+    rate = single_rows / (time.perf_counter() - start)
+    print(f"add_book по одной: {rate:,.0f} строк/с (оценка для всего файла {rows / rate / 60:.0f} мин)")
+
+    for path in (csv_path, json_path):
+        for batch_rows, transaction_rows, writers in settings:
+            fresh_database(f"import-{batch_rows}-{transaction_rows}-{writers}.db")
+            task = ImportTask(path, batch_rows, transaction_rows, writers).start()
+            stats = task.result()
+            print(f"{os.path.splitext(path)[1][1:]:4s} порция {batch_rows:5d}, транзакция {transaction_rows:6d}, "
+                  f"потоков {writers}: {stats['rate']:,.0f} строк/с ({stats['written']} записано, "
+                  f"{stats['rejected']} отклонено, {stats['elapsed']:.1f} с)")
+    catalog.get_pool().close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark_import()
@@ -1,104 +1,18 @@
 # подключаем библиотеки и модули
-import mysql.connector
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
+# работа с БД (через общий пул соединений) - в catalog.py
+from catalog import initialize_database, build_search_index, add_book, search_books
+from book_list import BookList
+from importer import ImportTask
 
-
-# функция для подключения к базе данных my_library
-def create_connection():
-    try:
-        conn = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="************",
-            database="my_library"
-        )
-        return conn
-    except Exception as e:
-        messagebox.showerror("Ошибка", f"Не удалось подключиться: {e}")
-        return None
-
-
-# функция для инициализации базы данных (создаём БД и таблицу с книгами, если её не существовало)
-def initialize_database():
-    try:
-        conn = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="************"
-        )
-        cursor = conn.cursor()  # курсор для выполнения sql-запросов
-        cursor.execute("CREATE DATABASE IF NOT EXISTS my_library")
-        cursor.execute("USE my_library")
-        cursor.execute("""CREATE TABLE IF NOT EXISTS books (id INT AUTO_INCREMENT PRIMARY KEY, 
-        title VARCHAR(100) NOT NULL, author VARCHAR(100), year INT)""")
-        conn.commit()  # сохраняем изменения в базе данных
-        conn.close()  # закрываем соединение с клиентом
-    except Exception as e:
-        messagebox.showerror("Ошибка", f"Ошибка БД: {e}")
-
-
-# функция для получения списка всех книг, хранящихся в БД
-def get_all_books():
-    # подключение к БД
-    conn = create_connection()
-    if not conn: return []
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM books ORDER BY title")
-        return cursor.fetchall()  # возвращаем записи в виде упорядоченного списка
-    finally:
-        conn.close()  # закрываем соединение с клиентом
-
-
-# функция для добавления книг в БД
-def add_book(title, author="", year=""):
-    conn = create_connection()
-    if not conn: return False
-    try:
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO books (title, author, year) VALUES (%s, %s, %s)",
-            (title, author if author else None, int(year) if year.isdigit() else None))
-        conn.commit()
-        return True
-    except Exception as e:
-        messagebox.showerror("Ошибка", f"Ошибка добавления: {e}")
-        return False
-    finally:
-        conn.close()
+import_task = None
 
 
-# функция для поиска книг, хранящихся в БД
-def search_books(query):
-    conn = create_connection()
-    if not conn: return []
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM books WHERE LOWER(title) LIKE LOWER(%s) ORDER BY title",
-                       (f"%{query}%",))
-        return cursor.fetchall()
-    finally:
-        conn.close()
-
-
-# функция для регулярного обновления списка книг
+# функция для регулярного обновления списка книг: список загружается заново страницами
+# по мере прокрутки, в памяти и на экране - только видимая часть каталога
 def update_books_list():
-    books = get_all_books()
-    books_list.configure(state="normal")
-    books_list.delete("0.0", "end")
-
-    if not books:
-        books_list.insert("end", "Каталог пуст")
-    else:
-        pos = 1
-        for book in books:
-            book_info = f"{pos}. {book[1]}"
-            if book[2]: book_info += f" ({book[2]})"
-            if book[3]: book_info += f", {book[3]} г."
-            books_list.insert("end", book_info + "\n")
-            pos += 1
-
-    books_list.configure(state="disabled")
+    books_list.reset()
 
 
 # функция-обработчик для кнопки "Добавить"
@@ -116,6 +30,55 @@ def add_new_book():
         messagebox.showinfo("Успех", "Книга добавлена")
 
 
+# функция-обработчик для кнопки "Импорт": файл читается и записывается в БД в фоне
+def import_file():
+    global import_task
+    if import_task is not None:
+        return 0
+    file_path = filedialog.askopenfilename(filetypes=[("Каталог книг", "*.csv *.json *.jsonl")])
+    if not file_path:
+        return 0
+    import_task = ImportTask(file_path).start()
+    import_progress.set(0)
+    import_progress.pack(padx=20, pady=5, fill="x")
+    import_label.pack()
+    import_cancel.pack(pady=5)
+    app.after(200, poll_import_task)
+
+
+# отмена импорта (записанные транзакции остаются в БД)
+def cancel_import():
+    if import_task is not None:
+        import_task.cancel()
+
+
+# прогресс импорта (вызывается из цикла Tk)
+def poll_import_task():
+    global import_task
+    task = import_task
+    while not task.events.empty():
+        kind, value = task.events.get()
+        if kind == "progress":
+            import_progress.set(value["progress"])
+            import_label.configure(text=f"Прочитано {value['read']}, записано {value['written']}, "
+                                        f"отклонено {value['rejected']} ({value['rate']:.0f} строк/с)")
+        else:
+            import_task = None
+            import_progress.pack_forget()
+            import_label.pack_forget()
+            import_cancel.pack_forget()
+            update_books_list()
+            if kind == "error":
+                messagebox.showerror("Ошибка", f"Ошибка импорта: {value}")
+            else:
+                report = f"Записано книг: {value['written']}, отклонено строк: {value['rejected']}"
+                if task.errors:
+                    report += "\n" + "\n".join(f"строка {number}: {reason}" for number, reason in task.errors[:10])
+                messagebox.showinfo("Импорт прерван" if kind == "cancelled" else "Импорт завершён", report)
+            return 0
+    app.after(200, poll_import_task)
+
+
 # функция-обработчик для кнопки "Искать"
 def perform_search():
     query = search_entry.get().strip()
@@ -123,7 +86,11 @@ def perform_search():
         messagebox.showwarning("Ошибка", "Введите запрос")
         return
 
-    results = search_books(query)
+    try:
+        results = search_books(query)
+    except Exception as e:
+        messagebox.showerror("Ошибка", f"Ошибка поиска: {e}")
+        return
     search_results.configure(state="normal")
     search_results.delete("1.0", "end")
 
@@ -155,6 +122,7 @@ my_font = ctk.CTkFont(family='Arial', size=20, weight='bold')
 
 # инициализируем БД
 initialize_database()
+build_search_index()  # индекс поиска строится в фоне, окно открывается сразу
 
 # вкладки
 tabview = ctk.CTkTabview(app)
@@ -166,7 +134,7 @@ tabview.pack(padx=10, pady=10, fill="both", expand=True)
 
 # вкладка "Все книги"
 view_tab = tabview.add("Все книги")
-books_list = ctk.CTkTextbox(view_tab, wrap="word", font=my_font)
+books_list = BookList(view_tab, font=my_font)
 books_list.pack(padx=10, pady=10, fill="both", expand=True)
 ctk.CTkButton(view_tab, text="Обновить", fg_color='darkolivegreen', hover_color='grey', command=update_books_list, font=my_font).pack(pady=5)
 
@@ -187,9 +155,17 @@ year_entry.pack(padx=20, pady=5, fill="x")
 ctk.CTkButton(add_tab, text="Добавить", fg_color='darkolivegreen', hover_color='grey',
               command=add_new_book, font=my_font).pack(pady=20)
 
+# массовый импорт из файла; полоса прогресса и отмена показываются во время импорта
+ctk.CTkButton(add_tab, text="Импорт из файла (CSV, JSON)...", fg_color='darkolivegreen', hover_color='grey',
+              command=import_file, font=my_font).pack(pady=5)
+import_progress = ctk.CTkProgressBar(add_tab, progress_color='darkolivegreen4')
+import_label = ctk.CTkLabel(add_tab, text="", font=my_font)
+import_cancel = ctk.CTkButton(add_tab, text="Отмена", fg_color='darkolivegreen', hover_color='grey',
+                              command=cancel_import, font=my_font)
+
 # вкладка "Поиск книг"
 search_tab = tabview.add("Поиск книг")
-ctk.CTkLabel(search_tab, text="Введите название книги:", font=my_font).pack(pady=(10, 0))
+ctk.CTkLabel(search_tab, text="Введите название или автора:", font=my_font).pack(pady=(10, 0))
 search_entry = ctk.CTkEntry(search_tab, font=my_font)
 search_entry.pack(padx=20, pady=5, fill="x")
 ctk.CTkButton(search_tab, text="Искать", fg_color='darkolivegreen', hover_color='grey', command=perform_search, font=my_font).pack(pady=5)
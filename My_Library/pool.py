@@ -0,0 +1,204 @@
+# подключаем библиотеки и модули
+import threading
+import time
+from contextlib import contextmanager
+
+
+# свободного соединения не дождались за отведённое время
+class PoolTimeout(Exception):
+    pass
+
+
+# пул соединений с БД: не больше max_size открытых соединений, свободные соединения
+# переиспользуются (последнее возвращённое - первым), перед выдачей давно не проверявшееся
+# соединение проверяется запросом SELECT 1, а простаивающие дольше idle_timeout закрываются.
+# connect() - функция, открывающая новое соединение (mysql.connector.connect или заменитель)
+class ConnectionPool:
+    def __init__(self, connect, max_size=5, idle_timeout=300.0, check_interval=30.0, timeout=10.0):
+        self.connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self.timeout = timeout
+        self._idle = []               # [(соединение, время возврата, время последней проверки)]
+        self._opened = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        # счётчики для замеров и отладки
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self.failed_checks = 0
+        self._reaper = threading.Thread(target=self._reap, daemon=True)
+        self._reaper.start()
+
+    # проверка соединения: у mysql.connector есть is_connected(), в остальных случаях - SELECT 1
+    @staticmethod
+    def is_healthy(conn):
+        try:
+            check = getattr(conn, "is_connected", None)
+            if check is not None:
+                return check()
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # соединение из пула: свободное берётся под блокировкой, а проверка SELECT 1 и закрытие
+    # негодного идут уже после неё, чтобы медленное или зависшее соединение не задерживало
+    # выдачу и возврат соединений в других потоках
+    def acquire(self, timeout=None):
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        while True:
+            conn = None
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise PoolTimeout("Пул соединений закрыт")
+                    if self._idle:
+                        conn, returned, checked = self._idle.pop()
+                        break
+                    if self._opened < self.max_size:
+                        self._opened += 1
+                        break
+                    left = deadline - time.monotonic()
+                    if left <= 0:
+                        raise PoolTimeout(f"Нет свободных соединений (всего {self.max_size})")
+                    self._condition.wait(left)
+            if conn is None:
+                return self._open()
+            now = time.monotonic()
+            if now - returned > self.idle_timeout:
+                self._drop(conn, "evicted")
+                continue
+            if now - checked > self.check_interval and not self.is_healthy(conn):
+                self._drop(conn, "failed_checks")
+                continue
+            with self._condition:
+                self.reused += 1
+            return conn
+
+    # новое соединение открывается вне блокировки, чтобы не задерживать другие потоки
+    def _open(self):
+        try:
+            conn = self.connect()
+        except Exception:
+            with self._condition:
+                self._opened -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.created += 1
+        return conn
+
+    # закрытие взятого из пула соединения вне блокировки; место в пуле освобождается
+    def _drop(self, conn, counter):
+        self._close(conn)
+        with self._condition:
+            self._opened -= 1
+            setattr(self, counter, getattr(self, counter) + 1)
+            self._condition.notify()
+
+    # возврат соединения; незавершённая транзакция откатывается, чтобы следующий
+    # пользователь соединения не видел её и не читал устаревший снимок данных
+    def release(self, conn, broken=False):
+        if not broken:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        with self._condition:
+            if broken or self._closed:
+                self._discard(conn)
+            else:
+                now = time.monotonic()
+                self._idle.append((conn, now, now))
+            self._condition.notify()
+
+    def _discard(self, conn):
+        self._opened -= 1
+        self._close(conn)
+
+    # соединение на время блока with; при ошибке соединение проверяется и, если оно
+    # больше не работает, закрывается, а не возвращается в пул
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except Exception:
+            self.release(conn, broken=not self.is_healthy(conn))
+            raise
+        else:
+            self.release(conn)
+
+    # закрытие соединений, которые простаивают дольше idle_timeout
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._condition:
+            keep = []
+            for item in self._idle:
+                if now - item[1] > self.idle_timeout:
+                    self._discard(item[0])
+                    self.evicted += 1
+                else:
+                    keep.append(item)
+            self._idle = keep
+
+    # фоновый поток, который периодически закрывает простаивающие соединения
+    def _reap(self):
+        while not self._stop.wait(max(self.idle_timeout / 2, 0.05)):
+            self.evict_idle()
+
+    def close(self):
+        self._stop.set()
+        with self._condition:
+            self._closed = True
+            for conn, _, _ in self._idle:
+                self._discard(conn)
+            self._idle = []
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {"opened": self._opened, "idle": len(self._idle), "created": self.created,
+                    "reused": self.reused, "evicted": self.evicted, "failed_checks": self.failed_checks}
+
+
+# соединение на каждый вызов, как было до пула (для сравнения и для отключения пула)
+class DirectConnections:
+    def __init__(self, connect):
+        self.connect = connect
+        self.created = 0
+
+    def acquire(self, timeout=None):
+        self.created += 1
+        return self.connect()
+
+    def release(self, conn, broken=False):
+        ConnectionPool._close(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {"created": self.created}
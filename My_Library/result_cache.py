@@ -0,0 +1,59 @@
+# подключаем библиотеки и модули
+import threading
+import time
+from collections import OrderedDict
+
+# сколько результатов хранить и сколько секунд результат считается свежим
+MAX_ENTRIES = 512
+TTL = 60.0
+
+
+# кэш результатов запросов к каталогу (LRU + время жизни). Каждая запись помечена версией
+# каталога, при которой была прочитана: после изменения каталога версия растёт и старые
+# записи больше не выдаются. Время жизни ограничивает устаревание из-за изменений,
+# сделанных в обход этого процесса (другим клиентом БД)
+class ResultCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()    # ключ -> (версия, срок годности, результат)
+        self._lock = threading.Lock()
+        # счётчики для замеров и отладки
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0                   # записи, устаревшие из-за изменения каталога
+        self.expired = 0                 # записи с истёкшим временем жизни
+
+    # (True, результат) или (False, None), если записи нет или она устарела
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, expires, value = entry
+                if entry_version == version and time.monotonic() < expires:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+                if entry_version != version:
+                    self.stale += 1
+                else:
+                    self.expired += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "stale": self.stale, "expired": self.expired}
@@ -0,0 +1,246 @@
+# подключаем библиотеки и модули
+import heapq
+import sys
+import numpy as np
+
+# число корзин для триграмм: триграмма хэшируется в корзину, совпадения хэшей
+# дают лишних кандидатов, которые отсеиваются проверкой подстроки
+BUCKET_BITS = 22
+# сколько книг держать в добавочном индексе, прежде чем перестроить основной
+MAX_DELTA = 100_000
+# сколько книг разбирается за раз при построении
+BATCH_BOOKS = 200_000
+# разделители полей и книг в общем тексте (в названиях не встречаются)
+FIELD_SEPARATOR = "\x1f"
+DOC_SEPARATOR = "\x1e"
+
+
+# приведение к виду для поиска: casefold (правильно понижает регистр и кириллицы),
+# "ё" равна "е", лишние пробелы убираются
+def normalize(text):
+    if not text:
+        return ""
+    return " ".join(str(text).casefold().replace("ё", "е").split())
+
+
+# корзины триграмм для массива кодов символов (UTF-32): по одной на каждое окно из трёх символов
+def _buckets(codes):
+    codes = codes.astype(np.uint64)
+    mixed = (codes[:-2] * np.uint64(0x9E3779B1)) ^ (codes[1:-1] * np.uint64(0x85EBCA77)) ^ (codes[2:] * np.uint64(0xC2B2AE3D))
+    return ((mixed ^ (mixed >> np.uint64(29))) & np.uint64((1 << BUCKET_BITS) - 1)).astype(np.int64)
+
+
+def _codes(text):
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+# (id, текст книги) -> батчи ([id], [текст]) по batch книг
+def _batches(books, batch):
+    ids, texts = [], []
+    for book_id, text in books:
+        ids.append(book_id)
+        texts.append(text)
+        if len(ids) == batch:
+            yield ids, texts
+            ids, texts = [], []
+    if ids:
+        yield ids, texts
+
+
+# корзины триграмм батча и номера книг, в которых они встречаются, отсортированные
+# по (корзина, книга) без повторов; окна, задевающие разделитель, не учитываются
+def _part_trigrams(part, lengths, first):
+    codes = _codes(part)
+    if len(codes) < 3:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+    separator = (codes == ord(FIELD_SEPARATOR)) | (codes == ord(DOC_SEPARATOR))
+    valid = ~(separator[:-2] | separator[1:-1] | separator[2:])
+    docs = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)[:len(codes) - 2]
+    keys = (_buckets(codes)[valid] << 32) | docs[valid]
+    keys.sort()
+    keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])] if len(keys) else keys
+    return keys >> 32, ((keys & 0xFFFFFFFF) + first).astype(np.int32)
+
+
+# состояние индекса: основная часть в массивах NumPy - для каждой корзины триграмм
+# отсортированный список номеров книг (postings) и смещения (offsets), - и добавочный индекс
+# (словарь) для книг, добавленных после построения. Основная часть после сборки не меняется
+class _State:
+    __slots__ = ("ids", "max_id", "text", "starts", "offsets", "postings",
+                 "delta_ids", "delta_text", "delta_postings", "known")
+
+    def __init__(self, ids, text, starts, offsets, postings):
+        self.ids = ids                    # номер книги -> id в БД
+        self.max_id = int(ids.max()) if len(ids) else 0
+        self.text = text                  # "название\x1fавтор\x1e" всех книг основной части
+        self.starts = starts              # начало текста каждой книги в text
+        self.offsets = offsets
+        self.postings = postings
+        self.delta_ids = []
+        self.delta_text = []
+        self.delta_postings = {}
+        self.known = set()                # id книг добавочного индекса
+
+    def __len__(self):
+        return len(self.ids) + len(self.delta_ids)
+
+    def doc_text(self, doc):
+        if doc < len(self.ids):
+            return self.text[self.starts[doc]:self.starts[doc + 1] - 1]
+        return self.delta_text[doc - len(self.ids)]
+
+    def book_id(self, doc):
+        return int(self.ids[doc]) if doc < len(self.ids) else self.delta_ids[doc - len(self.ids)]
+
+    def bucket_docs(self, bucket):
+        docs = self.postings[self.offsets[bucket]:self.offsets[bucket + 1]]
+        delta = self.delta_postings.get(bucket)
+        if delta:
+            docs = np.concatenate([docs, np.asarray(delta, dtype=np.int32)])
+        return docs
+
+    # книги-кандидаты: в них есть все триграммы запроса (начиная с самой редкой)
+    def candidates(self, query):
+        buckets = sorted(set(_buckets(_codes(query)).tolist()),
+                         key=lambda bucket: self.offsets[bucket + 1] - self.offsets[bucket])
+        docs = None
+        for bucket in buckets:
+            found = self.bucket_docs(bucket)
+            docs = found if docs is None else np.intersect1d(docs, found, assume_unique=True)
+            if not len(docs):
+                break
+        return docs
+
+    # короткий запрос (меньше трёх символов) - поиск подстроки по всему тексту каталога
+    def scan(self, query):
+        docs = []
+        position = self.text.find(query)
+        while position >= 0:
+            doc = int(np.searchsorted(self.starts, position, side="right")) - 1
+            docs.append(doc)
+            # дальше ищем со следующей книги
+            position = self.text.find(query, int(self.starts[doc + 1]))
+        docs.extend(len(self.ids) + i for i, text in enumerate(self.delta_text) if query in text)
+        return docs
+
+
+# батчи (id, тексты книг) складываются в строки; корзины триграмм считаются дважды -
+# сначала число книг в каждой корзине, затем номера книг раскладываются по местам.
+# Так в памяти не бывает пар (корзина, книга) сразу для всего каталога
+def _build_state(batches):
+    ids, lengths, parts = [], [], []
+    for batch_ids, texts in batches:
+        ids.append(np.asarray(batch_ids, dtype=np.int64))
+        lengths.append(np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts)))
+        parts.append(DOC_SEPARATOR.join(texts) + DOC_SEPARATOR)
+    ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+    starts = np.zeros(len(ids) + 1, dtype=np.int64)
+    if lengths:
+        np.cumsum(np.concatenate(lengths), out=starts[1:])
+    counts = np.zeros(1 << BUCKET_BITS, dtype=np.int64)
+    first = 0
+    for part, part_lengths in zip(parts, lengths):
+        buckets, _ = _part_trigrams(part, part_lengths, first)
+        counts += np.bincount(buckets, minlength=1 << BUCKET_BITS)
+        first += len(part_lengths)
+    offsets = np.zeros((1 << BUCKET_BITS) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    postings = np.empty(offsets[-1], dtype=np.int32)
+    filled = offsets[:-1].copy()
+    first = 0
+    for part, part_lengths in zip(parts, lengths):
+        buckets, docs = _part_trigrams(part, part_lengths, first)
+        # батчи идут по порядку книг, поэтому списки книг в корзинах остаются отсортированными
+        rank = np.arange(len(buckets)) - np.searchsorted(buckets, buckets)
+        postings[filled[buckets] + rank] = docs
+        filled += np.bincount(buckets, minlength=1 << BUCKET_BITS)
+        first += len(part_lengths)
+    return _State(ids, "".join(parts), starts, offsets, postings)
+
+
+# триграммный индекс по названию и автору. Поиск берёт ссылку на состояние один раз,
+# а build и compact собирают новое состояние отдельно и подменяют его одним присваиванием:
+# поиск из другого потока не видит наполовину переписанных массивов
+class SearchIndex:
+    def __init__(self):
+        self._state = _build_state([])
+
+    def __len__(self):
+        return len(self._state)
+
+    @property
+    def ids(self):
+        return self._state.ids
+
+    @property
+    def max_id(self):
+        return self._state.max_id
+
+    # построение основного индекса по строкам (id, название, автор), например из курсора БД
+    def build(self, rows, batch=BATCH_BOOKS):
+        self._state = _build_state(_batches(((book_id, normalize(title) + FIELD_SEPARATOR + normalize(author))
+                                             for book_id, title, author in rows), batch))
+        return self
+
+    # добавление одной книги (после add_book) - в добавочный индекс.
+    # Номер книги и её корзины дописываются после текста, поэтому поиск не встретит номер без текста
+    def add(self, book_id, title, author=None):
+        state = self._state
+        # книга могла уже попасть в индекс при построении
+        if book_id in state.known or (book_id <= state.max_id and (state.ids == book_id).any()):
+            return
+        state.known.add(book_id)
+        text = normalize(title) + FIELD_SEPARATOR + normalize(author)
+        doc = len(state)
+        state.delta_text.append(text)
+        state.delta_ids.append(book_id)
+        codes = _codes(text)
+        if len(codes) >= 3:
+            separator = codes == ord(FIELD_SEPARATOR)
+            valid = ~(separator[:-2] | separator[1:-1] | separator[2:])
+            for bucket in set(_buckets(codes)[valid].tolist()):
+                state.delta_postings.setdefault(bucket, []).append(doc)
+        if len(state.delta_ids) > MAX_DELTA:
+            self.compact()
+
+    # перенос добавочного индекса в основной: новое состояние строится рядом со старым
+    def compact(self):
+        state = self._state
+        ids = state.ids.tolist() + state.delta_ids
+        self._state = _build_state(_batches(((ids[doc], state.doc_text(doc)) for doc in range(len(ids))),
+                                            BATCH_BOOKS))
+
+    # id найденных книг по убыванию релевантности:
+    # название совпадает с запросом, начинается с него, запрос - начало слова в названии,
+    # подстрока названия, затем совпадения по автору; при равенстве - более короткое название
+    def search(self, query, limit=None):
+        query = normalize(query)
+        if not query:
+            return []
+        state = self._state
+        docs = state.candidates(query) if len(query) >= 3 else state.scan(query)
+        ranked = []
+        for doc in (docs.tolist() if isinstance(docs, np.ndarray) else docs):
+            title, author = state.doc_text(doc).split(FIELD_SEPARATOR)
+            if query in title:
+                if title == query:
+                    rank = 0
+                elif title.startswith(query):
+                    rank = 1
+                elif f" {query}" in title:
+                    rank = 2
+                else:
+                    rank = 3
+            elif query in author:
+                rank = 4 if author.startswith(query) or f" {query}" in author else 5
+            else:
+                continue  # совпадение хэшей триграмм, а не подстрока
+            ranked.append((rank, len(title), title, doc))
+        best = heapq.nsmallest(limit, ranked) if limit is not None else sorted(ranked)
+        return [state.book_id(doc) for _, _, _, doc in best]
+
+    @property
+    def nbytes(self):
+        state = self._state
+        return state.postings.nbytes + state.offsets.nbytes + state.ids.nbytes + state.starts.nbytes + \
+            sys.getsizeof(state.text)
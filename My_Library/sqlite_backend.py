@@ -0,0 +1,84 @@
+# подключаем библиотеки и модули
+import sqlite3
+import time
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS books (id INTEGER PRIMARY KEY AUTOINCREMENT,
+title VARCHAR(100) NOT NULL, author VARCHAR(100), year INT)"""
+# индекс для постраничного вывода в порядке (название, id)
+TITLE_INDEX = "CREATE INDEX IF NOT EXISTS idx_books_title_id ON books (title, id)"
+
+
+# заменитель MySQL для замеров: соединение SQLite с тем же интерфейсом, что у mysql.connector
+# (параметры запроса %s, cursor/commit/rollback/close). connect_delay имитирует
+# TCP-рукопожатие и авторизацию, которых у локального файла нет
+class SQLiteConnection:
+    def __init__(self, path, connect_delay=0.0):
+        if connect_delay:
+            time.sleep(connect_delay)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # встроенный LOWER в SQLite меняет регистр только латиницы, а MySQL - и кириллицы
+        self._conn.create_function("LOWER", 1, lambda text: text.lower() if isinstance(text, str) else text,
+                                   deterministic=True)
+
+    def cursor(self):
+        return SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+class SQLiteCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace("%s", "?"), params)
+        return self
+
+    def executemany(self, sql, rows):
+        self._cursor.executemany(sql.replace("%s", "?"), rows)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+# функция открытия соединения для пула
+def sqlite_connector(path, connect_delay=0.0):
+    return lambda: SQLiteConnection(path, connect_delay)
+
+
+# создание таблицы книг в файле SQLite
+def initialize_sqlite(path):
+    conn = SQLiteConnection(path)
+    cursor = conn.cursor()
+    cursor.execute(SCHEMA)
+    cursor.execute(TITLE_INDEX)
+    conn.commit()
+    conn.close()